@@ -0,0 +1,460 @@
+"""
+Append-only audit log of every prediction the app shows.
+
+Each "Analyze My Risk" click is recorded with its inputs (including the
+weight and height a BMI was computed from), the BMI input mode, probability,
+risk label, decision threshold and the SHA-256 of the model that scored it.
+
+Recording never touches the disk: `record` copies the values into a slot of a
+preallocated in-memory ring buffer and returns. A background thread drains
+the buffer every `flush_interval` seconds (sooner once it is half full) and
+appends the records in one write to the current segment file. If the writer
+falls behind until the buffer is full, new records are dropped and counted
+(`stats()["dropped"]`, diabetes_audit_dropped_records in instrumentation.py)
+instead of blocking the page.
+
+Segments are binary and columnar-friendly: a magic string, a JSON header
+(format version, record dtype) padded to 64 bytes, then fixed-width
+little-endian records, so a reader memory-maps a whole segment as one NumPy
+record array. A segment is closed and a new one started once it holds
+`segment_bytes`. A record torn by a crash is ignored on read. How often the
+data is forced to disk is the fsync policy:
+
+* "always":   after every batch written;
+* "interval": at most every `fsync_interval` seconds (default);
+* "rotate":   when a segment is closed;
+* "never":    left to the operating system.
+
+Records go to audit/ (APP_AUDIT_DIR to change it, APP_AUDIT=0 to disable).
+
+Usage:
+    python app/audit.py stats
+    python app/audit.py export audit.csv --since 2026-10-01
+    python app/audit.py export audit.parquet --version 3f2a...
+    python app/audit.py replay
+"""
+import argparse
+import atexit
+import json
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from instrumentation import metrics
+from scoring import FEATURES, MODEL_PATH, ROOT, file_sha256
+
+ENV_ENABLED = "APP_AUDIT"
+ENV_DIR = "APP_AUDIT_DIR"
+AUDIT_DIR = ROOT / "audit"
+
+SEGMENT_MAGIC = b"DIABAUDT"
+SEGMENT_VERSION = 1
+SEGMENT_PATTERN = "audit-*.seg"
+_ALIGN = 64
+
+CAPACITY = 65_536
+SEGMENT_BYTES = 64 << 20
+FLUSH_INTERVAL = 1.0
+FSYNC_INTERVAL = 5.0
+FSYNC_POLICIES = ("always", "interval", "rotate", "never")
+
+BMI_MODES = ("direct", "weight_height")
+
+# 92 bytes per prediction; weight and height are NaN when the BMI was entered directly
+RECORD_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("glucose", "<f8"),
+    ("bmi", "<f8"),
+    ("weight_kg", "<f8"),
+    ("height_cm", "<f8"),
+    ("age", "u1"),
+    ("pregnancies", "u1"),
+    ("bmi_mode", "u1"),
+    ("probability", "<f8"),
+    ("threshold", "<f8"),
+    ("high_risk", "u1"),
+    # Raw SHA-256 digest; zeros when unknown
+    ("model_version", "V32"),
+])
+
+
+class AuditLog:
+    """
+    Ring buffer of prediction records drained to segment files by a writer thread.
+
+    Parameters:
+    -----------
+    directory : Directory the segments are written to
+    capacity : Records held in memory at most; further ones are dropped
+    segment_bytes : Size at which a segment is closed and the next one started
+    fsync : When written data is forced to disk, one of FSYNC_POLICIES
+    flush_interval : Seconds between the writer's drains of the buffer
+    fsync_interval : Seconds between fsyncs under the "interval" policy
+    enabled : Record at all (default: unless APP_AUDIT=0)
+    """
+
+    def __init__(self, directory=None, capacity=CAPACITY, segment_bytes=SEGMENT_BYTES,
+                 fsync="interval", flush_interval=FLUSH_INTERVAL,
+                 fsync_interval=FSYNC_INTERVAL, enabled=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"unknown fsync policy {fsync!r}, expected one of {FSYNC_POLICIES}")
+        if enabled is None:
+            enabled = os.environ.get(ENV_ENABLED, "1") != "0"
+        self.enabled = enabled
+        self.directory = Path(directory or os.environ.get(ENV_DIR) or AUDIT_DIR)
+        self.capacity = capacity
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self._buffer = np.zeros(capacity, dtype=RECORD_DTYPE)
+        self._start = 0
+        self._count = 0
+        # `_lock` guards the buffer, `_io_lock` the segment file
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._writer = None
+        self._file = None
+        self._segment = None
+        self._segment_size = 0
+        self._sequence = 0
+        self._synced = 0.0
+        self._dirty = False
+        self._written = 0
+        self._dropped = 0
+        self._errors = 0
+        self._last_error = None
+
+    def record(self, glucose, bmi, age, pregnancies, proba, threshold, model_version,
+               weight_kg=None, height_cm=None, timestamp=None):
+        """
+        Buffer one prediction; never blocks on I/O.
+
+        The BMI mode is "weight_height" when `weight_kg` is given, else
+        "direct". Returns False if the record was dropped (buffer full) or
+        recording is disabled.
+        """
+        if not self.enabled:
+            return False
+        row = (time.time() if timestamp is None else timestamp, glucose, bmi,
+               math.nan if weight_kg is None else weight_kg,
+               math.nan if height_cm is None else height_cm, age, pregnancies,
+               int(weight_kg is not None), proba, threshold, proba >= threshold,
+               bytes.fromhex(model_version) if model_version else b"")
+        with self._lock:
+            if self._count == self.capacity:
+                self._dropped += 1
+                return False
+            self._buffer[(self._start + self._count) % self.capacity] = row
+            self._count += 1
+            if self._writer is None:
+                self._start_writer()
+            if self._count * 2 >= self.capacity:
+                self._wake.set()
+        return True
+
+    def _start_writer(self):
+        self._writer = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._writer.start()
+        # Daemon threads are stopped at exit; drain what is left first
+        atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OSError as exc:
+                with self._lock:
+                    self._errors += 1
+                    self._last_error = f"{type(exc).__name__}: {exc}"
+                print(f"[audit] write to {self.directory} failed: {exc}", file=sys.stderr)
+
+    def _drain(self):
+        """The buffered records as bytes, oldest first, emptying the buffer."""
+        with self._lock:
+            count, start = self._count, self._start
+            if not count:
+                return b"", 0
+            end = start + count
+            data = self._buffer[start:min(end, self.capacity)].tobytes()
+            if end > self.capacity:
+                data += self._buffer[:end - self.capacity].tobytes()
+            self._start, self._count = end % self.capacity, 0
+            return data, count
+
+    def flush(self, sync=False):
+        """Write everything buffered to the current segment (and fsync it if `sync`)."""
+        with self._io_lock:
+            data, count = self._drain()
+            if count:
+                if self._file is None:
+                    self._open_segment()
+                self._file.write(data)
+                self._segment_size += len(data)
+                self._written += count
+                self._dirty = True
+            now = time.monotonic()
+            if self._dirty and (sync or self.fsync == "always" or (
+                    self.fsync == "interval" and now - self._synced >= self.fsync_interval)):
+                os.fsync(self._file.fileno())
+                self._synced, self._dirty = now, False
+            if self._segment_size >= self.segment_bytes:
+                self._close_segment()
+        metrics.set_gauge("audit_dropped_records", self._dropped,
+                          "Predictions not audited because the buffer was full.")
+
+    def _open_segment(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc)
+        self._sequence += 1
+        self._segment = self.directory / (f"audit-{stamp:%Y%m%d-%H%M%S}-{os.getpid()}-"
+                                          f"{self._sequence:04d}.seg")
+        header = json.dumps({
+            "format_version": SEGMENT_VERSION,
+            "dtype": RECORD_DTYPE.descr,
+            "bmi_modes": BMI_MODES,
+            "created_at": stamp.isoformat(timespec="seconds"),
+            "pid": os.getpid(),
+        }).encode()
+        start = _data_offset(len(header))
+        self._file = open(self._segment, "xb", buffering=0)
+        self._file.write(SEGMENT_MAGIC
+                         + np.array([SEGMENT_VERSION, len(header)], dtype="<u4").tobytes()
+                         + header.ljust(start - len(SEGMENT_MAGIC) - 8))
+        self._segment_size = start
+
+    def _close_segment(self):
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._dirty = False
+        self._file = None
+        self._segment_size = 0
+
+    def close(self):
+        """Write what is buffered and close the current segment."""
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._close_segment()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "directory": str(self.directory),
+                "segment": None if self._segment is None else self._segment.name,
+                "written": self._written,
+                "pending": self._count,
+                "dropped": self._dropped,
+                "capacity": self.capacity,
+                "fsync": self.fsync,
+                "errors": self._errors,
+                "last_error": self._last_error,
+            }
+
+
+def _data_offset(header_length):
+    return -(-(len(SEGMENT_MAGIC) + 8 + header_length) // _ALIGN) * _ALIGN
+
+
+def read_segment(path):
+    """
+    (header dict, records) of one segment; records are a read-only memory-mapped
+    array of RECORD_DTYPE, without a trailing partial record.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+            raise ValueError(f"{path} is not an audit segment")
+        version, length = np.frombuffer(f.read(8), dtype="<u4")
+        if version != SEGMENT_VERSION:
+            raise ValueError(f"{path} has format version {version}, expected {SEGMENT_VERSION}")
+        header = json.loads(f.read(int(length)))
+    dtype = np.dtype([tuple(field) for field in header["dtype"]])
+    start = _data_offset(int(length))
+    rows = (os.path.getsize(path) - start) // dtype.itemsize
+    if rows <= 0:
+        return header, np.empty(0, dtype=dtype)
+    return header, np.memmap(path, dtype=dtype, mode="r", offset=start, shape=(rows,))
+
+
+def segments(directory=None):
+    """Segment files in `directory` (default: the audit directory), oldest first."""
+    directory = Path(directory or os.environ.get(ENV_DIR) or AUDIT_DIR)
+    return sorted(directory.glob(SEGMENT_PATTERN), key=lambda path: path.stat().st_mtime)
+
+
+def scan(directory=None, since=None, until=None, model_version=None):
+    """
+    Yield the records of each segment as arrays of RECORD_DTYPE, keeping those
+    scored between the Unix times `since` and `until` and by `model_version`
+    (a SHA-256 or a prefix of it with an even number of hex digits).
+    """
+    version = None
+    if model_version:
+        version = np.frombuffer(bytes.fromhex(model_version), dtype=np.uint8)
+    for path in segments(directory):
+        _, records = read_segment(path)
+        if not len(records):
+            continue
+        keep = np.ones(len(records), dtype=bool)
+        if since is not None:
+            keep &= records["time"] >= since
+        if until is not None:
+            keep &= records["time"] < until
+        if version is not None:
+            digests = np.frombuffer(records["model_version"].tobytes(),
+                                    dtype=np.uint8).reshape(-1, 32)
+            keep &= (digests[:, :len(version)] == version).all(axis=1)
+        if keep.all():
+            yield records
+        elif keep.any():
+            yield records[keep]
+
+
+def to_frame(records):
+    """Records as a DataFrame with the model's feature names, risk labels and hex versions."""
+    import pandas as pd
+
+    # Few distinct models: hex-encode each digest once
+    digests, inverse = np.unique(records["model_version"], return_inverse=True)
+    versions = np.array([_version_hex(digest) for digest in digests], dtype=object)
+    return pd.DataFrame({
+        "time": pd.to_datetime(records["time"], unit="s", utc=True),
+        FEATURES[0]: records["glucose"],
+        FEATURES[1]: records["bmi"],
+        FEATURES[2]: records["age"].astype(np.int16),
+        FEATURES[3]: records["pregnancies"].astype(np.int16),
+        "bmi_mode": np.array(BMI_MODES)[records["bmi_mode"]],
+        "weight_kg": records["weight_kg"],
+        "height_cm": records["height_cm"],
+        "probability": records["probability"],
+        "risk": np.where(records["high_risk"], "High", "Low"),
+        "threshold": records["threshold"],
+        "model_version": versions[inverse.ravel()],
+    })
+
+
+def _version_hex(digest):
+    text = digest.tobytes().hex()
+    return text if text.strip("0") else ""
+
+
+def replay(directory=None, model_path=MODEL_PATH, since=None, until=None, tolerance=1e-12):
+    """
+    Rescore the records scored by the model at `model_path` and compare them
+    with the logged probabilities and risk labels.
+    """
+    from batching import score_current_model
+
+    version = file_sha256(model_path)
+    report = {"model_sha256": version, "rows": 0, "mismatches": 0, "label_flips": 0,
+              "max_abs_diff": 0.0}
+    for records in scan(directory, since, until, version):
+        rows = np.column_stack([records[name].astype(np.float64)
+                                for name in ("glucose", "bmi", "age", "pregnancies")])
+        proba = score_current_model(rows, model_path)
+        diff = np.abs(proba - records["probability"])
+        report["rows"] += len(records)
+        report["mismatches"] += int((diff > tolerance).sum())
+        report["label_flips"] += int(((proba >= records["threshold"])
+                                      != records["high_risk"].astype(bool)).sum())
+        report["max_abs_diff"] = max(report["max_abs_diff"], float(diff.max()))
+    return report
+
+
+def _timestamp(text):
+    """Unix time of an ISO date or date-time (UTC unless it has an offset)."""
+    moment = datetime.fromisoformat(text)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _digest_prefix(text):
+    """A SHA-256 or prefix given on the command line, checked to be whole hex bytes."""
+    try:
+        bytes.fromhex(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an even number of hex digits, got {text!r}")
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dir", default=None, help=f"segment directory (default: {ENV_DIR} "
+                                                    f"or {AUDIT_DIR.relative_to(ROOT)})")
+    window = argparse.ArgumentParser(add_help=False)
+    window.add_argument("--since", type=_timestamp, default=None,
+                        help="first time kept, ISO date or date-time (UTC)")
+    window.add_argument("--until", type=_timestamp, default=None,
+                        help="end of the time kept, ISO date or date-time (UTC)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", parents=[window], help="records per model version and risk band")
+    export = commands.add_parser("export", parents=[window],
+                                 help="write the records to CSV or Parquet")
+    export.add_argument("output")
+    export.add_argument("--version", type=_digest_prefix, default=None,
+                        help="only records of the model with this SHA-256 (or prefix)")
+    rescore = commands.add_parser("replay", parents=[window],
+                                  help="rescore the records of a model and compare")
+    rescore.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "stats":
+        rows, high, versions, first, last = 0, 0, {}, math.inf, -math.inf
+        for records in scan(args.dir, args.since, args.until):
+            rows += len(records)
+            high += int(records["high_risk"].sum())
+            first = min(first, float(records["time"].min()))
+            last = max(last, float(records["time"].max()))
+            for version, n in zip(*np.unique(records["model_version"], return_counts=True)):
+                version = _version_hex(version)
+                versions[version] = versions.get(version, 0) + int(n)
+        seconds = time.perf_counter() - start
+        print(f"{rows:,} records in {len(segments(args.dir))} segments "
+              f"(scanned in {seconds:.3f}s)")
+        if rows:
+            print(f"{datetime.fromtimestamp(first, timezone.utc):%Y-%m-%d %H:%M:%S} to "
+                  f"{datetime.fromtimestamp(last, timezone.utc):%Y-%m-%d %H:%M:%S} UTC, "
+                  f"{high / rows:.1%} high risk")
+            for version, n in sorted(versions.items(), key=lambda item: -item[1]):
+                print(f"  model {version[:12] or 'unknown':<12} {n:>12,}")
+    elif args.command == "export":
+        from batch_score import _ChunkWriter
+
+        writer = _ChunkWriter(args.output)
+        rows = 0
+        try:
+            for records in scan(args.dir, args.since, args.until, args.version):
+                writer.write(to_frame(records))
+                rows += len(records)
+        finally:
+            writer.close()
+        print(f"{rows:,} records -> {args.output} ({time.perf_counter() - start:.2f}s)")
+    else:
+        report = replay(args.dir, args.model, args.since, args.until)
+        print(f"{report['rows']:,} records scored by {report['model_sha256'][:12]}: "
+              f"{report['mismatches']:,} probability mismatches, "
+              f"{report['label_flips']:,} label flips, "
+              f"max |diff| {report['max_abs_diff']:.3g}")
+        if report["mismatches"] or report["label_flips"]:
+            sys.exit(1)
+
+
+# Shared by every session in the process; the writer starts with the first record
+audit = AuditLog()
+
+
+if __name__ == "__main__":
+    main()
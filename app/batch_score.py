@@ -0,0 +1,207 @@
+"""
+Headless batch scoring for patient cohorts.
+
+Streams a CSV or Parquet file shaped like data/clean_diabetes_data.csv, or a
+feature store converted from one (see feature_store.py), through the risk
+pipeline in fixed-size chunks, so memory stays bounded by the chunk size no
+matter how large the cohort is.
+
+Usage:
+    python app/batch_score.py data/clean_diabetes_data.csv scores.csv
+    python app/batch_score.py cohort.parquet scores.parquet --chunksize 500000
+    python app/batch_score.py data/clean_diabetes_data.cols scores.csv
+    python app/batch_score.py data/clean_diabetes_data.cols scores.csv --flat
+    python app/batch_score.py cohort.csv scores.csv --explain
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from feature_store import FeatureStore, is_store
+from forest import FlatForest, forest_path, load_exported
+from instrumentation import metrics
+from scoring import (FEATURES, MODEL_PATH, PARALLEL_MIN_ROWS, THRESHOLD,
+                     decision_threshold, file_sha256, load_serving_model, risk_labels)
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def _is_parquet(path):
+    return Path(path).suffix.lower() in (".parquet", ".pq")
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE, columns=None):
+    """Yield DataFrame chunks of at most `chunksize` rows from a CSV, Parquet file or store."""
+    if is_store(path):
+        store = FeatureStore(path)
+        for start in range(0, store.rows, chunksize):
+            yield store.frame(columns, start, start + chunksize)
+    elif _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+
+
+class _ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._parquet = None
+        self._first = True
+
+    def write(self, frame):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self._first else "a",
+                         header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def score_chunk(model, chunk, threshold=THRESHOLD, model_version=None, explainer=None):
+    """
+    Return probabilities and risk labels for one chunk of patient records,
+    plus a `<feature>_contribution` column per feature when an `explainer`
+    (FlatForest of the same model) is given.
+    """
+    metrics.observe_batch(len(chunk), "batch_score")
+    with metrics.stage("predict_proba"):
+        proba = model.predict_proba(chunk[FEATURES])[:, 1]
+    metrics.count_predictions(proba, threshold, model_version)
+    scored = pd.DataFrame({"probability": proba, "risk": risk_labels(proba, threshold)})
+    if explainer is not None:
+        with metrics.stage("explain"):
+            contributions = explainer.contributions(chunk[FEATURES])
+        for i, name in enumerate(FEATURES):
+            scored[f"{name}_contribution"] = contributions[:, i]
+    return scored
+
+
+def score_file(input_path, output_path, model=None, chunksize=DEFAULT_CHUNKSIZE,
+               threshold=THRESHOLD, id_column=None, progress=None, model_version=None,
+               explainer=None):
+    """
+    Score every row of `input_path` and write the results to `output_path`.
+
+    Parameters:
+    -----------
+    input_path : CSV or Parquet file (chosen by extension) or feature store directory
+    output_path : CSV or Parquet file (chosen by extension)
+    model : Fitted pipeline or ServingModel; loaded from model/diabetes_pipeline.pkl when None
+    chunksize : Rows held in memory at once
+    threshold : Probability at or above which a patient is labelled "High"
+    id_column : Optional input column copied to the output to identify rows
+    progress : Optional callable receiving the running stats after each chunk
+    model_version : Label for the prediction counts in the metrics (see instrumentation.py)
+    explainer : FlatForest of the same model; adds per-feature contribution columns
+
+    Returns a dict with the row count, elapsed seconds and rows/second.
+    """
+    if model is None:
+        model = load_serving_model()
+
+    columns = FEATURES + ([id_column] if id_column else [])
+    writer = _ChunkWriter(output_path)
+    rows = 0
+    start = time.perf_counter()
+    try:
+        for chunk in iter_chunks(input_path, chunksize, columns):
+            scored = score_chunk(model, chunk, threshold, model_version, explainer)
+            if id_column:
+                scored.insert(0, id_column, chunk[id_column].to_numpy())
+            writer.write(scored)
+
+            rows += len(chunk)
+            if progress is not None:
+                progress(_stats(rows, time.perf_counter() - start))
+    finally:
+        writer.close()
+
+    return _stats(rows, time.perf_counter() - start)
+
+
+def _stats(rows, seconds):
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", help="CSV or Parquet file (or feature store) with Glucose, BMI, Age, Pregnancies")
+    parser.add_argument("output", help="CSV or Parquet file to write probabilities and labels to")
+    parser.add_argument("--model", default=MODEL_PATH, help="pipeline pickle (default: %(default)s)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="default: the model's recorded operating point, else 0.35")
+    parser.add_argument("--flat", action="store_true",
+                        help="score with the exported flat forest (the model path with .npf, "
+                             "see forest.py) instead of unpickling the pipeline")
+    parser.add_argument("--explain", action="store_true",
+                        help="add each feature's contribution to the probability (exact "
+                             "decomposition along the trees' decision paths, see forest.py)")
+    parser.add_argument("--n-jobs", type=int, default=-1,
+                        help=f"worker threads for chunks of {PARALLEL_MIN_ROWS:,} rows or more")
+    parser.add_argument("--id-column", help="input column to carry through to the output")
+    parser.add_argument("--quiet", action="store_true", help="only print the final summary")
+    parser.add_argument("--metrics-file",
+                        help="write stage latencies, chunk sizes and predictions by risk band "
+                             "here (Prometheus text format) when done")
+    args = parser.parse_args(argv)
+    if args.metrics_file:
+        metrics.enabled = True
+
+    def report(stats):
+        print(f"{stats['rows']:>12,} rows  {stats['rows_per_second']:>12,.0f} rows/s",
+              file=sys.stderr)
+
+    if args.flat:
+        model = load_exported(args.model)
+        if model is None:
+            parser.error(f"no up-to-date {forest_path(args.model)}; "
+                         f"run python app/forest.py export --model {args.model}")
+    else:
+        model = load_serving_model(args.model, n_jobs=args.n_jobs)
+    explainer = None
+    if args.explain:
+        explainer = model if args.flat else (load_exported(args.model)
+                                             or FlatForest.from_sklearn(model.pipeline))
+
+    stats = score_file(
+        args.input, args.output,
+        model=model,
+        chunksize=args.chunksize,
+        threshold=decision_threshold(args.model) if args.threshold is None else args.threshold,
+        id_column=args.id_column,
+        progress=None if args.quiet else report,
+        model_version=file_sha256(args.model) if args.metrics_file else None,
+        explainer=explainer,
+    )
+    if args.metrics_file:
+        metrics.write(args.metrics_file)
+    print(f"Scored {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
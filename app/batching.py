@@ -0,0 +1,182 @@
+"""
+In-process micro-batching in front of the model.
+
+Each Streamlit session (and each service request) scores its own 1x4 row.
+BatchScheduler queues those rows and a single worker thread scores whatever
+has accumulated as one vectorized forest call, resolving each caller's
+future with its slice of the result.
+
+    from batching import scheduler
+    proba = scheduler.positive_proba([[glucose, bmi, age, pregnancies]])
+
+A batch is scored once it holds `max_batch` rows or `max_wait_ms` after its
+first row arrived, whichever comes first; rows submitted while a batch is
+being scored go into the next one.
+"""
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from forest import FlatForest, load_exported
+from instrumentation import metrics
+from registry import registry
+from scoring import MODEL_PATH
+
+# Wait times kept for percentiles; older ones are dropped
+WAIT_SAMPLES = 10_000
+
+
+def _flat_forest(path):
+    # The exported artifact when it matches the pickle; unpickling only as a fallback
+    forest = load_exported(path, registry.version(path))
+    if forest is None:
+        forest = FlatForest.from_sklearn(registry.get(path).pipeline)
+    return forest
+
+
+def score_current_model(rows, path=MODEL_PATH):
+    """Positive-class probabilities for an (n, 4) array from the current model."""
+    forest = registry.derived("flat_forest", _flat_forest, path)
+    return forest.predict_proba(rows)[:, 1]
+
+
+def explain_current_model(rows, path=MODEL_PATH):
+    """
+    (expected value, (n, 4) per-feature contributions) for an (n, 4) array
+    from the current model; see FlatForest.contributions.
+    """
+    forest = registry.derived("flat_forest", _flat_forest, path)
+    return forest.expected_value, forest.contributions(rows)
+
+
+def _bucket(size):
+    """Power-of-two histogram bucket label for a batch size."""
+    upper = 1 << (size - 1).bit_length()
+    return str(size) if upper == 1 else f"{upper // 2 + 1}-{upper}"
+
+
+class BatchScheduler:
+    """
+    Queue rows from many callers and score them in shared batches.
+
+    Parameters:
+    -----------
+    score : Callable mapping an (n, 4) array to n probabilities
+    max_batch : Rows that close a batch immediately
+    max_wait_ms : Longest the first row of a batch waits for company
+    """
+
+    def __init__(self, score=score_current_model, max_batch=256, max_wait_ms=2.0):
+        self._score = score
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._cond = threading.Condition()
+        self._pending = []
+        self._rows = 0
+        self._worker = None
+        self._closed = False
+
+        self._batches = 0
+        self._scored_rows = 0
+        self._sizes = Counter()
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+
+    def submit(self, rows):
+        """Queue rows (one row or an (n, 4) array); returns a Future of their probabilities."""
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BatchScheduler is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="batch-scheduler",
+                                                daemon=True)
+                self._worker.start()
+            self._pending.append((rows, future, time.perf_counter()))
+            self._rows += len(rows)
+            self._cond.notify()
+        return future
+
+    def positive_proba(self, rows, timeout=None):
+        """Submit rows and block until their positive-class probabilities (n,) are ready."""
+        return self.submit(rows).result(timeout)
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            deadline = self._pending[0][2] + self.max_wait
+            while self._rows < self.max_batch and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._pending, self._rows = self._pending, [], 0
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            live = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not live:
+                continue
+            try:
+                X = np.vstack([rows for rows, _, _ in live])
+                metrics.observe_batch(len(X), "scheduler")
+                with metrics.stage("predict_proba"):
+                    proba = self._score(X)
+            except Exception as exc:
+                for _, future, _ in live:
+                    future.set_exception(exc)
+                continue
+
+            start = 0
+            for rows, future, _ in live:
+                future.set_result(proba[start:start + len(rows)])
+                start += len(rows)
+
+            with self._cond:
+                self._batches += 1
+                self._scored_rows += start
+                self._sizes[_bucket(start)] += 1
+                self._waits.extend(started - queued for _, _, queued in live)
+            for _, _, queued in live:
+                metrics.observe_stage("queue_wait", started - queued)
+
+    def stats(self):
+        """Queue depth, batch-size histogram and queueing-delay percentiles."""
+        with self._cond:
+            waits = np.array(self._waits) * 1e3
+            return {
+                "queue_depth": self._rows,
+                "batches": self._batches,
+                "rows": self._scored_rows,
+                "mean_batch_size": self._scored_rows / self._batches if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._sizes.items(),
+                                                    key=lambda kv: int(kv[0].split("-")[-1]))),
+                "wait_ms": {
+                    f"p{q}": float(np.percentile(waits, q)) if len(waits) else 0.0
+                    for q in (50, 90, 99)
+                },
+            }
+
+    def close(self):
+        """Score what is queued, then stop the worker thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join()
+
+
+# Shared by every session in the process; the worker starts on first use
+scheduler = BatchScheduler()
@@ -0,0 +1,229 @@
+"""
+Bootstrap confidence intervals for the served model's recall, precision and AUC.
+
+The holdout is scored once. Every metric then depends only on how many
+positives and negatives fall at each distinct probability, so a bootstrap
+resample is a vector of counts per (probability level, class) cell, and
+resampling n rows with replacement gives exactly a Multinomial(n, cell
+shares) draw of it:
+
+* a block of replicates is drawn as one (replicates, cells) matrix with
+  `Generator.multinomial`, at O(cells) instead of O(rows) per replicate;
+* recall and precision are sums of those counts on either side of the
+  decision threshold, AUC the rank-sum statistic from a cumulative sum over
+  the levels (ties counted half), all as array operations over the block;
+* blocks are spread over worker processes, each seeded from one
+  `SeedSequence`, so results do not depend on the number of workers.
+
+Up to MAX_LEVELS distinct probabilities every level is one probability and
+the replicates equal resampling the rows. Larger holdouts are grouped into
+MAX_LEVELS quantile levels (the threshold is always a level boundary, so
+recall and precision stay exact); pairs in one level count as ties, which
+moves AUC by ~1e-7 on a million rows, far inside its interval. The point
+estimates are always computed on the exact probabilities.
+
+The point estimates and percentile intervals are written to the model's
+metadata sidecar under "evaluation", which the app's sidebar shows. train.py
+records them for every new version; run this after replacing the pickle by
+hand.
+
+Usage:
+    python app/bootstrap.py --write
+    python app/bootstrap.py --data holdout.csv --split all --replicates 5000 --write
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from evaluation import rank_auc
+from scoring import MODEL_PATH, decision_threshold, repo_path, update_metadata
+
+DEFAULT_REPLICATES = 2000
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_SEED = 42
+METRICS = ("recall", "precision", "roc_auc")
+MAX_LEVELS = 4096
+
+# Counts drawn per block of replicates; bounds each worker's memory
+BLOCK_CELLS = 1 << 22
+
+
+def cell_counts(y, proba, threshold, max_levels=MAX_LEVELS):
+    """
+    Negatives and positives per probability level, interleaved, and the first
+    level predicted positive.
+
+    Levels are the distinct probabilities, or `max_levels` quantile ranges of
+    them when there are more, split at `threshold`.
+    """
+    proba = np.asarray(proba, dtype=np.float64).ravel()
+    values = np.unique(proba)
+    if len(values) > max_levels:
+        values = np.unique(np.quantile(proba, np.linspace(0, 1, max_levels + 1)[1:-1]))
+    edges = np.union1d(values, [threshold])
+    level = np.searchsorted(edges, proba, side="right")
+    counts = np.bincount(2 * level + np.asarray(y, dtype=np.intp).ravel(),
+                         minlength=2 * (len(edges) + 1))
+    return counts, int(np.searchsorted(edges, threshold, side="right"))
+
+
+def metrics_from_counts(counts, split):
+    """
+    Recall, precision and ROC-AUC of each row of cell counts.
+
+    `counts` is (replicates, 2 * levels): negatives and positives at each
+    level, in increasing order of probability; levels from `split` on are
+    predicted positive.
+    """
+    counts = np.atleast_2d(counts)
+    negatives, positives = counts[:, 0::2], counts[:, 1::2]
+    tp, fp = positives[:, split:].sum(axis=1), negatives[:, split:].sum(axis=1)
+    n_pos, n_neg = positives.sum(axis=1), negatives.sum(axis=1)
+    below = np.cumsum(negatives, axis=1)
+    below -= negatives
+    # Twice the number of correctly ordered (positive, negative) pairs, in exact integers
+    pairs = (2 * np.einsum("ij,ij->i", positives, below)
+             + np.einsum("ij,ij->i", positives, negatives))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "recall": tp / n_pos,
+            "precision": tp / (tp + fp),
+            "roc_auc": pairs / (2.0 * n_pos * n_neg),
+        }
+
+
+# Set once per worker process so tasks only carry their seed and size
+_data = {}
+
+
+def _init_worker(counts, split):
+    _data["counts"], _data["split"] = counts, split
+
+
+def replicate_block(seed, replicates):
+    """Metrics of `replicates` bootstrap resamples drawn from `seed`."""
+    counts = _data["counts"]
+    rows = int(counts.sum())
+    resampled = np.random.default_rng(seed).multinomial(rows, counts / rows, size=replicates)
+    return metrics_from_counts(resampled, _data["split"])
+
+
+def bootstrap(y, proba, threshold, replicates=DEFAULT_REPLICATES,
+              confidence=DEFAULT_CONFIDENCE, seed=DEFAULT_SEED, n_jobs=None,
+              max_levels=MAX_LEVELS):
+    """
+    Point estimates and percentile bootstrap intervals of recall, precision and AUC.
+
+    Parameters:
+    -----------
+    y : 0/1 labels of the holdout
+    proba : Positive-class probabilities of the same rows
+    threshold : Probability at or above which a row is predicted positive
+    replicates : Bootstrap resamples
+    confidence : Coverage of the intervals
+    seed : Seed of the resamples (results do not depend on `n_jobs`)
+    n_jobs : Worker processes (default: all cores)
+    max_levels : Distinct probabilities kept before grouping them into quantile levels
+
+    Returns {"recall": {"value", "low", "high", "std"}, ...}; all four are
+    None for a metric the holdout leaves undefined (e.g. AUC with one class).
+    """
+    counts, split = cell_counts(y, proba, threshold, max_levels)
+    point = metrics_from_counts(counts, split)
+    point["roc_auc"] = [rank_auc(y, proba)]
+
+    per_block = max(1, min(replicates, BLOCK_CELLS // len(counts)))
+    sizes = [min(per_block, replicates - start) for start in range(0, replicates, per_block)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    n_jobs = n_jobs or os.cpu_count()
+    if n_jobs == 1 or len(sizes) == 1:
+        _init_worker(counts, split)
+        blocks = [replicate_block(s, n) for s, n in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(sizes)), initializer=_init_worker,
+                                 initargs=(counts, split)) as pool:
+            blocks = list(pool.map(replicate_block, seeds, sizes))
+
+    tail = (1 - confidence) / 2
+    results = {}
+    for name in METRICS:
+        values = np.concatenate([block[name] for block in blocks])
+        # Resamples without positives (or negatives, or flags) leave the metric undefined
+        values = values[np.isfinite(values)]
+        value = point[name][0]
+        if value is None or not np.isfinite(value) or not len(values):
+            results[name] = {"value": None, "low": None, "high": None, "std": None}
+            continue
+        low, high = np.quantile(values, [tail, 1 - tail])
+        results[name] = {"value": float(value), "low": float(low), "high": float(high),
+                         "std": float(values.std())}
+    return results
+
+
+def evaluation_entry(y, proba, threshold, split, data_path, replicates=DEFAULT_REPLICATES,
+                     confidence=DEFAULT_CONFIDENCE, seed=DEFAULT_SEED, n_jobs=None):
+    """The "evaluation" metadata entry for labels and probabilities of a data split."""
+    start = time.perf_counter()
+    metrics = bootstrap(y, proba, threshold, replicates, confidence, seed, n_jobs)
+    return {
+        "split": split,
+        "data": repo_path(data_path),
+        "rows": int(len(y)),
+        "threshold": float(threshold),
+        "replicates": replicates,
+        "confidence": confidence,
+        "seed": seed,
+        "metrics": metrics,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def evaluate_model(model_path=MODEL_PATH, data_path=None, split="test",
+                   replicates=DEFAULT_REPLICATES, confidence=DEFAULT_CONFIDENCE,
+                   seed=DEFAULT_SEED, n_jobs=None):
+    """Score a data split with the model at `model_path` and bootstrap its metrics."""
+    from operating_point import score_split
+    from tuning import DATA_PATH
+
+    data_path = DATA_PATH if data_path is None else data_path
+    y, proba = score_split(split, model_path, data_path)
+    return evaluation_entry(y, proba, decision_threshold(model_path), split, data_path,
+                            replicates, confidence, seed, n_jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--data", default=None,
+                        help="cleaned CSV or feature store (default: data/clean_diabetes_data.csv)")
+    parser.add_argument("--split", choices=["train", "test", "all"], default="test",
+                        help="rows of --data to evaluate on (default: %(default)s)")
+    parser.add_argument("--replicates", type=int, default=DEFAULT_REPLICATES)
+    parser.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--n-jobs", type=int, default=None, help="default: all cores")
+    parser.add_argument("--write", action="store_true",
+                        help="record the results in the model's metadata sidecar")
+    args = parser.parse_args(argv)
+
+    evaluation = evaluate_model(args.model, args.data, args.split, args.replicates,
+                                args.confidence, args.seed, args.n_jobs)
+    print(f"{evaluation['rows']:,} {args.split} rows at threshold "
+          f"{evaluation['threshold']:.4f}, {args.replicates:,} replicates "
+          f"({evaluation['seconds']:.2f}s)")
+    for name, m in evaluation["metrics"].items():
+        if m["value"] is None:
+            print(f"{name:<10} undefined on these rows")
+            continue
+        print(f"{name:<10} {m['value']:.4f}  {args.confidence:.0%} CI "
+              f"[{m['low']:.4f}, {m['high']:.4f}]")
+    if args.write:
+        update_metadata({"evaluation": evaluation}, args.model)
+        print(f"written to the metadata of {args.model}")
+
+
+if __name__ == "__main__":
+    main()
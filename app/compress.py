@@ -0,0 +1,260 @@
+"""
+Shrink the served forest to the fewest trees that keep its accuracy.
+
+02_Modeling.ipynb found diminishing returns after ~100 estimators, yet all
+200 trees are scored for every prediction. This tool orders the trees
+greedily and keeps the shortest prefix of that order that stays within a
+tolerance of the full forest:
+
+1. every tree's positive-class probabilities are computed once, on the
+   training split and on the held-out test split (of --data);
+2. trees are added one at a time, each time the tree whose addition gives the
+   highest ROC AUC on the training split (at most --max-rows rows of it), so
+   the order is not fitted to the holdout;
+3. after each addition the subset is scored on the holdout, and the first
+   subset whose ROC AUC and recall at the decision threshold are within
+   --max-auc-drop and --max-recall-drop of the full forest's is kept
+   (--trees N keeps the first N instead). At least --min-trees are kept: the
+   probabilities of a handful of trees take few distinct values, which AUC
+   and recall on a small holdout barely show.
+
+The kept trees stay in their original order, in a copy of the pipeline, so
+the result is a drop-in replacement for model/diabetes_pipeline.pkl. It is
+written to model/versions/ with the served model's metadata carried over, its
+holdout evaluation and a "compression" report (trees, holdout metrics,
+flat-forest latency and artifact sizes before and after). --promote installs
+it atomically through train.promote.
+
+Usage:
+    python app/compress.py
+    python app/compress.py --max-auc-drop 0.002 --max-recall-drop 0 --promote
+    python app/compress.py --trees 50 --data larger_cohort.csv
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from bootstrap import evaluation_entry
+from evaluation import rank_auc
+from forest import FlatForest, export
+from incremental import MAX_AUC_DROP, MAX_RECALL_DROP, holdout_scores, refreshed_metrics
+from scoring import (MODEL_PATH, ROOT, decision_threshold, file_sha256, load_metadata,
+                     load_pipeline, repo_path, update_metadata)
+from train import VERSIONS_DIR, promote
+from tuning import DATA_PATH, RANDOM_STATE, load_splits
+
+MIN_TREES = 20
+# Training rows the greedy order is computed on; it scores every remaining tree per step
+MAX_ROWS = 20_000
+BATCH_ROWS = 10_000
+
+
+def tree_probabilities(forest, X):
+    """Positive-class probability of every tree of a FlatForest, shape (n_trees, n_rows)."""
+    return forest.leaf_proba[1][forest.apply(X)]
+
+
+def greedy_order(tree_proba, y):
+    """
+    Yield tree indices in greedy order: each is the tree whose addition gives
+    the highest ROC AUC of the mean probability over the trees so far.
+    """
+    remaining = list(range(len(tree_proba)))
+    total = np.zeros(tree_proba.shape[1])
+    while remaining:
+        aucs = [rank_auc(y, total + tree_proba[t]) for t in remaining]
+        best = remaining.pop(int(np.argmax(aucs)))
+        total += tree_proba[best]
+        yield best
+
+
+def select(train_proba, y_train, holdout_proba, y_holdout, threshold, max_auc_drop=MAX_AUC_DROP,
+           max_recall_drop=MAX_RECALL_DROP, trees=None, min_trees=MIN_TREES):
+    """
+    The trees kept (indices, ascending) and the holdout scores after each addition.
+
+    Parameters:
+    -----------
+    train_proba, holdout_proba : Per-tree probabilities (see `tree_probabilities`)
+    y_train, y_holdout : Labels of the same rows
+    threshold : Decision threshold recall is measured at
+    max_auc_drop, max_recall_drop : Largest holdout losses against the full forest accepted
+    trees : Keep exactly this many trees instead
+    min_trees : Keep at least this many trees
+    """
+    full = holdout_scores(y_holdout, holdout_proba.mean(axis=0), threshold)
+    chosen, total, history = [], np.zeros(holdout_proba.shape[1]), []
+    for tree in greedy_order(train_proba, y_train):
+        chosen.append(tree)
+        total += holdout_proba[tree]
+        scores = holdout_scores(y_holdout, total / len(chosen), threshold)
+        history.append({"trees": len(chosen), **scores})
+        if trees is not None:
+            if len(chosen) >= trees:
+                break
+        elif (len(chosen) >= min_trees
+              and scores["roc_auc"] >= full["roc_auc"] - max_auc_drop
+              and scores["recall"] >= full["recall"] - max_recall_drop):
+            break
+    return sorted(chosen), history
+
+
+def _sample(X, y, max_rows, seed=RANDOM_STATE):
+    if len(y) <= max_rows:
+        return X, y
+    rows = np.sort(np.random.default_rng(seed).choice(len(y), max_rows, replace=False))
+    return X[rows], y[rows]
+
+
+def latency(forest, rows, repeat=200):
+    """Best single-row and BATCH_ROWS-row predict_proba times of a FlatForest, in ms."""
+    def best(X, n):
+        times = []
+        for _ in range(n):
+            start = time.perf_counter()
+            forest.predict_proba(X)
+            times.append(time.perf_counter() - start)
+        return min(times) * 1e3
+
+    return {"single_ms": best(rows[:1], repeat), "batch_ms": best(rows, 5)}
+
+
+def compress(model_path=MODEL_PATH, data_path=DATA_PATH, max_auc_drop=MAX_AUC_DROP,
+             max_recall_drop=MAX_RECALL_DROP, trees=None, min_trees=MIN_TREES, threshold=None,
+             max_rows=MAX_ROWS, versions_dir=VERSIONS_DIR):
+    """
+    Select a subset of the model's trees and save it as a new version.
+
+    Parameters:
+    -----------
+    model_path : Pipeline to compress
+    data_path : Cleaned CSV or feature store; its 80/20 split gives the
+                training rows (ordering) and the holdout (stopping, evaluation)
+    max_auc_drop, max_recall_drop, trees, min_trees : See `select`
+    threshold : Decision threshold (default: the model's)
+    max_rows : Training rows the greedy order is computed on at most
+    versions_dir : Directory the compressed version and its sidecar are written to
+
+    Returns (artifact path or None when no subset smaller than the forest
+    qualifies, report dict).
+    """
+    base_sha = file_sha256(model_path)
+    threshold = decision_threshold(model_path, base_sha) if threshold is None else threshold
+    x_train, x_test, y_train, y_test = load_splits(data_path)
+    x_train, y_train = _sample(np.asarray(x_train), np.asarray(y_train), max_rows)
+    y_test = np.asarray(y_test)
+    pipeline = load_pipeline(model_path)
+    full = FlatForest.from_sklearn(pipeline)
+
+    start = time.perf_counter()
+    kept, history = select(tree_probabilities(full, x_train), y_train,
+                           tree_probabilities(full, x_test), y_test, threshold,
+                           max_auc_drop, max_recall_drop, trees, min_trees)
+    seconds = time.perf_counter() - start
+
+    forest = pipeline[-1]
+    forest.estimators_ = [forest.estimators_[i] for i in kept]
+    forest.n_estimators = len(kept)
+    compressed = FlatForest.from_sklearn(pipeline)
+    full_proba = full.predict_proba(x_test)[:, 1]
+    test_proba = compressed.predict_proba(x_test)[:, 1]
+    before = holdout_scores(y_test, full_proba, threshold)
+    after = holdout_scores(y_test, test_proba, threshold)
+    change = np.abs(test_proba - full_proba)
+
+    rows = np.random.default_rng(0).uniform([0, 10, 0, 0], [300, 70, 120, 20],
+                                            size=(BATCH_ROWS, 4))
+    stamp = datetime.now(timezone.utc)
+    report = {
+        "created_at": stamp.isoformat(timespec="seconds"),
+        "base_model_sha256": base_sha,
+        "data": repo_path(data_path),
+        "threshold": threshold,
+        "trees": {"before": full.n_trees, "after": len(kept)},
+        "kept": kept,
+        "holdout": {"rows": int(len(y_test)), "before": before, "after": after,
+                    "mean_abs_change": float(change.mean()),
+                    "max_abs_change": float(change.max())},
+        "history": history,
+        "selection_seconds": seconds,
+        "latency": {"before": latency(full, rows), "after": latency(compressed, rows)},
+    }
+    if len(kept) >= full.n_trees:
+        return None, report
+
+    versions_dir.mkdir(parents=True, exist_ok=True)
+    path = versions_dir / f"{MODEL_PATH.stem}-{stamp:%Y%m%d-%H%M%S}.pkl"
+    joblib.dump(pipeline, path)
+    with tempfile.TemporaryDirectory() as tmp:
+        full.save(Path(tmp) / "full.npf")
+        _, flat_path = export(path)
+        report["bytes"] = {
+            "pickle": {"before": Path(model_path).stat().st_size, "after": path.stat().st_size},
+            "flat": {"before": (Path(tmp) / "full.npf").stat().st_size,
+                     "after": flat_path.stat().st_size},
+        }
+    base_metadata = load_metadata(model_path, base_sha)
+    params = base_metadata.get("params")
+    update_metadata({
+        **base_metadata,
+        "created_at": report["created_at"],
+        **({"params": {**params, "n_estimators": len(kept)}} if params else {}),
+        **refreshed_metrics(base_metadata, y_test, test_proba, threshold, "test"),
+        "evaluation": evaluation_entry(y_test, test_proba, threshold, "test", data_path),
+        "compression": report,
+    }, path)
+    return path, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--data", default=DATA_PATH,
+                        help="cleaned CSV or feature store to split (default: %(default)s)")
+    parser.add_argument("--max-auc-drop", type=float, default=MAX_AUC_DROP)
+    parser.add_argument("--max-recall-drop", type=float, default=MAX_RECALL_DROP)
+    parser.add_argument("--trees", type=int, default=None,
+                        help="keep this many trees instead of the fewest within the tolerances")
+    parser.add_argument("--min-trees", type=int, default=MIN_TREES,
+                        help="keep at least this many trees (default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="decision threshold recall is measured at (default: the model's)")
+    parser.add_argument("--max-rows", type=int, default=MAX_ROWS,
+                        help="training rows the greedy order is computed on "
+                             "(default: %(default)s)")
+    parser.add_argument("--promote", action="store_true",
+                        help=f"install the result as {MODEL_PATH.relative_to(ROOT)}")
+    args = parser.parse_args(argv)
+
+    path, report = compress(args.model, args.data, args.max_auc_drop, args.max_recall_drop,
+                            args.trees, args.min_trees, args.threshold, args.max_rows)
+    trees, holdout, timing = report["trees"], report["holdout"], report["latency"]
+    print(f"{trees['before']} -> {trees['after']} trees "
+          f"(selected in {report['selection_seconds']:.2f}s)")
+    print(f"holdout ({holdout['rows']:,} rows, threshold {report['threshold']:.4f}):")
+    for name in ("roc_auc", "recall", "precision"):
+        print(f"  {name:<10} {holdout['before'][name]:.4f} -> {holdout['after'][name]:.4f}")
+    print(f"  probability change: mean {holdout['mean_abs_change']:.4f}, "
+          f"max {holdout['max_abs_change']:.4f}")
+    for name, label in (("single_ms", "1 row"), ("batch_ms", f"{BATCH_ROWS:,} rows")):
+        print(f"  {label:<10} {timing['before'][name]:8.3f} ms -> {timing['after'][name]:8.3f} ms")
+    if path is None:
+        print("no subset smaller than the forest is within the tolerances", file=sys.stderr)
+        sys.exit(1)
+    for name, sizes in report["bytes"].items():
+        before, after = sizes["before"] / 2**20, sizes["after"] / 2**20
+        print(f"  {name:<10} {before:8.2f} MB -> {after:8.2f} MB")
+    print(f"-> {path}")
+    if args.promote:
+        promote(path, args.model)
+        print(f"Promoted to {args.model}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Input-distribution drift monitor for the served model.
+
+The model was fitted on the Pima cohort; nothing guarantees that the patients
+scored live look like it. This module keeps constant-memory sketches of the
+four features and of the predicted probability as rows are scored, and
+compares them with reference sketches of the training data:
+
+* a sketch is a count per bin on a fixed grid over each input's range (e.g.
+  glucose in steps of 2 mg/dL), plus under/overflow bins. Memory is a few
+  hundred integers per input however many rows are seen, and no row is kept;
+* PSI (population stability index) is computed over ten groups of bins
+  holding ~10% of the reference each, KS as the largest gap between the
+  binned cumulative distributions;
+* the live sketches cover a tumbling window of `window` rows. When it fills,
+  every input whose PSI or KS exceeds its limit raises an alert (printed to
+  stderr, kept in `alerts`, and exported as gauges in instrumentation.py),
+  and a new window starts.
+
+The reference lives in the model's metadata sidecar under "drift_reference",
+so it always belongs to the served model: train.py writes it for every new
+version (features over all training rows, probabilities over the held-out
+test split), and `reference --write` adds it to an existing model. Until a
+model has one, `observe` does nothing.
+
+Usage:
+    python app/drift.py reference --write
+    python app/drift.py check cohort.csv
+"""
+import argparse
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from instrumentation import metrics
+from scoring import FEATURES, MODEL_PATH, load_metadata, update_metadata
+
+PROBABILITY = "probability"
+INPUTS = FEATURES + [PROBABILITY]
+
+# Bin edges per input, spanning the ranges the app and service accept
+GRIDS = {
+    "Glucose": (0.0, 300.0, 2.0),
+    "BMI": (10.0, 70.0, 0.5),
+    "Age": (0.0, 120.0, 1.0),
+    "Pregnancies": (0.0, 20.0, 1.0),
+    PROBABILITY: (0.0, 1.0, 0.01),
+}
+
+DEFAULT_WINDOW = 1000
+MIN_ROWS = 200
+PSI_ALERT = 0.2
+KS_ALERT = 0.1
+PSI_GROUPS = 10
+# Floor for empty group fractions, so PSI stays finite
+_EPSILON = 1e-4
+
+
+def grid_edges(name):
+    start, stop, step = GRIDS[name]
+    return np.round(np.arange(start, stop + step / 2, step), 6)
+
+
+class Sketch:
+    """Counts of values per bin of fixed `edges`, with under- and overflow bins."""
+
+    def __init__(self, edges, counts=None):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = (np.zeros(len(self.edges) + 1, dtype=np.int64) if counts is None
+                       else np.asarray(counts, dtype=np.int64))
+
+    @property
+    def n(self):
+        return int(self.counts.sum())
+
+    def add(self, values):
+        bins = np.searchsorted(self.edges, np.asarray(values, dtype=np.float64).ravel(),
+                               side="right")
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+
+    def quantile(self, q):
+        """Approximate `q` quantile, interpolated linearly within its bin."""
+        n = self.n
+        if not n:
+            return float("nan")
+        cumulative = np.cumsum(self.counts)
+        i = int(np.searchsorted(cumulative, q * n))
+        # Under/overflow bins have no width: report the grid's end
+        if i == 0 or i == len(self.edges):
+            return float(self.edges[min(i, len(self.edges) - 1)])
+        before = cumulative[i - 1]
+        fraction = (q * n - before) / self.counts[i]
+        return float(self.edges[i - 1] + fraction * (self.edges[i] - self.edges[i - 1]))
+
+    def to_dict(self):
+        return {"edges": self.edges.tolist(), "counts": self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["edges"], data["counts"])
+
+
+def psi(reference, live, groups=PSI_GROUPS):
+    """Population stability index of `live` against `reference` over reference-decile groups."""
+    expected = reference.counts / reference.n
+    actual = live.counts / live.n
+    # Bins before the first decile boundary form group 0, and so on
+    group = np.minimum(((np.cumsum(expected) - expected) * groups).astype(np.int64), groups - 1)
+    expected = np.maximum(np.bincount(group, expected, minlength=groups), _EPSILON)
+    actual = np.maximum(np.bincount(group, actual, minlength=groups), _EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks(reference, live):
+    """Kolmogorov-Smirnov statistic between the binned distributions."""
+    return float(np.abs(np.cumsum(reference.counts) / reference.n
+                        - np.cumsum(live.counts) / live.n).max())
+
+
+def reference_sketches(X, proba):
+    """
+    The "drift_reference" metadata entry for a model.
+
+    Parameters:
+    -----------
+    X : Training features, columns in FEATURES order
+    proba : Positive-class probabilities of held-out rows
+    """
+    X = np.asarray(X, dtype=np.float64)
+    sketches = {}
+    for i, name in enumerate(FEATURES):
+        sketches[name] = Sketch(grid_edges(name))
+        sketches[name].add(X[:, i])
+    sketches[PROBABILITY] = Sketch(grid_edges(PROBABILITY))
+    sketches[PROBABILITY].add(proba)
+    return {"sketches": {name: sketch.to_dict() for name, sketch in sketches.items()}}
+
+
+def _report_alert(alert):
+    print(f"[drift] {alert['input']}: PSI {alert['psi']:.3f}, KS {alert['ks']:.3f} over "
+          f"{alert['rows']} rows (median {alert['reference_median']:.3g} -> "
+          f"{alert['median']:.3g})", file=sys.stderr, flush=True)
+
+
+class DriftMonitor:
+    """
+    Thread-safe comparison of the scored rows with the served model's reference.
+
+    Parameters:
+    -----------
+    window : Rows per comparison window (None: one window that never rolls over)
+    min_rows : Rows a window needs before it is compared
+    psi_alert : PSI at or above which an input alerts
+    ks_alert : KS statistic at or above which an input alerts
+    on_alert : Callable receiving each alert dict (default: print to stderr)
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, min_rows=MIN_ROWS, psi_alert=PSI_ALERT,
+                 ks_alert=KS_ALERT, on_alert=_report_alert, model_path=MODEL_PATH):
+        self.window = window
+        self.min_rows = min_rows
+        self.psi_alert = psi_alert
+        self.ks_alert = ks_alert
+        self.on_alert = on_alert
+        self.model_path = model_path
+        self.enabled = True
+        self.alerts = deque(maxlen=100)
+        self._lock = threading.Lock()
+        self._version = None
+        self._reference = None
+        self._live = None
+        self._last = None
+
+    def set_reference(self, reference, version=None):
+        """Compare against `reference` (a "drift_reference" entry, or None) from now on."""
+        with self._lock:
+            self._set_reference(reference, version)
+
+    def _set_reference(self, reference, version):
+        self._version = version
+        self._reference = None if reference is None else {
+            name: Sketch.from_dict(reference["sketches"][name]) for name in INPUTS}
+        self._live = None if reference is None else {
+            name: Sketch(sketch.edges) for name, sketch in self._reference.items()}
+        self._last = None
+
+    def observe(self, rows, proba, model_version):
+        """
+        Add scored rows to the current window.
+
+        `rows` are (n, 4) in FEATURES order, `proba` their probabilities under
+        `model_version` (the registry's SHA-256); a new version switches to
+        its reference and starts a new window.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if model_version != self._version:
+                metadata = load_metadata(self.model_path, model_version)
+                self._set_reference(metadata.get("drift_reference"), model_version)
+            if self._reference is None:
+                return
+            rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(FEATURES))
+            for i, name in enumerate(FEATURES):
+                self._live[name].add(rows[:, i])
+            self._live[PROBABILITY].add(proba)
+            if self.window is None or self._live[PROBABILITY].n < self.window:
+                return
+            self._last = self._compare()
+            alerts = [dict(result, input=name) for name, result in self._last["inputs"].items()
+                      if result["alert"]]
+            self.alerts.extend(alerts)
+            for sketch in self._live.values():
+                sketch.counts[:] = 0
+        self._export(self._last)
+        for alert in alerts:
+            if self.on_alert is not None:
+                self.on_alert(alert)
+
+    def _compare(self):
+        inputs = {}
+        for name, reference in self._reference.items():
+            live = self._live[name]
+            result = {"rows": live.n, "psi": psi(reference, live), "ks": ks(reference, live),
+                      "median": live.quantile(0.5),
+                      "reference_median": reference.quantile(0.5)}
+            result["alert"] = result["psi"] >= self.psi_alert or result["ks"] >= self.ks_alert
+            inputs[name] = result
+        return {"completed_at": time.time(), "inputs": inputs}
+
+    def _export(self, report):
+        for name, result in report["inputs"].items():
+            metrics.set_gauge("drift_psi", result["psi"], "PSI of the last drift window.",
+                              input=name)
+            metrics.set_gauge("drift_ks", result["ks"], "KS statistic of the last drift window.",
+                              input=name)
+            metrics.set_gauge("drift_alert", int(result["alert"]),
+                              "1 if the input drifted in the last window.", input=name)
+
+    def report(self):
+        """
+        The current window compared with the reference (once it has
+        `min_rows` rows), the last completed window, and recent alerts.
+        """
+        with self._lock:
+            if self._reference is None:
+                return {"model_version": self._version, "reference": False}
+            rows = self._live[PROBABILITY].n
+            return {
+                "model_version": self._version,
+                "reference": True,
+                "window": {"rows": rows, "size": self.window},
+                "current": self._compare() if rows >= self.min_rows else None,
+                "last": self._last,
+                "alerts": list(self.alerts),
+            }
+
+
+# Shared by every session in the process
+monitor = DriftMonitor()
+
+
+def _format(report):
+    lines = [f"{'input':<12} {'rows':>8} {'PSI':>7} {'KS':>7} {'median (ref -> live)':>22}"]
+    for name, r in report["inputs"].items():
+        lines.append(f"{name:<12} {r['rows']:8,} {r['psi']:7.3f} {r['ks']:7.3f} "
+                     f"{r['reference_median']:10.3g} -> {r['median']:.3g}"
+                     f"{'  DRIFT' if r['alert'] else ''}")
+    return "\n".join(lines)
+
+
+def build_reference(data_path, model_path=MODEL_PATH):
+    """Reference sketches for a model: all rows of `data_path`, probabilities on its test split."""
+    from scoring import load_pipeline
+    from train import load_training_data, split
+
+    X, y = load_training_data(data_path)
+    _, x_test, _, _ = split(X, y)
+    proba = load_pipeline(model_path).predict_proba(x_test)[:, 1]
+    return reference_sketches(X.to_numpy(), proba)
+
+
+def check(input_path, model_path=MODEL_PATH, chunksize=100_000):
+    """
+    Compare a whole CSV/Parquet cohort with the model's reference; returns the report.
+
+    Raises ValueError when the model has no reference or the cohort has no rows.
+    """
+    from batch_score import iter_chunks
+    from scoring import file_sha256, load_serving_model
+
+    version = file_sha256(model_path)
+    reference = load_metadata(model_path, version).get("drift_reference")
+    if reference is None:
+        raise ValueError(f"{model_path} has no drift reference; "
+                         f"run `python app/drift.py reference --write`")
+    checker = DriftMonitor(window=None, min_rows=1, on_alert=None, model_path=model_path)
+    checker.set_reference(reference, version)
+    model = load_serving_model(model_path)
+    for chunk in iter_chunks(input_path, chunksize, FEATURES):
+        if not len(chunk):
+            continue
+        rows = chunk[FEATURES].to_numpy(dtype=np.float64)
+        checker.observe(rows, model.predict_proba(chunk[FEATURES])[:, 1], version)
+    report = checker.report()["current"]
+    if report is None:
+        raise ValueError(f"no rows in {input_path}")
+    return report
+
+
+def main(argv=None):
+    from tuning import DATA_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=MODEL_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    reference = commands.add_parser("reference", help="sketch the training data for a model")
+    reference.add_argument("--data", default=DATA_PATH,
+                           help="cleaned CSV or feature store (default: %(default)s)")
+    reference.add_argument("--write", action="store_true",
+                           help="record the sketches in the model's metadata sidecar")
+    cohort = commands.add_parser("check", help="compare a cohort file with the reference")
+    cohort.add_argument("input", help="CSV or Parquet with the feature columns")
+    args = parser.parse_args(argv)
+
+    if args.command == "reference":
+        entry = build_reference(args.data, args.model)
+        for name, sketch in entry["sketches"].items():
+            sketch = Sketch.from_dict(sketch)
+            print(f"{name:<12} {sketch.n:8,} rows, median {sketch.quantile(0.5):.3g}, "
+                  f"5-95% {sketch.quantile(0.05):.3g}-{sketch.quantile(0.95):.3g}")
+        if args.write:
+            update_metadata({"drift_reference": entry}, args.model)
+            print(f"written to the metadata of {args.model}")
+    else:
+        try:
+            report = check(args.input, args.model)
+        except ValueError as exc:
+            parser.error(str(exc))
+        print(_format(report))
+        if any(r["alert"] for r in report["inputs"].values()):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Single-pass evaluation of binary classifiers.
+
+Each split is reduced to its 2x2 confusion matrix with one `np.bincount`
+over `2 * y_true + y_pred`; accuracy, precision, recall, F1, specificity and
+the per-class report are all derived from those four counts. ROC-AUC is the
+rank-sum (Mann-Whitney) statistic from one sort of the probabilities, with
+tied scores given their average rank, which is what sklearn's trapezoidal
+ROC area works out to. Results are plain dicts of floats, ints and lists, so
+they can go straight to json.dumps or a dashboard; `render` prints them the
+way notebooks/utils.py always has.
+
+Usage:
+    from evaluation import evaluate, render
+    result = evaluate(y_train, y_t_pred, y_test, y_pred, y_t_proba, y_proba)
+    print(render(result))
+"""
+import numpy as np
+
+
+def _labels(y):
+    y = np.asarray(y).ravel()
+    if y.dtype != bool and len(y) and not np.isin(y, (0, 1)).all():
+        raise ValueError("labels must be 0/1 or boolean")
+    return y.astype(np.intp)
+
+
+def confusion(y_true, y_pred):
+    """2x2 confusion matrix [[tn, fp], [fn, tp]] in one bincount pass."""
+    y_true, y_pred = _labels(y_true), _labels(y_pred)
+    if len(y_true) != len(y_pred):
+        raise ValueError(f"{len(y_true)} labels but {len(y_pred)} predictions")
+    return np.bincount(2 * y_true + y_pred, minlength=4).reshape(2, 2)
+
+
+def rank_auc(y_true, proba):
+    """ROC-AUC as the normalized rank sum of the positives; None if one class is absent."""
+    y_true = _labels(y_true).astype(bool)
+    proba = np.asarray(proba, dtype=np.float64).ravel()
+    positives = int(y_true.sum())
+    negatives = len(y_true) - positives
+    if positives == 0 or negatives == 0:
+        return None
+
+    order = np.argsort(proba, kind="stable")
+    scores = proba[order]
+    # Runs of tied scores share the mean of the 1-based ranks they span
+    bounds = np.flatnonzero(np.r_[True, scores[1:] != scores[:-1], True])
+    starts, ends = bounds[:-1], bounds[1:]
+    ranks = np.repeat((starts + ends + 1) / 2.0, ends - starts)
+    rank_sum = ranks[y_true[order]].sum()
+    return float((rank_sum - positives * (positives + 1) / 2.0) / (positives * negatives))
+
+
+def _ratio(num, den):
+    return float(num / den) if den else 0.0
+
+
+def _f1(tp, fp, fn):
+    # From the counts, as sklearn does: 2pr / (p + r) can round differently
+    return _ratio(2 * tp, 2 * tp + fp + fn)
+
+
+def metrics_from_confusion(cm):
+    """Every threshold metric of a split, derived from its confusion matrix."""
+    (tn, fp), (fn, tp) = np.asarray(cm).tolist()
+    rows = tn + fp + fn + tp
+    precision, recall = _ratio(tp, tp + fp), _ratio(tp, tp + fn)
+    neg_precision, specificity = _ratio(tn, tn + fn), _ratio(tn, tn + fp)
+
+    report = {
+        "0": {"precision": neg_precision, "recall": specificity,
+              "f1-score": _f1(tn, fn, fp), "support": tn + fp},
+        "1": {"precision": precision, "recall": recall,
+              "f1-score": _f1(tp, fp, fn), "support": fn + tp},
+    }
+    for name, weights in (("macro avg", (1, 1)), ("weighted avg", (tn + fp, fn + tp))):
+        total = sum(weights)
+        report[name] = {
+            metric: _ratio(sum(w * report[c][metric] for w, c in zip(weights, "01")), total)
+            for metric in ("precision", "recall", "f1-score")
+        }
+        report[name]["support"] = rows
+
+    return {
+        "rows": rows,
+        "accuracy": _ratio(tn + tp, rows),
+        "recall": recall,
+        "precision": precision,
+        "f1": report["1"]["f1-score"],
+        "specificity": specificity,
+        "confusion_matrix": [[tn, fp], [fn, tp]],
+        "report": report,
+    }
+
+
+def evaluate_split(y_true, y_pred, proba=None):
+    """Metrics for one split; includes "roc_auc" when probabilities are given."""
+    result = metrics_from_confusion(confusion(y_true, y_pred))
+    if proba is not None:
+        result["roc_auc"] = rank_auc(y_true, proba)
+    return result
+
+
+def evaluate(y_train, y_t_pred, y_test, y_pred, y_t_proba=None, y_proba=None):
+    """
+    Train and test metrics in one JSON-serializable dict.
+
+    Parameters:
+    -----------
+    y_train, y_test : Ground truth labels
+    y_t_pred, y_pred : Predicted binary labels
+    y_t_proba, y_proba : (Optional) Predicted probabilities for ROC-AUC calculation
+
+    Returns {"train": {...}, "test": {...}}, each as from `evaluate_split`.
+    """
+    return {
+        "train": evaluate_split(y_train, y_t_pred, y_t_proba),
+        "test": evaluate_split(y_test, y_pred, y_proba),
+    }
+
+
+def _report_text(report, accuracy, digits=2):
+    width = len("weighted avg")
+    lines = [f"{'':>{width}} " + "".join(f" {h:>9}" for h in
+                                          ("precision", "recall", "f1-score", "support")), ""]
+    for name in ("0", "1"):
+        row = report[name]
+        lines.append(f"{name:>{width}} " + "".join(
+            f" {row[m]:>9.{digits}f}" for m in ("precision", "recall", "f1-score"))
+            + f" {row['support']:>9}")
+    support = report["macro avg"]["support"]
+    lines += ["", f"{'accuracy':>{width}}  {'':>9} {'':>9} {accuracy:>9.{digits}f} {support:>9}"]
+    for name in ("macro avg", "weighted avg"):
+        row = report[name]
+        lines.append(f"{name:>{width}} " + "".join(
+            f" {row[m]:>9.{digits}f}" for m in ("precision", "recall", "f1-score"))
+            + f" {row['support']:>9}")
+    return "\n".join(lines) + "\n"
+
+
+def render(result):
+    """
+    The text printed by notebooks/utils.py::classification_model_measurements.
+
+    Report figures are computed from the counts as sklearn does, so they round
+    the same; sklearn alone prints supports as floats when no prediction is right.
+    """
+    train, test = result["train"], result["test"]
+    out = ["=" * 50, f"{' MODEL EVALUATION METRICS ':*^50}", "=" * 50]
+
+    def section(title, metric, fmt):
+        out.extend([f"\n{title:^50}", "-" * 50,
+                    f"Training  => {fmt(train[metric])}",
+                    f"Testing   => {fmt(test[metric])}"])
+
+    section("ACCURACY SCORE", "accuracy", lambda v: f"{v * 100:.2f}%")
+    section("RECALL SCORE (Sensitivity)", "recall", lambda v: f"{v * 100:.2f}%")
+    section("PRECISION SCORE", "precision", lambda v: f"{v * 100:.2f}%")
+    section("F1-SCORE (Harmonic Mean)", "f1", lambda v: f"{v:.3f}")
+    if train.get("roc_auc") is not None and test.get("roc_auc") is not None:
+        section("ROC-AUC SCORE", "roc_auc", lambda v: f"{v:.3f}")
+
+    out.extend([f"\n{'CONFUSION MATRIX':^50}", "-" * 50,
+                f"Training:\n{np.array(train['confusion_matrix'])}",
+                f"\nTesting:\n{np.array(test['confusion_matrix'])}"])
+    out.extend([f"\n{'CLASSIFICATION REPORT':^50}", "-" * 50,
+                f"Training:\n{_report_text(train['report'], train['accuracy'])}",
+                f"Testing:\n{_report_text(test['report'], test['accuracy'])}",
+                "=" * 50])
+    return "\n".join(out)
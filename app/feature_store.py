@@ -0,0 +1,179 @@
+"""
+Columnar binary feature store for the diabetes data.
+
+Text CSVs are re-parsed on every run. `convert` instead turns a CSV into a
+directory of .npy files, written chunk by chunk:
+
+    clean_diabetes_data.cols/
+        manifest.json       rows, columns, dtypes, source SHA-256
+        Glucose.npy ...     one array per column (float32; Outcome as uint8)
+        features.npy        the model features as a C-ordered (rows, 4) float32 matrix
+
+Everything is opened with np.load(mmap_mode="r"), so a reader maps only the
+files it touches and nothing is parsed or copied: training, evaluation and
+batch scoring read `features.npy` directly, already in the dtype the trees
+compare. The pandas index column of the cleaned CSV is dropped.
+
+Usage:
+    python app/feature_store.py convert data/clean_diabetes_data.csv
+    python app/feature_store.py info data/clean_diabetes_data.cols
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scoring import FEATURES, file_sha256, repo_path
+
+STORE_SUFFIX = ".cols"
+MANIFEST = "manifest.json"
+MATRIX = "features.npy"
+DEFAULT_CHUNKSIZE = 1_000_000
+
+CLINICAL_COLUMNS = ["Pregnancies", "Glucose", "BloodPressure", "SkinThickness", "Insulin",
+                    "BMI", "DiabetesPedigreeFunction", "Age"]
+COLUMN_DTYPES = {**{name: np.float32 for name in CLINICAL_COLUMNS}, "Outcome": np.uint8}
+
+
+def is_store(path):
+    """True if `path` is a feature store directory rather than a CSV/Parquet file."""
+    return (Path(path) / MANIFEST).is_file()
+
+
+def _count_rows(path):
+    """Data lines in a CSV (excluding the header), counted without parsing."""
+    lines, last = 0, b"\n"
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 24), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    return lines + (last != b"\n") - 1
+
+
+class FeatureStore:
+    """Read-only, memory-mapped view of a converted CSV."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / MANIFEST).read_text())
+        self.rows = self.manifest["rows"]
+        self.columns = list(self.manifest["dtypes"])
+
+    def column(self, name):
+        """One column as a read-only memory map."""
+        if name not in self.manifest["dtypes"]:
+            raise KeyError(f"{self.path} has no column {name!r}")
+        return np.load(self.path / f"{name}.npy", mmap_mode="r")
+
+    def features(self):
+        """The (rows, 4) float32 model-feature matrix as a read-only memory map."""
+        return np.load(self.path / MATRIX, mmap_mode="r")
+
+    def frame(self, columns=None, start=0, stop=None):
+        """
+        Rows [start, stop) of `columns` (default: FEATURES) as a DataFrame.
+
+        The model features come from one slice of `features.npy`, so the
+        default frame is a zero-copy view of the memory map.
+        """
+        frame = pd.DataFrame(self.features()[start:stop], columns=FEATURES, copy=False)
+        if columns is None or list(columns) == FEATURES:
+            return frame
+        for name in columns:
+            if name not in FEATURES:
+                frame[name] = self.column(name)[start:stop]
+        return frame[list(columns)]
+
+
+def convert(csv_path, store_path=None, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    """
+    Write the feature store for `csv_path` and return it opened.
+
+    Parameters:
+    -----------
+    csv_path : CSV shaped like data/diabetes.csv or data/clean_diabetes_data.csv
+    store_path : Output directory (default: the CSV path with a .cols suffix)
+    chunksize : Rows parsed at once
+    progress : Optional callable receiving (rows written, total rows)
+    """
+    csv_path = Path(csv_path)
+    store_path = Path(store_path) if store_path else csv_path.with_suffix(STORE_SUFFIX)
+    header = pd.read_csv(csv_path, nrows=0).columns
+    # The cleaned CSV carries the pandas index as an unnamed first column
+    columns = [c for c in header if c and not c.startswith("Unnamed:")]
+    missing = set(FEATURES) - set(columns)
+    if missing:
+        raise ValueError(f"{csv_path} has no column(s) {sorted(missing)}")
+
+    rows = _count_rows(csv_path)
+    if rows <= 0:
+        raise ValueError(f"{csv_path} has no data rows")
+    store_path.mkdir(parents=True, exist_ok=True)
+    (store_path / MANIFEST).unlink(missing_ok=True)
+
+    chunks = pd.read_csv(csv_path, usecols=columns, chunksize=chunksize,
+                         dtype={c: COLUMN_DTYPES[c] for c in columns if c in COLUMN_DTYPES})
+    outputs, matrix, written = {}, None, 0
+    for chunk in chunks:
+        if not outputs:
+            for name in columns:
+                outputs[name] = np.lib.format.open_memmap(
+                    store_path / f"{name}.npy", mode="w+",
+                    dtype=COLUMN_DTYPES.get(name, chunk[name].dtype), shape=(rows,))
+            matrix = np.lib.format.open_memmap(store_path / MATRIX, mode="w+",
+                                               dtype=np.float32, shape=(rows, len(FEATURES)))
+        stop = written + len(chunk)
+        if stop > rows:
+            raise ValueError(f"{csv_path} has more rows than lines; quoted newlines?")
+        for name in columns:
+            outputs[name][written:stop] = chunk[name].to_numpy()
+        matrix[written:stop] = chunk[FEATURES].to_numpy(dtype=np.float32)
+        written = stop
+        if progress is not None:
+            progress(written, rows)
+    if written != rows:
+        raise ValueError(f"parsed {written} rows but {csv_path} has {rows} lines")
+
+    for array in [*outputs.values(), matrix]:
+        array.flush()
+    # Written last, so a half-converted directory is never mistaken for a store
+    (store_path / MANIFEST).write_text(json.dumps({
+        "rows": rows,
+        "dtypes": {name: np.dtype(array.dtype).str for name, array in outputs.items()},
+        "features": FEATURES,
+        "source": {"path": repo_path(csv_path), "sha256": file_sha256(csv_path)},
+    }, indent=2) + "\n")
+    return FeatureStore(store_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert_parser = sub.add_parser("convert", help="write a store from a CSV")
+    convert_parser.add_argument("csv")
+    convert_parser.add_argument("store", nargs="?", help="default: CSV path with a .cols suffix")
+    convert_parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    info_parser = sub.add_parser("info", help="describe an existing store")
+    info_parser.add_argument("store")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        def report(done, total):
+            print(f"\r{done:,}/{total:,} rows", end="", flush=True)
+
+        start = time.perf_counter()
+        store = convert(args.csv, args.store, args.chunksize, progress=report)
+        print(f"\nWrote {store.path} ({store.rows:,} rows) in {time.perf_counter() - start:.2f}s")
+    else:
+        store = FeatureStore(args.store)
+        size = sum(f.stat().st_size for f in store.path.iterdir())
+        print(f"{store.path}: {store.rows:,} rows, {size / 1e6:,.1f} MB")
+        for name, dtype in store.manifest["dtypes"].items():
+            print(f"  {name:<26} {np.dtype(dtype)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+"""
+Flattened, vectorized inference for the random forest in diabetes_pipeline.pkl.
+
+sklearn walks each of the 200 trees separately and re-validates its input on
+every call. FlatForest copies every tree into a handful of contiguous NumPy
+arrays (split feature, threshold, child indices, leaf probabilities) and moves
+a whole batch of rows through all trees at once.
+
+Two exact ways of finding the leaf each row reaches are provided:
+
+* depth stepping: every (tree, row) pair advances one level per NumPy step;
+  used by `apply` and for rows with missing values.
+* leaf bitmasks (QuickScorer-style): leaves of a tree are numbered left to
+  right and every split whose test fails (x > threshold) clears the bits of
+  the leaves in its left subtree. Sorting the split thresholds of each feature
+  and AND-ing the masks cumulatively turns a row's path into one
+  `searchsorted` and one table lookup per feature; the exit leaf is the lowest
+  bit left set. This is the fast path for `predict_proba`.
+
+The arithmetic mirrors sklearn exactly: inputs are cast to float32 before being
+compared with the float64 thresholds, leaf probabilities are taken verbatim from
+`tree_.value`, and tree outputs are accumulated in estimator order before
+dividing by the number of trees, so the probabilities are bit-identical to a
+sequential (n_jobs=1) `predict_proba`.
+
+`contributions` explains predictions exactly by decomposing every decision
+path: each split moves the node's positive-class fraction from the parent's
+value to the child's, and that change is credited to the split feature. A
+row's probability is then `expected_value` (the mean root value) plus one
+contribution per feature. Per-node contributions are precomputed once, so
+explaining a batch reuses the leaf lookup of `predict_proba` and adds one
+gather per feature.
+
+A FlatForest can be saved to a flat binary artifact (`save`, or
+`python app/forest.py export`) that `load` memory-maps with NumPy alone: no
+sklearn import, no unpickling, no per-tree objects. The file is a magic
+string, a JSON header (format version, feature names, source model hash and
+the dtype, shape and offset of every array), then the arrays themselves,
+64-byte aligned, including the precomputed leaf masks.
+
+Usage:
+    python app/forest.py export     # model/diabetes_pipeline.pkl -> model/diabetes_pipeline.npf
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from scoring import FEATURES, MODEL_PATH, file_sha256
+
+# Rows moved through the forest per step; bounds the (trees x rows) work matrices
+BLOCK_ROWS = 8192
+
+# Below this many rows the per-tree Python loop costs more than the arithmetic
+SMALL_BATCH = 64
+
+ARTIFACT_MAGIC = b"FLATFRST"
+ARTIFACT_VERSION = 1
+_ALIGN = 64
+
+
+def forest_path(model_path=MODEL_PATH):
+    """The flat artifact exported from a pipeline pickle, e.g. model/diabetes_pipeline.npf."""
+    return Path(model_path).with_suffix(".npf")
+
+
+class FlatForest:
+    """
+    A random forest flattened into contiguous node arrays.
+
+    Node arrays are indexed by a global node id; `roots[t]` is the id of the
+    root of tree t. Leaves point to themselves so every row can take the same
+    number of steps (`max_depth`) regardless of where its path ends.
+    """
+
+    def __init__(self, feature, threshold, children, missing_left, leaf_proba,
+                 roots, max_depth, feature_names=None, leaf_masks=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_left = missing_left
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names) if feature_names is not None else list(FEATURES)
+        self.metadata = {}
+        self._node_contributions = None
+        if leaf_masks is None:
+            self._build_leaf_masks()
+        else:
+            self.leaf_nodes, self.split_values, self.prefix_masks, self._mask_width = leaf_masks
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Build a FlatForest from a fitted RandomForestClassifier or a Pipeline ending in one."""
+        forest = model.steps[-1][1] if hasattr(model, "steps") else model
+        if len(forest.classes_) != 2:
+            raise ValueError("FlatForest only supports binary classifiers")
+
+        features, thresholds, lefts, rights, missing, probas, roots = [], [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            own = np.arange(offset, offset + n)
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, own, tree.children_left + offset))
+            rights.append(np.where(is_leaf, own, tree.children_right + offset))
+            missing.append(np.asarray(tree.missing_go_to_left, dtype=bool))
+
+            # sklearn >= 1.4 stores class fractions in tree_.value and returns
+            # them untouched; older versions stored weighted counts.
+            value = tree.value[:, 0, :]
+            totals = value.sum(axis=1)
+            if not np.allclose(totals, 1.0):
+                totals[totals == 0.0] = 1.0
+                value = value / totals[:, np.newaxis]
+            probas.append(value)
+
+            roots.append(offset)
+            offset += n
+
+        children = np.ascontiguousarray(
+            np.stack([np.concatenate(lefts), np.concatenate(rights)], axis=1), dtype=np.intp)
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=children,
+            missing_left=np.concatenate(missing),
+            leaf_proba=np.ascontiguousarray(np.concatenate(probas).T),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max(e.tree_.max_depth for e in forest.estimators_),
+            feature_names=getattr(forest, "feature_names_in_", FEATURES),
+        )
+
+    def _arrays(self):
+        arrays = {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "children": self.children,
+            "missing_left": self.missing_left,
+            "leaf_proba": self.leaf_proba,
+            "roots": self.roots,
+        }
+        if self.leaf_nodes is not None:
+            arrays["leaf_nodes"] = self.leaf_nodes
+            for f, (values, masks) in enumerate(zip(self.split_values, self.prefix_masks)):
+                arrays[f"split_values_{f}"] = values
+                arrays[f"prefix_masks_{f}"] = masks
+        return arrays
+
+    def save(self, path, **metadata):
+        """Write the flat artifact to `path` (atomically); `metadata` goes into its header."""
+        layout, offset = {}, 0
+        arrays = {name: np.ascontiguousarray(a) for name, a in self._arrays().items()}
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.newbyteorder("<").str,
+                            "shape": list(array.shape), "offset": offset}
+            offset += -(-array.nbytes // _ALIGN) * _ALIGN
+        header = json.dumps({
+            "format_version": ARTIFACT_VERSION,
+            "feature_names": self.feature_names,
+            "max_depth": self.max_depth,
+            "mask_width": self._mask_width if self.leaf_nodes is not None else None,
+            "metadata": metadata,
+            "arrays": layout,
+        }).encode()
+        start = -(-(len(ARTIFACT_MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(ARTIFACT_MAGIC)
+            f.write(np.array([ARTIFACT_VERSION, len(header)], dtype="<u4").tobytes())
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(start + layout[name]["offset"])
+                f.write(array.astype(layout[name]["dtype"], copy=False).tobytes())
+            f.truncate(start + offset)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Open an artifact written by `save`, memory-mapped unless `mmap` is False.
+
+        Only NumPy is used; the header is JSON and every array is checked to
+        stay inside the node arrays, so a corrupt or hostile file raises
+        ValueError instead of running code.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(ARTIFACT_MAGIC)) != ARTIFACT_MAGIC:
+                raise ValueError(f"{path} is not a flat forest artifact")
+            version, length = np.frombuffer(f.read(8), dtype="<u4")
+            if version != ARTIFACT_VERSION:
+                raise ValueError(f"{path} has format version {version}, "
+                                 f"expected {ARTIFACT_VERSION}")
+            header = json.loads(f.read(int(length)))
+        start = -(-(len(ARTIFACT_MAGIC) + 8 + int(length)) // _ALIGN) * _ALIGN
+
+        data = np.memmap(path, dtype=np.uint8, mode="r") if mmap else np.fromfile(path, np.uint8)
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            begin = start + spec["offset"]
+            if begin + count * dtype.itemsize > len(data):
+                raise ValueError(f"{path} is truncated ({name})")
+            arrays[name] = data[begin:begin + count * dtype.itemsize].view(dtype).reshape(
+                spec["shape"])
+
+        n_nodes, n_features = len(arrays["feature"]), len(header["feature_names"])
+        checks = [
+            arrays["children"].shape == (n_nodes, 2),
+            arrays["leaf_proba"].shape == (2, n_nodes),
+            len(arrays["threshold"]) == len(arrays["missing_left"]) == n_nodes,
+            ((arrays["children"] >= 0) & (arrays["children"] < n_nodes)).all(),
+            ((arrays["roots"] >= 0) & (arrays["roots"] < n_nodes)).all(),
+            ((arrays["feature"] >= 0) & (arrays["feature"] < n_features)).all(),
+        ]
+        leaf_masks = None
+        if "leaf_nodes" in arrays:
+            leaf_nodes = arrays["leaf_nodes"]
+            checks.append(((leaf_nodes >= 0) & (leaf_nodes < n_nodes)).all())
+            checks.append(len(leaf_nodes) == len(arrays["roots"]) * header["mask_width"])
+            split_values = [arrays[f"split_values_{f}"] for f in range(n_features)]
+            prefix_masks = [arrays[f"prefix_masks_{f}"] for f in range(n_features)]
+            checks += [m.shape == (len(v) + 1, len(arrays["roots"]))
+                       for v, m in zip(split_values, prefix_masks)]
+            leaf_masks = (leaf_nodes, split_values, prefix_masks, header["mask_width"])
+        if not all(checks):
+            raise ValueError(f"{path} has inconsistent node arrays")
+
+        forest = cls(arrays["feature"], arrays["threshold"], arrays["children"],
+                     arrays["missing_left"], arrays["leaf_proba"], arrays["roots"],
+                     header["max_depth"], header["feature_names"], leaf_masks=leaf_masks)
+        forest.metadata = header["metadata"]
+        return forest
+
+    def _build_leaf_masks(self):
+        """Precompute the per-feature cumulative leaf masks used by `_leaves_by_mask`."""
+        left, right = self.children[:, 0], self.children[:, 1]
+        is_leaf = left == np.arange(self.n_nodes)
+        tree_of = np.empty(self.n_nodes, dtype=np.intp)
+
+        # Pre-order walk of every tree; leaves come out left to right
+        preorder, tree_leaves = [], []
+        for t, root in enumerate(self.roots):
+            order, stack = [], [root]
+            while stack:
+                node = stack.pop()
+                preorder.append(node)
+                tree_of[node] = t
+                if is_leaf[node]:
+                    order.append(node)
+                else:
+                    stack += [right[node], left[node]]
+            tree_leaves.append(order)
+
+        widest = max(len(order) for order in tree_leaves)
+        if widest > 64:
+            self.leaf_nodes = None
+            return
+        dtype = np.uint32 if widest <= 32 else np.uint64
+        full = int(np.iinfo(dtype).max)
+
+        leaf_nodes = np.zeros((self.n_trees, widest), dtype=np.intp)
+        first_leaf = np.zeros(self.n_nodes, dtype=np.int64)
+        n_leaves = np.ones(self.n_nodes, dtype=np.int64)
+        for t, order in enumerate(tree_leaves):
+            leaf_nodes[t, :len(order)] = order
+            first_leaf[order] = np.arange(len(order))
+        for node in reversed(preorder):
+            if not is_leaf[node]:
+                first_leaf[node] = first_leaf[left[node]]
+                n_leaves[node] = n_leaves[left[node]] + n_leaves[right[node]]
+
+        self.split_values, self.prefix_masks = [], []
+        for f in range(len(self.feature_names)):
+            splits = np.flatnonzero(~is_leaf & (self.feature == f))
+            values = np.unique(self.threshold[splits])
+            prefix = np.full((len(values) + 1, self.n_trees), full, dtype=dtype)
+            for node, rank in zip(splits, np.searchsorted(values, self.threshold[splits])):
+                # A failed test at `node` rules out every leaf of its left subtree
+                ruled_out = ((1 << int(n_leaves[left[node]])) - 1) << int(first_leaf[node])
+                prefix[rank + 1, tree_of[node]] &= dtype(full ^ ruled_out)
+            self.split_values.append(values)
+            self.prefix_masks.append(np.bitwise_and.accumulate(prefix, axis=0))
+
+        self.leaf_nodes = leaf_nodes.ravel()
+        self._mask_width = widest
+
+    def _as_float32(self, X):
+        if hasattr(X, "columns"):
+            X = X[self.feature_names].to_numpy()
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Expected rows with {len(self.feature_names)} features "
+                f"({', '.join(self.feature_names)}), got shape {X.shape}"
+            )
+        if np.isinf(X).any():
+            raise ValueError("Input contains infinity or a value too large for float32")
+        return X
+
+    def apply(self, X):
+        """Return the leaf id reached in every tree, shape (n_trees, n_rows)."""
+        X = self._as_float32(X)
+        leaves = np.empty((self.n_trees, len(X)), dtype=np.intp)
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS]
+            leaves[:, start:start + len(block)] = self._leaves_by_stepping(block)
+        return leaves
+
+    def _leaves_by_stepping(self, X):
+        columns = np.ascontiguousarray(X.T)
+        rows = np.arange(X.shape[0])
+        has_nan = np.isnan(columns).any()
+
+        node = np.repeat(self.roots[:, np.newaxis], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            x = columns[self.feature[node], rows]
+            go_left = x <= self.threshold[node]
+            if has_nan:
+                go_left |= np.isnan(x) & self.missing_left[node]
+            node = self.children[node, (~go_left).view(np.int8)]
+        return node
+
+    def _leaves_by_mask(self, X):
+        # Splits with threshold < x fail for that row; searchsorted counts them
+        masks = self.prefix_masks[0][np.searchsorted(self.split_values[0], X[:, 0])]
+        for f in range(1, X.shape[1]):
+            masks &= self.prefix_masks[f][np.searchsorted(self.split_values[f], X[:, f])]
+        # Index of the lowest set bit = popcount of the bits below and at it, minus one
+        exit_leaf = np.bitwise_count(masks ^ (masks - 1)).astype(np.intp)
+        exit_leaf += np.arange(-1, self.n_trees * self._mask_width - 1, self._mask_width)
+        return self.leaf_nodes[exit_leaf.T]
+
+    def _leaves(self, X):
+        if self.leaf_nodes is None or np.isnan(X).any():
+            return self._leaves_by_stepping(X)
+        return self._leaves_by_mask(X)
+
+    def predict_proba(self, X):
+        """Class probabilities, shape (n_rows, 2), matching sklearn's predict_proba."""
+        X = self._as_float32(X)
+        out = np.empty((len(X), 2), dtype=np.float64)
+        for start in range(0, len(X), BLOCK_ROWS):
+            leaves = self._leaves(X[start:start + BLOCK_ROWS])
+            block = out[start:start + leaves.shape[1]]
+            # Trees are added one at a time, in estimator order, exactly as
+            # sklearn accumulates them; np.sum's pairwise reduction would differ
+            # in the last bit. A running sum is cheapest for a handful of rows,
+            # row-wise adds for large blocks.
+            if leaves.shape[1] <= SMALL_BATCH:
+                block[:] = np.cumsum(self.leaf_proba[:, leaves], axis=1)[:, -1].T
+                continue
+            for k in range(2):
+                proba = self.leaf_proba[k][leaves]
+                total = proba[0].copy()
+                for t in range(1, self.n_trees):
+                    total += proba[t]
+                block[:, k] = total
+        out /= self.n_trees
+        return out
+
+    @property
+    def expected_value(self):
+        """Mean positive-class value at the roots: the prediction before any split."""
+        return float(self.leaf_proba[1][self.roots].mean())
+
+    def _path_contributions(self):
+        # (n_features, n_nodes): the value change credited to each feature on the
+        # path from the root to every node, filled one tree level at a time
+        left, right = self.children[:, 0], self.children[:, 1]
+        internal = left != np.arange(self.n_nodes)
+        value = self.leaf_proba[1]
+        contributions = np.zeros((len(self.feature_names), self.n_nodes))
+        frontier = self.roots[internal[self.roots]]
+        while len(frontier):
+            for child in (left[frontier], right[frontier]):
+                contributions[:, child] = contributions[:, frontier]
+                contributions[self.feature[frontier], child] += value[child] - value[frontier]
+            frontier = np.concatenate([left[frontier], right[frontier]])
+            frontier = frontier[internal[frontier]]
+        return contributions
+
+    def contributions(self, X):
+        """
+        Per-feature contributions to the positive-class probability, shape
+        (n_rows, n_features): `expected_value + contributions(X).sum(axis=1)`
+        equals `predict_proba(X)[:, 1]` up to rounding.
+        """
+        if self._node_contributions is None:
+            self._node_contributions = self._path_contributions()
+        X = self._as_float32(X)
+        out = np.empty((len(X), len(self.feature_names)), dtype=np.float64)
+        for start in range(0, len(X), BLOCK_ROWS):
+            leaves = self._leaves(X[start:start + BLOCK_ROWS])
+            for f, by_node in enumerate(self._node_contributions):
+                out[start:start + leaves.shape[1], f] = by_node[leaves].sum(axis=0)
+        out /= self.n_trees
+        return out
+
+    def predict(self, X, threshold=0.5):
+        """Binary predictions using `threshold` on the positive-class probability."""
+        return (self.predict_proba(X)[:, 1] >= threshold).astype(np.int64)
+
+
+def load_exported(model_path=MODEL_PATH, model_sha256=None):
+    """
+    The flat artifact exported from `model_path`, or None if there is none or
+    it was exported from a different version of the model.
+    """
+    path = forest_path(model_path)
+    if not path.exists():
+        return None
+    forest = FlatForest.load(path)
+    if model_sha256 is None:
+        model_sha256 = file_sha256(model_path)
+    if forest.metadata.get("model_sha256") != model_sha256:
+        return None
+    return forest
+
+
+def export(model_path=MODEL_PATH, output_path=None):
+    """Flatten the pickled pipeline at `model_path` and save it next to it (or to `output_path`)."""
+    from scoring import load_pipeline
+
+    import sklearn
+
+    forest = FlatForest.from_sklearn(load_pipeline(model_path))
+    output_path = forest_path(model_path) if output_path is None else Path(output_path)
+    forest.save(output_path, model_sha256=file_sha256(model_path),
+                sklearn_version=sklearn.__version__, n_trees=forest.n_trees)
+    return forest, output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--model", default=MODEL_PATH, help="pipeline pickle (default: %(default)s)")
+    parser.add_argument("--output", default=None, help="default: the model path with .npf")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+    from scoring import load_pipeline
+
+    forest, path = export(args.model, args.output)
+    start = time.perf_counter()
+    loaded = FlatForest.load(path)
+    seconds = time.perf_counter() - start
+    # The artifact as read back from disk against the pickled pipeline itself
+    X = pd.DataFrame(np.random.default_rng(0).uniform([0, 10, 0, 0], [300, 70, 120, 20],
+                                                      size=(10_000, 4)),
+                     columns=loaded.feature_names)
+    if not np.array_equal(loaded.predict_proba(X), load_pipeline(args.model).predict_proba(X)):
+        parser.exit(1, f"{path} does not reproduce the pipeline\n")
+    print(f"Wrote {path} ({os.path.getsize(path) / 1e3:,.0f} KB, {forest.n_trees} trees, "
+          f"{forest.n_nodes:,} nodes); loads in {seconds * 1e3:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Grow the served forest on newly labeled data instead of refitting it.
+
+A full retrain (train.py) refits all trees on the whole history. An update
+here loads the served pipeline and:
+
+1. retires trees to stay within `budget` (default: the current size), the
+   oldest first or, with --retire weakest, those with the lowest ROC AUC on
+   the new rows, which none of them has seen;
+2. fits `add` new trees with the 4.5b hyperparameters on the new rows only,
+   through the forest's warm start, so the cost scales with the new data;
+3. validates the result on a holdout (a stratified 20% of the new rows, or
+   --holdout) against the served model at its decision threshold, and is
+   rejected when ROC AUC or recall drop by more than the tolerances.
+
+Trees stay in the order they were added, so the first ones are the oldest.
+An accepted update is written to model/versions/ with the served model's
+metadata carried over (threshold, drift reference), the holdout evaluation
+and an "incremental" history entry; --promote installs it atomically through
+train.promote. A rejected update writes nothing and exits with status 1.
+
+Usage:
+    python app/incremental.py data/new_outcomes.csv
+    python app/incremental.py data/new_outcomes.csv --add 40 --retire weakest --promote
+    python app/incremental.py data/new_outcomes.csv --holdout data/holdout.csv --budget 250
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from bootstrap import evaluation_entry
+from evaluation import evaluate_split, rank_auc
+from scoring import (MODEL_PATH, ROOT, decision_threshold, file_sha256, load_metadata,
+                     load_pipeline, repo_path, update_metadata)
+from train import (DEFAULT_CHUNKSIZE, VERSIONS_DIR, StageTimer, data_sha256, format_stages,
+                   load_training_data, promote, split)
+
+DEFAULT_ADD = 20
+MAX_AUC_DROP = 0.005
+MAX_RECALL_DROP = 0.02
+POLICIES = ("oldest", "weakest")
+
+
+def tree_auc(forest, X, y):
+    """ROC AUC of each tree of a fitted RandomForestClassifier on (X, y)."""
+    X = np.asarray(X, dtype=np.float32)
+    return np.array([rank_auc(y, tree.predict_proba(X)[:, 1]) for tree in forest.estimators_])
+
+
+def retire(forest, count, policy="oldest", X=None, y=None):
+    """
+    Drop `count` trees from a fitted forest in place; returns their indices.
+
+    "oldest" drops the first trees, "weakest" those with the lowest ROC AUC
+    on (X, y). The remaining trees keep their order.
+    """
+    n_trees = len(forest.estimators_)
+    count = min(count, n_trees)
+    if policy == "oldest":
+        dropped = np.arange(count)
+    elif policy == "weakest":
+        dropped = np.sort(np.argsort(tree_auc(forest, X, y), kind="stable")[:count])
+    else:
+        raise ValueError(f"unknown retirement policy {policy!r}, expected one of {POLICIES}")
+    keep = np.setdiff1d(np.arange(n_trees), dropped)
+    forest.estimators_ = [forest.estimators_[i] for i in keep]
+    forest.n_estimators = len(forest.estimators_)
+    return dropped.tolist()
+
+
+def grow(pipeline, X, y, add=DEFAULT_ADD, budget=None, policy="oldest", seed=None, n_jobs=-1):
+    """
+    Retire trees down to `budget - add` and fit `add` new ones on (X, y), in place.
+
+    Parameters:
+    -----------
+    pipeline : Fitted 4.5b pipeline; its forest is modified
+    X, y : New labeled rows (both classes present)
+    add : Trees fitted on the new rows
+    budget : Trees kept at most after the update (default: the current count)
+    policy : Which trees to retire, "oldest" or "weakest" (see `retire`)
+    seed : random_state of the new trees (default: keep the forest's)
+    n_jobs : Cores used to fit the new trees
+
+    Returns the indices of the retired trees in the original forest.
+    """
+    forest = pipeline[-1]
+    if len(np.unique(y)) != len(forest.classes_):
+        raise ValueError("the new rows must contain both outcomes")
+    budget = len(forest.estimators_) if budget is None else budget
+    if not 0 < add <= budget:
+        raise ValueError(f"add must be between 1 and the budget ({budget}), got {add}")
+    retired = retire(forest, max(0, len(forest.estimators_) + add - budget), policy, X, y)
+    # A warm start keeps the fitted trees and fits only the missing ones
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + add,
+                      n_jobs=n_jobs, **({} if seed is None else {"random_state": seed}))
+    try:
+        pipeline.fit(X, y)
+    finally:
+        forest.set_params(warm_start=False)
+    return retired
+
+
+def holdout_scores(y, proba, threshold):
+    """ROC AUC and recall / precision at `threshold` of one model on the holdout."""
+    result = evaluate_split(y, proba >= threshold, proba)
+    return {name: result[name] for name in ("roc_auc", "recall", "precision")}
+
+
+def refreshed_metrics(base_metadata, y, proba, threshold, split="holdout"):
+    """
+    The "operating_point" and "metrics" metadata of a modified model, recomputed
+    on (y, proba) at `threshold` so it does not inherit the base model's figures.
+    """
+    result = evaluate_split(y, proba >= threshold, proba)
+    operating_point = base_metadata.get("operating_point", {})
+    criterion = operating_point.get("criterion")
+    if criterion is None or operating_point.get("threshold") != threshold:
+        criterion = {"fixed": threshold}
+    return {
+        "operating_point": {
+            "threshold": threshold,
+            "criterion": criterion,
+            "split": split,
+            "rows": int(len(y)),
+            "recall": result["recall"],
+            "precision": result["precision"],
+            "f1": result["f1"],
+        },
+        "metrics": {split: {k: v for k, v in result.items() if k != "report"}},
+    }
+
+
+def update(data_path, holdout_path=None, model_path=MODEL_PATH, add=DEFAULT_ADD, budget=None,
+           policy="oldest", max_auc_drop=MAX_AUC_DROP, max_recall_drop=MAX_RECALL_DROP,
+           chunksize=DEFAULT_CHUNKSIZE, n_jobs=-1, versions_dir=VERSIONS_DIR):
+    """
+    Grow the model at `model_path` on the rows of `data_path` and validate it.
+
+    Parameters:
+    -----------
+    data_path : Cleaned CSV or feature store of newly labeled rows
+    holdout_path : Rows to validate on (default: a stratified 20% of `data_path`,
+                   which are then not fitted on)
+    model_path : Pipeline to update
+    add, budget, policy : See `grow`
+    max_auc_drop : Largest holdout ROC AUC loss against the current model accepted
+    max_recall_drop : Largest holdout recall loss at the decision threshold accepted
+    chunksize : Rows read per chunk
+    n_jobs : Cores used to fit the new trees
+    versions_dir : Directory an accepted version and its sidecar are written to
+
+    Returns (artifact path or None when rejected, report dict).
+    """
+    timer = StageTimer()
+    tracemalloc.start()
+    try:
+        with timer.stage("hash"):
+            data_hash = data_sha256(data_path)
+        with timer.stage("load"):
+            X, y = load_training_data(data_path, chunksize)
+            if holdout_path is None:
+                X, x_holdout, y, y_holdout = split(X, y)
+            else:
+                x_holdout, y_holdout = load_training_data(holdout_path, chunksize)
+            base_sha = file_sha256(model_path)
+            base_metadata = load_metadata(model_path, base_sha)
+            pipeline = load_pipeline(model_path)
+            threshold = decision_threshold(model_path, base_sha)
+        with timer.stage("baseline"):
+            before = holdout_scores(y_holdout, pipeline.predict_proba(x_holdout)[:, 1], threshold)
+        with timer.stage("fit"):
+            trees_before = len(pipeline[-1].estimators_)
+            # New trees are seeded from the data, so rerunning an update reproduces it
+            retired = grow(pipeline, X, y, add, budget, policy, int(data_hash[:8], 16), n_jobs)
+        with timer.stage("evaluate"):
+            holdout_proba = pipeline.predict_proba(x_holdout)[:, 1]
+            after = holdout_scores(y_holdout, holdout_proba, threshold)
+    finally:
+        tracemalloc.stop()
+
+    failures = [f"{name} {before[name]:.4f} -> {after[name]:.4f}"
+                for name, tolerance in (("roc_auc", max_auc_drop), ("recall", max_recall_drop))
+                if after[name] < before[name] - tolerance]
+    stamp = datetime.now(timezone.utc)
+    report = {
+        "created_at": stamp.isoformat(timespec="seconds"),
+        "base_model_sha256": base_sha,
+        "data": {"path": repo_path(data_path), "sha256": data_hash, "rows": int(len(y)),
+                 "positives": int(y.sum())},
+        "holdout": {"path": repo_path(holdout_path or data_path), "rows": int(len(y_holdout)),
+                    "threshold": threshold, "before": before, "after": after},
+        "trees": {"before": trees_before, "added": add, "retired": len(retired),
+                  "after": len(pipeline[-1].estimators_)},
+        "policy": policy,
+        "retired": retired,
+        "accepted": not failures,
+        "failures": failures,
+        "training": timer.stages,
+    }
+    if failures:
+        return None, report
+
+    versions_dir.mkdir(parents=True, exist_ok=True)
+    path = versions_dir / f"{MODEL_PATH.stem}-{stamp:%Y%m%d-%H%M%S}.pkl"
+    joblib.dump(pipeline, path)
+    params = base_metadata.get("params")
+    update_metadata({
+        **base_metadata,
+        "created_at": report["created_at"],
+        **({"params": {**params, "n_estimators": report["trees"]["after"]}} if params else {}),
+        "training": timer.stages,
+        **refreshed_metrics(base_metadata, y_holdout, holdout_proba, threshold),
+        "evaluation": evaluation_entry(y_holdout, holdout_proba, threshold, "holdout",
+                                       holdout_path or data_path,
+                                       n_jobs=n_jobs if n_jobs > 0 else None),
+        "incremental": base_metadata.get("incremental", []) + [report],
+    }, path)
+    return path, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("data", help="cleaned CSV or feature store of newly labeled rows")
+    parser.add_argument("--holdout", default=None,
+                        help="rows to validate on (default: a stratified 20%% of DATA)")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH,
+                        help="pipeline to update (default: %(default)s)")
+    parser.add_argument("--add", type=int, default=DEFAULT_ADD,
+                        help="trees fitted on the new rows (default: %(default)s)")
+    parser.add_argument("--budget", type=int, default=None,
+                        help="trees kept at most (default: the current count)")
+    parser.add_argument("--retire", choices=POLICIES, default="oldest",
+                        help="trees dropped to stay within the budget (default: %(default)s)")
+    parser.add_argument("--max-auc-drop", type=float, default=MAX_AUC_DROP)
+    parser.add_argument("--max-recall-drop", type=float, default=MAX_RECALL_DROP)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--promote", action="store_true",
+                        help=f"install an accepted update as {MODEL_PATH.relative_to(ROOT)}")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    path, report = update(args.data, args.holdout, args.model, args.add, args.budget,
+                          args.retire, args.max_auc_drop, args.max_recall_drop,
+                          args.chunksize, args.n_jobs)
+    trees, holdout = report["trees"], report["holdout"]
+    print(f"{report['data']['rows']:,} new rows: {trees['before']} trees, "
+          f"+{trees['added']} -{trees['retired']} ({args.retire}) -> {trees['after']} "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(f"holdout ({holdout['rows']:,} rows, threshold {holdout['threshold']:.4f}):")
+    for name in ("roc_auc", "recall", "precision"):
+        print(f"  {name:<10} {holdout['before'][name]:.4f} -> {holdout['after'][name]:.4f}")
+    print(format_stages(report["training"]))
+    if path is None:
+        print("rejected: " + "; ".join(report["failures"]), file=sys.stderr)
+        sys.exit(1)
+    print(f"accepted -> {path}")
+    if args.promote:
+        promote(path, args.model)
+        print(f"Promoted to {args.model}")
+
+
+if __name__ == "__main__":
+    main()
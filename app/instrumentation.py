@@ -0,0 +1,216 @@
+"""
+Lightweight metrics for the prediction path, exported in Prometheus text format.
+
+Records, per process:
+
+* diabetes_stage_seconds{stage}: latency histogram of each prediction-path
+  stage (Streamlit rerun, BMI computation, array construction, cache
+  lookup, predict_proba, ...);
+* diabetes_batch_rows{source}: histogram of rows per model call;
+* diabetes_predictions_total{risk, model_version}: predictions by risk
+  band (probability >= threshold is "High");
+* diabetes_model_info{model_version}: the model versions seen;
+* gauges set by other modules with `set_gauge` (e.g. drift.py's PSI per input).
+
+Recording is off unless enabled (APP_METRICS=1, APP_METRICS_FILE set, or
+`metrics.enabled = True`). While off, `stage` returns one shared no-op
+context manager and the other calls return immediately, so instrumented code
+pays an attribute lookup and a branch.
+
+The text is served by service.py at GET /metrics, and can be written to a
+file (atomically, e.g. for node_exporter's textfile collector) once with
+`write` or every few seconds by the exporter thread that app.py starts when
+APP_METRICS_FILE is set.
+
+    from instrumentation import metrics
+    with metrics.stage("predict_proba"):
+        proba = model.predict_proba(X)
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+ENV_ENABLED = "APP_METRICS"
+ENV_FILE = "APP_METRICS_FILE"
+PREFIX = "diabetes"
+
+# Seconds; single predictions take ~0.05-5ms, batches up to seconds
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 16384, 65536, 262144)
+
+_NULL = nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a running sum, as Prometheus exposes it."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+class Metrics:
+    """Thread-safe per-process store of the prediction-path metrics."""
+
+    def __init__(self, enabled=None):
+        if enabled is None:
+            enabled = (os.environ.get(ENV_ENABLED, "") not in ("", "0")
+                       or bool(os.environ.get(ENV_FILE)))
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._batches = {}
+        self._predictions = {}
+        self._versions = set()
+        self._gauges = {}
+        self._exporter = None
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
+
+    def stage(self, name):
+        """Context manager timing one stage; a shared no-op while disabled."""
+        return self._timed(name) if self.enabled else _NULL
+
+    def observe_stage(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_batch(self, rows, source="scheduler"):
+        """Record one model call over `rows` rows, by caller."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._batches.get(source)
+            if histogram is None:
+                histogram = self._batches[source] = Histogram(SIZE_BUCKETS)
+            histogram.observe(rows)
+
+    def count_predictions(self, proba, threshold, model_version=None):
+        """Count predictions by risk band for a probability or array of probabilities."""
+        if not self.enabled:
+            return
+        if isinstance(proba, (int, float)):
+            high = int(proba >= threshold)
+            total = 1
+        else:
+            high = int((proba >= threshold).sum())
+            total = len(proba)
+        version = (model_version or "unknown")[:12]
+        with self._lock:
+            self._versions.add(version)
+            for risk, n in (("High", high), ("Low", total - high)):
+                if n:
+                    key = (risk, version)
+                    self._predictions[key] = self._predictions.get(key, 0) + n
+
+    def set_gauge(self, name, value, help_text, **labels):
+        """Set gauge `PREFIX_name` with `labels` to `value`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            _, series = self._gauges.setdefault(name, (help_text, {}))
+            series[tuple(labels.items())] = value
+
+    def render(self):
+        """Everything recorded so far in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, kind, text, series in (
+                ("stage_seconds", "histogram", "Latency of each prediction-path stage.",
+                 {("stage", k): h for k, h in self._stages.items()}),
+                ("batch_rows", "histogram", "Rows per model call.",
+                 {("source", k): h for k, h in self._batches.items()}),
+            ):
+                lines += [f"# HELP {PREFIX}_{name} {text}", f"# TYPE {PREFIX}_{name} {kind}"]
+                for (label, value), histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{PREFIX}_{name}_bucket"
+                                     f"{_labels(**{label: value}, le=bound)} {cumulative}")
+                    lines.append(f"{PREFIX}_{name}_sum{_labels(**{label: value})} "
+                                 f"{histogram.sum:.9g}")
+                    lines.append(f"{PREFIX}_{name}_count{_labels(**{label: value})} "
+                                 f"{cumulative}")
+
+            lines += [f"# HELP {PREFIX}_predictions_total Predictions by risk band.",
+                      f"# TYPE {PREFIX}_predictions_total counter"]
+            for (risk, version), count in sorted(self._predictions.items()):
+                lines.append(f"{PREFIX}_predictions_total"
+                             f"{_labels(risk=risk, model_version=version)} {count}")
+            lines += [f"# HELP {PREFIX}_model_info Model versions that served predictions.",
+                      f"# TYPE {PREFIX}_model_info gauge"]
+            for version in sorted(self._versions):
+                lines.append(f"{PREFIX}_model_info{_labels(model_version=version)} 1")
+            for name, (text, series) in sorted(self._gauges.items()):
+                lines += [f"# HELP {PREFIX}_{name} {text}", f"# TYPE {PREFIX}_{name} gauge"]
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{PREFIX}_{name}{_labels(**dict(labels))} {value:.9g}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write `render()` to `path` atomically."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(self.render())
+        os.replace(tmp, path)
+
+    def start_exporter(self, path, interval=15.0):
+        """Rewrite `path` every `interval` seconds from a daemon thread (once per process)."""
+        with self._lock:
+            if self._exporter is not None:
+                return
+            self._exporter = threading.Thread(target=self._export_loop, args=(path, interval),
+                                              name="metrics-exporter", daemon=True)
+        self._exporter.start()
+
+    def export_from_env(self, interval=15.0):
+        """Start the file exporter if APP_METRICS_FILE names a file."""
+        path = os.environ.get(ENV_FILE)
+        if path and self.enabled:
+            self.start_exporter(path, interval)
+
+    def _export_loop(self, path, interval):
+        while True:
+            self.write(path)
+            time.sleep(interval)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._batches.clear()
+            self._predictions.clear()
+            self._versions.clear()
+            self._gauges.clear()
+
+
+# Shared by every session and thread in the process
+metrics = Metrics()
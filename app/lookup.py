@@ -0,0 +1,227 @@
+"""
+Compile the forest into an interval-indexed probability lookup table.
+
+Every split in the forest compares one feature against a threshold, so the
+thresholds of each feature cut its axis into intervals and the forest's output
+is constant on every cell of the resulting 4-D grid. `compile_table` evaluates
+the forest once per cell and stores the positive-class probabilities in a .npy
+file that is memory-mapped at startup; a prediction is then four binary
+searches and one array read instead of 200 tree walks.
+
+Probabilities are exact: each cell is scored with FlatForest (bit-identical to
+sklearn) at a float32 point inside the cell, and lookups cast inputs to float32
+exactly as sklearn does before comparing them with the thresholds.
+
+Usage:
+    python app/lookup.py compile
+    python app/lookup.py verify --samples 200000
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from forest import FlatForest
+from scoring import FEATURES, MODEL_PATH, ROOT, ServingModel, file_sha256, load_pipeline
+
+
+def lookup_paths(model_path=MODEL_PATH):
+    """
+    The table and index compiled from a pipeline pickle, e.g.
+    model/diabetes_pipeline.lookup.npy and model/diabetes_pipeline.lookup.npz.
+    """
+    model_path = Path(model_path)
+    return model_path.with_suffix(".lookup.npy"), model_path.with_suffix(".lookup.npz")
+
+
+def float32_edges(split_values):
+    """
+    Thresholds snapped down to the largest float32 not above them, deduplicated.
+
+    Inputs are compared as float32, and for a float32 x, `x <= t` holds exactly
+    when `x <= edge(t)`; thresholds with no float32 between them collapse into
+    one edge, removing cells no input can reach.
+    """
+    edges = split_values.astype(np.float32)
+    edges = np.where(edges > split_values, np.nextafter(edges, np.float32(-np.inf)), edges)
+    return np.unique(edges).astype(np.float64)
+
+
+def cell_representatives(edges):
+    """One float32 value inside each of the len(edges) + 1 intervals."""
+    # Cell k holds x with edges[k-1] < x <= edges[k]; the edge itself is a
+    # float32 inside it. The last, open-ended cell gets the next float32 up.
+    last = np.nextafter(np.float32(edges[-1]), np.float32(np.inf))
+    return np.append(edges.astype(np.float32), last)
+
+
+class RiskTable:
+    """Positive-class probabilities indexed by the interval each feature falls in."""
+
+    def __init__(self, edges, table, model_sha256=None):
+        self.edges = edges
+        self.table = table
+        self.model_sha256 = model_sha256
+
+    @classmethod
+    def load(cls, table_path, index_path):
+        """Open a compiled table; the probability grid is memory-mapped, not read."""
+        with np.load(index_path) as index:
+            edges = [index[f"edges_{f}"] for f in range(len(FEATURES))]
+            model_sha256 = str(index["model_sha256"])
+        return cls(edges, np.load(table_path, mmap_mode="r"), model_sha256)
+
+    def cells(self, X):
+        """Cell index of every row along each feature axis."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        if np.isnan(X).any():
+            raise ValueError("The lookup table cannot score missing values")
+        X = X.astype(np.float64)
+        return tuple(np.searchsorted(edges, X[:, f]) for f, edges in enumerate(self.edges))
+
+    def positive_proba(self, X):
+        """
+        Positive-class probability for each row of X (Glucose, BMI, Age,
+        Pregnancies), shape (n,) rather than predict_proba's (n, 2).
+        """
+        return np.asarray(self.table[self.cells(X)])
+
+    def lookup(self, glucose, bmi, age, pregnancies):
+        """Probability for a single patient."""
+        return float(self.positive_proba([glucose, bmi, age, pregnancies])[0])
+
+
+def compile_table(model=None, table_path=None, index_path=None, model_path=MODEL_PATH,
+                  progress=None):
+    """
+    Evaluate the forest on every cell and write the table and its index
+    (default: next to `model_path`, see `lookup_paths`).
+
+    The table is filled one glucose interval at a time through a memory map,
+    so peak memory stays around one slice, and is moved into place only when
+    complete.
+    """
+    default_table, default_index = lookup_paths(model_path)
+    table_path = default_table if table_path is None else table_path
+    index_path = default_index if index_path is None else index_path
+    if model is None:
+        model = load_pipeline(model_path)
+    forest = FlatForest.from_sklearn(model)
+    if forest.feature_names != FEATURES:
+        raise ValueError(f"Expected features {FEATURES}, got {forest.feature_names}")
+
+    edges = [float32_edges(values) for values in forest.split_values]
+    reps = [cell_representatives(e) for e in edges]
+    shape = tuple(len(r) for r in reps)
+    rest = np.stack(np.meshgrid(*reps[1:], indexing="ij"), axis=-1).reshape(-1, len(reps) - 1)
+
+    tmp_path = f"{table_path}.tmp"
+    table = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float64, shape=shape)
+    for i, glucose in enumerate(reps[0]):
+        X = np.column_stack([np.full(len(rest), glucose, dtype=np.float32), rest])
+        table[i] = forest.predict_proba(X)[:, 1].reshape(shape[1:])
+        if progress is not None:
+            progress(i + 1, shape[0])
+    table.flush()
+    del table
+    os.replace(tmp_path, table_path)
+
+    np.savez(
+        index_path,
+        model_sha256=file_sha256(model_path),
+        **{f"edges_{f}": e for f, e in enumerate(edges)},
+    )
+    return RiskTable.load(table_path, index_path)
+
+
+def load_risk_table(model_path=MODEL_PATH, table_path=None, index_path=None):
+    """The compiled table for `model_path`, or None if missing or built from another model."""
+    default_table, default_index = lookup_paths(model_path)
+    table_path = default_table if table_path is None else table_path
+    index_path = default_index if index_path is None else index_path
+    if not (os.path.exists(table_path) and os.path.exists(index_path)):
+        return None
+    table = RiskTable.load(table_path, index_path)
+    if table.model_sha256 != file_sha256(model_path):
+        return None
+    return table
+
+
+def app_input_samples(n, seed=0):
+    """Random inputs on the app's grids: both BMI modes, full widget ranges."""
+    rng = np.random.default_rng(seed)
+    weight = rng.integers(2, 601, n) / 2.0
+    height = rng.integers(100, 501, n) / 2.0
+    bmi = np.where(
+        rng.random(n) < 0.5,
+        np.round(rng.integers(100, 701, n) / 10.0, 1),
+        np.round(weight / (height / 100.0) ** 2, 1),
+    )
+    return np.column_stack([
+        rng.integers(0, 301, n).astype(np.float64),
+        bmi,
+        rng.integers(0, 121, n).astype(np.float64),
+        rng.integers(0, 21, n).astype(np.float64),
+    ])
+
+
+def verify(table, model=None, samples=100_000, seed=0):
+    """
+    Compare the table with the live pipeline, scored sequentially.
+
+    Checks every row of data/clean_diabetes_data.csv, `samples` random app
+    inputs and the same number of random cell representatives. Returns the
+    number of rows checked and the number of mismatches (expected: 0).
+    """
+    import pandas as pd
+
+    if model is None:
+        model = load_pipeline()
+    live = ServingModel(model, n_jobs=1)
+
+    rng = np.random.default_rng(seed)
+    reps = [cell_representatives(edges) for edges in table.edges]
+    cells = np.column_stack([r[rng.integers(0, len(r), samples)] for r in reps])
+    data = pd.read_csv(ROOT / "data" / "clean_diabetes_data.csv", usecols=FEATURES)[FEATURES]
+    X = np.vstack([data.to_numpy(dtype=np.float64), app_input_samples(samples, seed), cells])
+
+    expected = live.predict_proba(pd.DataFrame(X, columns=FEATURES))[:, 1]
+    mismatches = int(np.count_nonzero(table.positive_proba(X) != expected))
+    return len(X), mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", choices=["compile", "verify"])
+    parser.add_argument("--model", default=MODEL_PATH, help="pipeline pickle (default: %(default)s)")
+    parser.add_argument("--samples", type=int, default=100_000,
+                        help="random inputs and random cells checked by verify")
+    args = parser.parse_args(argv)
+
+    if args.command == "compile":
+        start = time.perf_counter()
+
+        def report(done, total):
+            print(f"\r{done}/{total} glucose intervals", end="", flush=True)
+
+        table = compile_table(model_path=args.model, progress=report)
+        table_path, _ = lookup_paths(args.model)
+        size = os.path.getsize(table_path) / 1e6
+        print(f"\nWrote {table_path} {table.table.shape} ({size:,.0f} MB) "
+              f"in {time.perf_counter() - start:.1f}s")
+    else:
+        table = load_risk_table(args.model)
+        if table is None:
+            parser.exit(1, "No up-to-date lookup table; run `compile` first\n")
+        rows, mismatches = verify(table, load_pipeline(args.model), samples=args.samples)
+        print(f"Checked {rows:,} rows against the live pipeline: {mismatches:,} mismatches")
+        if mismatches:
+            parser.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Choose the decision threshold from the full precision / recall / cost curve.
+
+02_Modeling.ipynb (5.2a) re-scored the whole split and called the sklearn
+metric functions once per threshold on a 0.05 grid. Here the split is scored
+once and sorted once; cumulative sums over the sorted labels then give the
+confusion counts at every distinct probability, so the whole curve costs
+O(n log n) however fine the thresholds are.
+
+The chosen threshold is written to the model's metadata sidecar
+(model/diabetes_pipeline.json), which the app, service and batch scorer read
+in place of the THRESHOLD constant.
+
+Usage:
+    python app/operating_point.py                          # recall >= 0.85 on the test split
+    python app/operating_point.py --min-recall 0.9 --write
+    python app/operating_point.py --fn-cost 5 --fp-cost 1 --write
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from forest import FlatForest
+from scoring import MODEL_PATH, decision_threshold, load_pipeline, update_metadata
+from tuning import DATA_PATH, load_splits
+
+# Recall target from 02_Modeling.ipynb, 1.3
+DEFAULT_MIN_RECALL = 0.85
+
+
+def curve(y_true, proba, fn_cost=1.0, fp_cost=1.0):
+    """
+    Confusion counts and metrics at every distinct threshold.
+
+    Parameters:
+    -----------
+    y_true : Binary labels
+    proba : Positive-class probabilities for the same rows
+    fn_cost, fp_cost : Cost of one missed and one false alarm
+
+    Returns a DataFrame with one row per threshold t (predict positive when
+    proba >= t), in decreasing order of t, starting with t = inf (nobody
+    flagged): tp, fp, fn, tn, precision, recall, f1 and cost.
+    """
+    y_true = np.asarray(y_true).ravel().astype(bool)
+    proba = np.asarray(proba, dtype=np.float64).ravel()
+
+    order = np.argsort(-proba, kind="stable")
+    scores = proba[order]
+    true_positives = np.cumsum(y_true[order])
+    # Last row of each run of equal scores: everything up to it is flagged
+    last = np.flatnonzero(np.r_[scores[1:] != scores[:-1], True])
+
+    tp = np.r_[0, true_positives[last]]
+    flagged = np.r_[0, last + 1]
+    fp = flagged - tp
+    positives = int(true_positives[-1]) if len(true_positives) else 0
+    negatives = len(y_true) - positives
+    fn = positives - tp
+    tn = negatives - fp
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(flagged > 0, tp / flagged, 1.0)
+        recall = tp / positives if positives else np.zeros(len(tp))
+        f1 = np.where(tp > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+    return pd.DataFrame({
+        "threshold": np.r_[np.inf, scores[last]],
+        "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "cost": fn * fn_cost + fp * fp_cost,
+    })
+
+
+def at_thresholds(points, thresholds):
+    """Rows of `points` (from `curve`) in effect at arbitrary thresholds."""
+    ascending = points["threshold"].to_numpy()[::-1]
+    rows = len(points) - 1 - np.searchsorted(ascending, thresholds, side="left")
+    table = points.iloc[rows].copy()
+    table["threshold"] = thresholds
+    return table.reset_index(drop=True)
+
+
+def select(points, min_recall=None):
+    """
+    The operating point: with `min_recall`, the highest threshold that reaches
+    it (fewest patients flagged); otherwise the threshold of lowest cost,
+    preferring the higher one on ties.
+
+    Raises ValueError when no threshold reaches `min_recall`.
+    """
+    if min_recall is not None:
+        reached = points.index[points["recall"] >= min_recall]
+        if not len(reached):
+            raise ValueError(f"no threshold reaches recall {min_recall} "
+                             f"(at most {points['recall'].max():.3f} on these rows)")
+        return points.loc[reached[0]]
+    return points.iloc[int(np.argmin(points["cost"].to_numpy()))]
+
+
+def score_split(split="test", model_path=MODEL_PATH, data_path=DATA_PATH):
+    """Labels and positive-class probabilities for a split of the notebook's data."""
+    x_train, x_test, y_train, y_test = load_splits(data_path)
+    X, y = {
+        "train": (x_train, y_train),
+        "test": (x_test, y_test),
+        "all": (np.vstack([x_train, x_test]), np.r_[y_train, y_test]),
+    }[split]
+    forest = FlatForest.from_sklearn(load_pipeline(model_path))
+    return y, forest.predict_proba(X)[:, 1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--data", default=DATA_PATH,
+                        help="cleaned CSV or feature store to split")
+    parser.add_argument("--split", choices=("test", "train", "all"), default="test")
+    criterion = parser.add_mutually_exclusive_group()
+    criterion.add_argument("--min-recall", type=float, default=None,
+                           help=f"recall target (default: {DEFAULT_MIN_RECALL})")
+    criterion.add_argument("--fn-cost", type=float, default=None,
+                           help="minimize fn_cost * missed + fp_cost * false alarms instead")
+    parser.add_argument("--fp-cost", type=float, default=1.0)
+    parser.add_argument("--write", action="store_true",
+                        help="record the threshold in the model's metadata sidecar")
+    args = parser.parse_args(argv)
+
+    if args.fn_cost is None:
+        min_recall = DEFAULT_MIN_RECALL if args.min_recall is None else args.min_recall
+        fn_cost, spec = 1.0, {"min_recall": min_recall}
+    else:
+        min_recall, fn_cost = None, args.fn_cost
+        spec = {"fn_cost": fn_cost, "fp_cost": args.fp_cost}
+
+    y, proba = score_split(args.split, args.model, args.data)
+    points = curve(y, proba, fn_cost=fn_cost, fp_cost=args.fp_cost)
+
+    grid = at_thresholds(points, np.round(np.arange(0.2, 0.8, 0.05), 2))
+    for row in grid.itertuples():
+        print(f"Threshold: {row.threshold:.2f} | Recall: {row.recall:.3f} | "
+              f"Precision: {row.precision:.3f} | F1: {row.f1:.3f}")
+
+    try:
+        chosen = select(points, min_recall)
+    except ValueError as exc:
+        parser.error(f"--min-recall: {exc}")
+    print(f"\n{len(points) - 1} distinct thresholds on {len(y)} {args.split} rows; "
+          f"current threshold {decision_threshold(args.model):.4f}")
+    print(f"chosen {chosen.threshold:.4f}: recall {chosen.recall:.3f}, "
+          f"precision {chosen.precision:.3f}, F1 {chosen.f1:.3f}, "
+          f"{int(chosen.fn)} missed, {int(chosen.fp)} false alarms")
+
+    if args.write:
+        if not np.isfinite(chosen.threshold):
+            # The leading t = inf row flags nobody, and JSON has no infinity
+            parser.error("the chosen operating point flags nobody; not writing it")
+        update_metadata({"operating_point": {
+            "threshold": float(chosen.threshold),
+            "criterion": spec,
+            "split": args.split,
+            "rows": int(len(y)),
+            "recall": float(chosen.recall),
+            "precision": float(chosen.precision),
+            "f1": float(chosen.f1),
+        }}, args.model)
+        print(f"written to the metadata of {args.model}")
+
+
+if __name__ == "__main__":
+    main()
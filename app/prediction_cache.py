@@ -0,0 +1,135 @@
+"""
+Bounded LRU/TTL cache of predictions, keyed on the normalized inputs.
+
+The inputs the app and service accept sit on small grids (whole-number age
+and pregnancies, BMI rounded to 0.1, glucose in steps of 1), and users
+resubmit the same values, e.g. after switching between weight & height and
+direct BMI entry. A row is normalized to the float32 values the trees compare,
+so inputs that must score the same share one entry, and only misses reach
+the model.
+
+Entries belong to one model version (the artifact's SHA-256 from the
+registry): the first lookup under a new version drops the whole cache, so a
+retrained model never answers from the old one's results.
+
+    from prediction_cache import cache
+    proba = cache.positive_proba(rows, registry.version(), score)
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from instrumentation import metrics
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_TTL = 3600.0
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU map from normalized input rows to probabilities.
+
+    Parameters:
+    -----------
+    maxsize : Entries kept; the least recently used one is evicted beyond it
+    ttl : Seconds an entry stays valid (None: until evicted or invalidated)
+    clock : Monotonic time source, replaceable for tests
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self._counts = dict.fromkeys(
+            ("hits", "misses", "evictions", "expirations", "invalidations"), 0)
+
+    @staticmethod
+    def keys(rows):
+        """One hashable key per row: its four features as the float32 values the trees see."""
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, 4)
+        return [tuple(row) for row in rows.astype(np.float32).tolist()]
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self._counts["invalidations"] += 1
+            self._entries.clear()
+            self._version = version
+
+    def get_many(self, keys, version):
+        """Cached probabilities for `keys` under `version`, None for each miss."""
+        now = self._clock()
+        found = []
+        with self._lock:
+            self._check_version(version)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] is not None and entry[1] <= now:
+                    del self._entries[key]
+                    self._counts["expirations"] += 1
+                    entry = None
+                if entry is None:
+                    self._counts["misses"] += 1
+                    found.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self._counts["hits"] += 1
+                    found.append(entry[0])
+        return found
+
+    def put_many(self, keys, values, version):
+        """Store probabilities computed by `version`, evicting the least recently used."""
+        expires = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            if version != self._version:
+                # The model changed while these were being scored
+                return
+            for key, value in zip(keys, values):
+                self._entries[key] = (float(value), expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counts["evictions"] += 1
+
+    def positive_proba(self, rows, version, score):
+        """
+        Positive-class probabilities for `rows`, calling `score` only on the misses.
+
+        `score` receives an (m, 4) float64 array of the missing rows (each
+        distinct key once) and returns their probabilities.
+        """
+        with metrics.stage("array"):
+            keys = self.keys(rows)
+        with metrics.stage("cache_lookup"):
+            found = self.get_many(keys, version)
+        missing = list(dict.fromkeys(k for k, p in zip(keys, found) if p is None))
+        if missing:
+            scored = dict(zip(missing, np.asarray(score(np.array(missing, dtype=np.float64)))))
+            self.put_many(scored, scored.values(), version)
+            found = [scored[k] if p is None else p for k, p in zip(keys, found)]
+        return np.array(found, dtype=np.float64)
+
+    def stats(self):
+        """Entry count, capacity, hit rate and the hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self._counts["hits"] + self._counts["misses"]
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                **self._counts,
+                "hit_rate": self._counts["hits"] / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every session in the process
+cache = PredictionCache()
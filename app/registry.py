@@ -0,0 +1,103 @@
+"""
+Process-wide model registry.
+
+Streamlit re-executes app.py on every widget interaction and for every
+session, but imported modules stay loaded for the life of the process. The
+registry below therefore loads each model artifact once per process and hands
+the same object to every rerun and session.
+
+An artifact is reloaded only when its content hash changes. Checking the hash
+on every call would mean reading the file each time, so the file's size and
+modification time are compared first and the file is hashed only when those
+change (e.g. after a retrain replaced it).
+
+The model itself is loaded on the first `get`: `version` and `derived` only
+need the hash, so a caller that serves from something derived from the
+artifact (the exported flat forest, the lookup table) never unpickles it.
+"""
+import os
+import threading
+from pathlib import Path
+
+from scoring import MODEL_PATH, file_sha256, load_serving_model
+
+
+class _Entry:
+    def __init__(self, stat_key, sha256):
+        self.stat_key = stat_key
+        self.sha256 = sha256
+        self.model = None
+        self.derived = {}
+
+
+class ModelRegistry:
+    """
+    Load-once cache of model artifacts keyed by path.
+
+    Reads are lock-free when the artifact is unchanged; loading and reloading
+    happen under a lock so concurrent sessions never load the same file twice.
+    Objects derived from a model (see `derived`) are dropped when it reloads.
+    """
+
+    def __init__(self, loader=load_serving_model):
+        self._loader = loader
+        # Reentrant: a `derived` build may itself need `get` or `version`
+        self._lock = threading.RLock()
+        self._entries = {}
+
+    def _entry(self, path):
+        path = Path(path).resolve()
+        stat = os.stat(path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self._entries.get(path)
+        if entry is not None and entry.stat_key == stat_key:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.stat_key == stat_key:
+                return entry
+            sha256 = file_sha256(path)
+            if entry is not None and entry.sha256 == sha256:
+                # Touched or copied over with identical content: keep the model
+                entry.stat_key = stat_key
+                return entry
+            entry = _Entry(stat_key, sha256)
+            self._entries[path] = entry
+            return entry
+
+    def get(self, path=MODEL_PATH):
+        """The loaded model for `path`, reloading it if the file's content changed."""
+        entry = self._entry(path)
+        if entry.model is None:
+            with self._lock:
+                if entry.model is None:
+                    entry.model = self._loader(Path(path).resolve())
+        return entry.model
+
+    def version(self, path=MODEL_PATH):
+        """SHA-256 of the current artifact (without loading the model)."""
+        return self._entry(path).sha256
+
+    def derived(self, name, build, path=MODEL_PATH):
+        """
+        An object built from the model at `path`, cached until the model changes.
+
+        `build(path)` is called at most once per model version, e.g. to open
+        a lookup table compiled from it.
+        """
+        entry = self._entry(path)
+        if name not in entry.derived:
+            with self._lock:
+                if name not in entry.derived:
+                    entry.derived[name] = build(path)
+        return entry.derived[name]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every session in the process
+registry = ModelRegistry()
@@ -0,0 +1,140 @@
+"""
+Shared scoring helpers for the Streamlit app and the command-line tools.
+
+Everything that must stay identical between the interactive app and offline
+scoring (feature order, decision threshold, model location) lives here.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+MODEL_PATH = ROOT / "model" / "diabetes_pipeline.pkl"
+
+# Column order the pipeline was fitted on (02_Modeling.ipynb, 1.3a)
+FEATURES = ["Glucose", "BMI", "Age", "Pregnancies"]
+
+# Decision threshold chosen in 02_Modeling.ipynb, 5.1b. Used unless the
+# model's metadata sidecar holds an operating point (see operating_point.py).
+THRESHOLD = 0.35
+
+# Batches at least this large are spread over joblib worker threads; smaller
+# ones (every interactive prediction) are scored sequentially.
+PARALLEL_MIN_ROWS = 10_000
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file, used to tie derived artifacts to the model they came from."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def repo_path(path):
+    """`path` relative to the repository root for metadata, or as given when outside it."""
+    try:
+        return Path(path).resolve().relative_to(ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def metadata_path(model_path=MODEL_PATH):
+    """The JSON sidecar next to a model artifact, e.g. model/diabetes_pipeline.json."""
+    return Path(model_path).with_suffix(".json")
+
+
+def load_metadata(model_path=MODEL_PATH, model_sha256=None):
+    """
+    The model's metadata sidecar as a dict.
+
+    Returns {} when there is no sidecar or it was written for a different
+    model file. Pass `model_sha256` when the hash is already known (e.g. from
+    the registry) to skip re-hashing the model.
+    """
+    try:
+        metadata = json.loads(metadata_path(model_path).read_text())
+    except FileNotFoundError:
+        return {}
+    if model_sha256 is None:
+        model_sha256 = file_sha256(model_path)
+    if metadata.get("model_sha256") != model_sha256:
+        return {}
+    return metadata
+
+
+def update_metadata(updates, model_path=MODEL_PATH):
+    """Merge `updates` into the model's sidecar, replacing the file atomically."""
+    metadata = load_metadata(model_path)
+    metadata.update(updates)
+    metadata["model_sha256"] = file_sha256(model_path)
+    path = metadata_path(model_path)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(metadata, indent=2) + "\n")
+    os.replace(tmp, path)
+    return metadata
+
+
+def decision_threshold(model_path=MODEL_PATH, model_sha256=None):
+    """The operating-point threshold recorded for the model, or THRESHOLD."""
+    operating_point = load_metadata(model_path, model_sha256).get("operating_point", {})
+    return float(operating_point.get("threshold", THRESHOLD))
+
+
+def load_pipeline(path=MODEL_PATH):
+    """Load the pickled sklearn pipeline."""
+    # Imported here so the NumPy-only paths (forest.py artifacts) skip joblib
+    import joblib
+
+    return joblib.load(path)
+
+
+class ServingModel:
+    """
+    Wrap a fitted pipeline so each call picks its own parallelism.
+
+    The forest was trained with n_jobs=-1, which makes even a single-row
+    predict_proba start a thread pool across every core. Here the forest's
+    n_jobs is cleared so it follows the active joblib configuration:
+    sequential by default, and `n_jobs` worker threads only for batches of at
+    least `parallel_min_rows` rows. joblib's configuration is thread-local, so
+    concurrent callers do not affect each other.
+    """
+
+    def __init__(self, pipeline, n_jobs=-1, parallel_min_rows=PARALLEL_MIN_ROWS):
+        self.pipeline = pipeline
+        self.n_jobs = n_jobs
+        self.parallel_min_rows = parallel_min_rows
+        pipeline.steps[-1][1].n_jobs = None
+
+    def predict_proba(self, X):
+        if len(X) >= self.parallel_min_rows:
+            import joblib
+
+            with joblib.parallel_config(n_jobs=self.n_jobs):
+                return self.pipeline.predict_proba(X)
+        return self.pipeline.predict_proba(X)
+
+    def predict(self, X, threshold=THRESHOLD):
+        return (self.predict_proba(X)[:, 1] >= threshold).astype(int)
+
+
+def load_serving_model(path=MODEL_PATH, n_jobs=-1, parallel_min_rows=PARALLEL_MIN_ROWS):
+    """Load the pipeline wrapped in a ServingModel (see its docstring)."""
+    return ServingModel(load_pipeline(path), n_jobs=n_jobs, parallel_min_rows=parallel_min_rows)
+
+
+def compute_bmi(weight_kg, height_cm):
+    """BMI rounded to 0.1, as the app computes it from weight and height."""
+    height_m = height_cm / 100.0
+    return round(weight_kg / (height_m ** 2), 1)
+
+
+def risk_labels(proba, threshold=THRESHOLD):
+    """Map positive-class probabilities to "High" / "Low" risk labels."""
+    # Imported here so app.py can draw its page before NumPy is loaded
+    import numpy as np
+
+    return np.where(proba >= threshold, "High", "Low")
@@ -0,0 +1,343 @@
+"""
+HTTP/JSON prediction service alongside the Streamlit UI.
+
+Serves the same glucose / BMI / age / pregnancies -> probability / risk logic
+as app.py, including the weight & height -> BMI conversion, to programs that
+cannot click "Analyze My Risk". Built on asyncio streams only:
+
+* HTTP/1.1 keep-alive, so clients can reuse one connection for many requests.
+* Micro-batching through batching.BatchScheduler: requests that arrive while
+  the previous batch is being scored (optionally held open for
+  `--max-wait-ms`, up to `--max-batch` rows) are scored together in one
+  vectorized forest call, off the event loop.
+* A prediction cache (prediction_cache.py) in front of the scheduler: rows
+  already scored by the current model version are answered without it.
+
+Endpoints:
+    GET  /health          -> {"status": "ok", "model_sha256": ...}
+    GET  /stats           -> queue depth, batch-size histogram, wait times, cache counters
+    GET  /metrics         -> stage latencies, batch sizes, predictions by risk band
+                             (Prometheus text format, see instrumentation.py)
+    GET  /drift           -> live inputs compared with the training data (see drift.py)
+    GET  /shadow          -> candidate models compared with the primary (see shadow.py)
+    POST /predict         {"glucose": 120, "bmi": 31.2, "age": 45, "pregnancies": 2}
+                          or "weight_kg" and "height_cm" in place of "bmi"
+    POST /predict/batch   {"patients": [{...}, {...}]}
+
+Usage:
+    python app/service.py --port 8080
+    python app/service.py --shadow retrained=model/versions/diabetes_pipeline-20261018.pkl
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+import traceback
+from http import HTTPStatus
+
+import numpy as np
+
+from batching import BatchScheduler, score_current_model
+from drift import monitor
+from instrumentation import metrics
+from prediction_cache import DEFAULT_MAXSIZE, DEFAULT_TTL, PredictionCache
+from registry import registry
+from scoring import compute_bmi, decision_threshold, metadata_path
+from shadow import parse_candidates, shadow
+
+MAX_BODY_BYTES = 1 << 20
+MAX_HEADER_BYTES = 16 << 10
+
+# Same bounds as the inputs in app.py
+LIMITS = {
+    "glucose": (0.0, 300.0),
+    "bmi": (10.0, 70.0),
+    "weight_kg": (1.0, 300.0),
+    "height_cm": (50.0, 250.0),
+    "age": (0, 120),
+    "pregnancies": (0, 20),
+}
+
+
+class BadRequest(ValueError):
+    """Raised for request bodies that cannot be scored; answered with HTTP 400."""
+
+
+def _number(patient, name, integer=False):
+    if name not in patient:
+        raise BadRequest(f"missing field '{name}'")
+    value = patient[name]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise BadRequest(f"'{name}' must be a number")
+    low, high = LIMITS[name]
+    # Range first: NaN, Infinity and 1e400 parse as floats that int() cannot take
+    if not math.isfinite(value) or not low <= value <= high:
+        raise BadRequest(f"'{name}' must be between {low} and {high}")
+    if integer and value != int(value):
+        raise BadRequest(f"'{name}' must be a whole number")
+    return float(value)
+
+
+def parse_patient(patient):
+    """Validate one patient record and return its model row and BMI."""
+    if not isinstance(patient, dict):
+        raise BadRequest("each patient must be a JSON object")
+    if "bmi" in patient:
+        bmi = round(_number(patient, "bmi"), 1)
+    elif "weight_kg" in patient or "height_cm" in patient:
+        bmi = compute_bmi(_number(patient, "weight_kg"), _number(patient, "height_cm"))
+    else:
+        raise BadRequest("provide either 'bmi' or 'weight_kg' and 'height_cm'")
+    row = [
+        _number(patient, "glucose"),
+        bmi,
+        _number(patient, "age", integer=True),
+        _number(patient, "pregnancies", integer=True),
+    ]
+    return row, bmi
+
+
+def _result(probability, bmi, threshold):
+    return {
+        "probability": float(probability),
+        "risk": "High" if probability >= threshold else "Low",
+        "bmi": bmi,
+        "threshold": threshold,
+    }
+
+
+class PredictionService:
+    """Route parsed HTTP requests to the micro-batched model."""
+
+    def __init__(self, scheduler, cache=None):
+        self.scheduler = scheduler
+        self.cache = cache
+        # Decision threshold by model version and sidecar mtime, so a promoted model
+        # brings its own and `operating_point.py --write` takes effect without a restart
+        self._thresholds = {}
+
+    def threshold(self, version):
+        """The decision threshold recorded for model `version`, read once per sidecar write."""
+        try:
+            key = (version, metadata_path().stat().st_mtime_ns)
+        except FileNotFoundError:
+            key = (version, None)
+        if key not in self._thresholds:
+            self._thresholds = {key: decision_threshold(model_sha256=version)}
+        return self._thresholds[key]
+
+    async def handle(self, method, path, body):
+        """Return (status, payload) for one request."""
+        if path in ("/health", "/stats", "/metrics", "/drift", "/shadow"):
+            if method != "GET":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use GET"}
+            if path == "/metrics":
+                return HTTPStatus.OK, metrics.render()
+            if path == "/drift":
+                return HTTPStatus.OK, monitor.report()
+            if path == "/shadow":
+                return HTTPStatus.OK, shadow.stats()
+            if path == "/stats":
+                stats = self.scheduler.stats()
+                if self.cache is not None:
+                    stats["cache"] = self.cache.stats()
+                return HTTPStatus.OK, stats
+            return HTTPStatus.OK, {"status": "ok", "model_sha256": registry.version()}
+        if path not in ("/predict", "/predict/batch"):
+            return HTTPStatus.NOT_FOUND, {"error": f"no route for {path}"}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}
+
+        try:
+            with metrics.stage("parse"):
+                parsed = self._parse(path, body)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return HTTPStatus.BAD_REQUEST, {"error": "body is not valid JSON"}
+        except BadRequest as exc:
+            return HTTPStatus.BAD_REQUEST, {"error": str(exc)}
+
+        if not parsed:
+            return HTTPStatus.OK, {"results": []}
+        with metrics.stage("array"):
+            rows = np.array([row for row, _ in parsed], dtype=np.float64)
+        version = registry.version()
+        start = time.perf_counter()
+        try:
+            with metrics.stage("predict"):
+                proba = await self._predict_proba(rows, version)
+        except Exception:
+            # Answer the client instead of dropping the connection mid-request
+            traceback.print_exc(file=sys.stderr)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "prediction failed"}
+        seconds = time.perf_counter() - start
+        threshold = self.threshold(version)
+        metrics.count_predictions(np.asarray(proba), threshold, version)
+        monitor.observe(rows, proba, version)
+        shadow.submit(rows, proba, threshold, seconds)
+        results = [_result(p, bmi, threshold) for p, (_, bmi) in zip(proba, parsed)]
+        if path == "/predict":
+            return HTTPStatus.OK, results[0]
+        return HTTPStatus.OK, {"results": results}
+
+    @staticmethod
+    def _parse(path, body):
+        payload = json.loads(body or b"null")
+        if path == "/predict":
+            patients = [payload]
+        elif isinstance(payload, dict) and isinstance(payload.get("patients"), list):
+            patients = payload["patients"]
+        else:
+            raise BadRequest("expected {\"patients\": [...]}")
+        parsed = []
+        for i, patient in enumerate(patients):
+            try:
+                parsed.append(parse_patient(patient))
+            except BadRequest as exc:
+                if len(patients) > 1:
+                    raise BadRequest(f"patient {i}: {exc}") from None
+                raise
+        return parsed
+
+    async def _predict_proba(self, rows, version):
+        if self.cache is None:
+            return await asyncio.wrap_future(self.scheduler.submit(rows))
+        keys = self.cache.keys(rows)
+        with metrics.stage("cache_lookup"):
+            found = self.cache.get_many(keys, version)
+        missing = list(dict.fromkeys(k for k, p in zip(keys, found) if p is None))
+        if not missing:
+            return found
+        scored = await asyncio.wrap_future(
+            self.scheduler.submit(np.array(missing, dtype=np.float64)))
+        self.cache.put_many(missing, scored, version)
+        scored = dict(zip(missing, scored))
+        return [scored[k] if p is None else p for k, p in zip(keys, found)]
+
+    async def serve_connection(self, reader, writer):
+        """Answer requests on one connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                        {"error": "headers too large"}, keep_alive=False)
+                    break
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, path, version = request_line.split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST,
+                                        {"error": "malformed request line"}, keep_alive=False)
+                    break
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = (connection != "close" if version == "HTTP/1.1"
+                              else connection == "keep-alive")
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {"error": f"body must be at most {MAX_BODY_BYTES} bytes"},
+                                        keep_alive=False)
+                    break
+                try:
+                    body = await reader.readexactly(length)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                status, payload = await self.handle(method, path.split("?", 1)[0], body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body, content_type = json.dumps(payload).encode(), "application/json"
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8080, max_batch=256, max_wait_ms=0.0,
+                cache_size=DEFAULT_MAXSIZE, cache_ttl=DEFAULT_TTL):
+    # Load the model before accepting connections so the first request is fast
+    score_current_model(np.zeros((1, 4)))
+    scheduler = BatchScheduler(max_batch=max_batch, max_wait_ms=max_wait_ms)
+    cache = PredictionCache(cache_size, cache_ttl) if cache_size > 0 else None
+    service = PredictionService(scheduler, cache)
+    server = await asyncio.start_server(service.serve_connection, host, port,
+                                        limit=MAX_HEADER_BYTES)
+    print(f"Serving predictions on http://{host}:{port} "
+          f"(batches of up to {max_batch} rows, {max_wait_ms}ms wait, "
+          f"threshold {service.threshold(registry.version())})", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        scheduler.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="rows that trigger an immediate batch (default: %(default)s)")
+    parser.add_argument("--max-wait-ms", type=float, default=0.0,
+                        help="extra time a batch is held open for more requests "
+                             "(default: %(default)s, score as soon as the worker is free)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAXSIZE,
+                        help="predictions kept in the LRU cache, 0 to disable "
+                             "(default: %(default)s)")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL,
+                        help="seconds a cached prediction stays valid (default: %(default)s)")
+    parser.add_argument("--no-metrics", action="store_true",
+                        help="do not record the metrics served at GET /metrics")
+    parser.add_argument("--drift-window", type=int, default=monitor.window,
+                        help="rows per drift comparison with the training data "
+                             "(default: %(default)s)")
+    parser.add_argument("--shadow", action="append", default=[], metavar="NAME=PATH",
+                        help="also score every request with the model at PATH, off the "
+                             "request path, and compare it at GET /shadow (repeatable)")
+    args = parser.parse_args(argv)
+    metrics.enabled = not args.no_metrics
+    monitor.window = args.drift_window
+    try:
+        candidates = parse_candidates(",".join(args.shadow))
+    except ValueError as exc:
+        parser.error(f"--shadow: {exc}")
+    for name, path in candidates.items():
+        shadow.add(name, path)
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms,
+                          args.cache_size, args.cache_ttl))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Shadow scoring of candidate models next to the production pipeline.
+
+Every prediction is answered by the primary model (model/diabetes_pipeline.pkl)
+as before. Afterwards its rows and probabilities are handed to `shadow`, which
+scores them with each candidate model on background worker threads and
+records, per candidate:
+
+* label disagreements at the decision threshold, overall and for rows whose
+  primary probability lies within `band` of it, where flips matter most;
+* probability deltas (candidate - primary): mean, mean absolute, percentiles;
+* scoring latency percentiles, next to the primary's.
+
+The primary path never waits for a candidate: `submit` copies the rows into a
+bounded queue without blocking and returns. When the queue is full the rows
+are dropped (counted in `dropped`), and rows that waited longer than
+`max_age_ms` are skipped (`stale`), so a slow candidate loses samples instead
+of building a backlog. Candidates are scored with their flat forests from the
+registry (exported artifact, else flattened from the pickle), loaded once per
+candidate version.
+
+Candidates come from APP_SHADOW_MODELS ("name=path,name=path") or `add`, and
+the service's --shadow flag; results are at the service's GET /shadow and
+exported as gauges in instrumentation.py.
+
+Usage:
+    APP_SHADOW_MODELS=retrained=model/versions/diabetes_pipeline-20261018.pkl \\
+        streamlit run app/app.py
+    python app/service.py --shadow retrained=model/versions/diabetes_pipeline-20261018.pkl
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+from batching import score_current_model
+from instrumentation import metrics
+from scoring import THRESHOLD
+
+ENV_VAR = "APP_SHADOW_MODELS"
+DEFAULT_BAND = 0.05
+MAX_PENDING = 1024
+MAX_AGE_MS = 1000.0
+
+# Latencies and deltas kept per model for percentiles; older ones are dropped
+SAMPLES = 10_000
+
+
+def parse_candidates(spec):
+    """{name: path} from "name=path,name=path"."""
+    candidates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, sep, path = item.partition("=")
+        if not sep or not name or not path:
+            raise ValueError(f"expected name=path, got {item!r}")
+        candidates[name.strip()] = Path(path.strip())
+    return candidates
+
+
+def _percentiles(values, scale=1.0):
+    values = np.asarray(values, dtype=np.float64) * scale
+    return {f"p{q}": float(np.percentile(values, q)) if len(values) else 0.0
+            for q in (50, 90, 99)}
+
+
+class _CandidateStats:
+    def __init__(self):
+        self.requests = 0
+        self.rows = 0
+        self.disagreements = 0
+        self.band_rows = 0
+        self.band_disagreements = 0
+        self.delta_sum = 0.0
+        self.abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        self.errors = 0
+        self.last_error = None
+        self.latencies = deque(maxlen=SAMPLES)
+        self.abs_deltas = deque(maxlen=SAMPLES)
+
+    def summary(self):
+        rows = self.rows or 1
+        return {
+            "requests": self.requests,
+            "rows": self.rows,
+            "disagreement_rate": self.disagreements / rows,
+            "band_rows": self.band_rows,
+            "band_disagreement_rate": (self.band_disagreements / self.band_rows
+                                       if self.band_rows else 0.0),
+            "mean_delta": self.delta_sum / rows,
+            "mean_abs_delta": self.abs_delta_sum / rows,
+            "max_abs_delta": self.max_abs_delta,
+            "abs_delta": _percentiles(self.abs_deltas),
+            "latency_ms": _percentiles(self.latencies, 1e3),
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+class ShadowScorer:
+    """
+    Score candidate models off the request path and compare them with the primary.
+
+    Parameters:
+    -----------
+    candidates : {name: model path}
+    workers : Background threads scoring the candidates
+    max_pending : Submissions queued at most; further ones are dropped
+    max_age_ms : Submissions older than this when picked up are skipped
+    band : Half-width of the band around the threshold for `band_disagreement_rate`
+    score : Callable mapping (rows, model path) to probabilities
+    """
+
+    def __init__(self, candidates=None, workers=1, max_pending=MAX_PENDING,
+                 max_age_ms=MAX_AGE_MS, band=DEFAULT_BAND, score=score_current_model):
+        self.workers = workers
+        self.max_age = max_age_ms / 1000.0
+        self.band = band
+        self._score = score
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._candidates = {}
+        self._stats = {}
+        self._primary_latencies = deque(maxlen=SAMPLES)
+        self._submitted = 0
+        self._dropped = 0
+        self._stale = 0
+        for name, path in (candidates or {}).items():
+            self.add(name, path)
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        return cls(parse_candidates(os.environ.get(ENV_VAR, "")), **kwargs)
+
+    def add(self, name, path):
+        """Shadow-score `path` as candidate `name` from now on."""
+        with self._lock:
+            self._candidates[name] = Path(path)
+            self._stats.setdefault(name, _CandidateStats())
+
+    @property
+    def active(self):
+        return bool(self._candidates)
+
+    def submit(self, rows, proba, threshold=THRESHOLD, primary_seconds=None):
+        """
+        Queue rows the primary scored as `proba` for every candidate; never blocks.
+
+        Returns False if the rows were dropped because the queue is full.
+        """
+        if not self._candidates:
+            return False
+        # Copies, so the caller may reuse its arrays
+        job = (np.array(rows, dtype=np.float64, ndmin=2),
+               np.array(proba, dtype=np.float64, ndmin=1), threshold, time.perf_counter())
+        with self._lock:
+            if primary_seconds is not None:
+                self._primary_latencies.append(primary_seconds)
+            if len(self._threads) < self.workers:
+                self._start_workers()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self._dropped += 1
+                return False
+            self._submitted += 1
+        return True
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, name=f"shadow-{len(self._threads)}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            rows, primary, threshold, queued = self._queue.get()
+            try:
+                if time.perf_counter() - queued > self.max_age:
+                    with self._lock:
+                        self._stale += 1
+                    continue
+                with self._lock:
+                    candidates = dict(self._candidates)
+                for name, path in candidates.items():
+                    self._compare(name, path, rows, primary, threshold)
+            finally:
+                self._queue.task_done()
+
+    def _compare(self, name, path, rows, primary, threshold):
+        start = time.perf_counter()
+        try:
+            proba = np.asarray(self._score(rows, path), dtype=np.float64)
+        except Exception as exc:
+            with self._lock:
+                self._stats[name].errors += 1
+                self._stats[name].last_error = f"{type(exc).__name__}: {exc}"
+            return
+        seconds = time.perf_counter() - start
+        delta = proba - primary
+        flipped = (proba >= threshold) != (primary >= threshold)
+        near = np.abs(primary - threshold) <= self.band
+        with self._lock:
+            stats = self._stats[name]
+            # The first call also loaded the candidate
+            warm = stats.requests > 0
+            if warm:
+                stats.latencies.append(seconds)
+            stats.requests += 1
+            stats.rows += len(rows)
+            stats.disagreements += int(flipped.sum())
+            stats.band_rows += int(near.sum())
+            stats.band_disagreements += int((flipped & near).sum())
+            stats.delta_sum += float(delta.sum())
+            stats.abs_delta_sum += float(np.abs(delta).sum())
+            stats.max_abs_delta = max(stats.max_abs_delta, float(np.abs(delta).max()))
+            stats.abs_deltas.extend(np.abs(delta).tolist())
+            rate = stats.disagreements / stats.rows
+        if warm:
+            metrics.observe_stage(f"shadow:{name}", seconds)
+        metrics.set_gauge("shadow_disagreement_rate", rate,
+                          "Share of rows a candidate labels differently from the primary.",
+                          model=name)
+
+    def stats(self):
+        """Queue counters, the primary's latency and every candidate's comparison."""
+        with self._lock:
+            return {
+                "submitted": self._submitted,
+                "dropped": self._dropped,
+                "stale": self._stale,
+                "pending": self._queue.qsize(),
+                "band": self.band,
+                "primary": {"latency_ms": _percentiles(self._primary_latencies, 1e3)},
+                "candidates": {name: {"path": str(self._candidates[name]), **stats.summary()}
+                               for name, stats in self._stats.items()},
+            }
+
+    def join(self, timeout=10.0):
+        """Wait until everything queued has been scored (for tests and tools)."""
+        deadline = time.perf_counter() + timeout
+        while self._queue.unfinished_tasks and time.perf_counter() < deadline:
+            time.sleep(0.001)
+
+
+# Shared by every session in the process; workers start on the first submission
+shadow = ShadowScorer.from_env()
@@ -0,0 +1,66 @@
+"""
+Startup profiling for the Streamlit app.
+
+app.py marks its imports, its first page render and its first prediction
+(which loads the model) as stages. Each stage is timed the first time it runs in the
+process (later reruns hit warm module and model caches and are not
+recorded), so the stages add up to what a freshly started pod spends before
+the page appears and before its first prediction.
+
+Set APP_PROFILE=1 to print each stage to stderr as it completes.
+
+Usage:
+    APP_PROFILE=1 streamlit run app/app.py
+    python benchmarks/bench_app_startup.py
+"""
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+ENV_VAR = "APP_PROFILE"
+
+
+class StartupProfile:
+    """Wall time of each named stage, recorded on its first run in the process."""
+
+    def __init__(self, enabled=None):
+        self.enabled = os.environ.get(ENV_VAR, "") not in ("", "0") if enabled is None else enabled
+        self.stages = {}
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def begin(self, name):
+        """Start timing `name`, unless it has already been recorded."""
+        if name not in self.stages:
+            self._started.setdefault(name, time.perf_counter())
+
+    def end(self, name):
+        """Record `name` if this is the first time it completes."""
+        start = self._started.pop(name, None)
+        if start is None:
+            return
+        seconds = time.perf_counter() - start
+        with self._lock:
+            if name in self.stages:
+                return
+            self.stages[name] = seconds
+        if self.enabled:
+            print(f"[startup] {name:<12} {seconds * 1e3:8.1f}ms", file=sys.stderr, flush=True)
+
+    @contextmanager
+    def stage(self, name):
+        self.begin(name)
+        yield
+        self.end(name)
+
+    def report(self):
+        """The recorded stages and their total as a text table."""
+        lines = [f"{name:<12} {seconds * 1e3:8.1f}ms" for name, seconds in self.stages.items()]
+        lines.append(f"{'total':<12} {sum(self.stages.values()) * 1e3:8.1f}ms")
+        return "\n".join(lines)
+
+
+# One per process, shared by every session
+profile = StartupProfile()
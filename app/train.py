@@ -0,0 +1,262 @@
+"""
+Rebuild the Random Forest pipeline from data/ without the notebook.
+
+Reads the cleaned CSV in chunks with explicit dtypes (or memory-maps a feature
+store converted from it, see feature_store.py), makes the stratified
+80/20 split of 02_Modeling.ipynb, fits the pipeline with the hyperparameters
+of section 4.5b, evaluates it on both splits, and writes a versioned artifact
+to model/versions/ together with its metadata sidecar (features,
+hyperparameters, threshold, metrics with bootstrap intervals, data hash,
+per-stage cost, drift reference sketches). --promote
+then installs it as model/diabetes_pipeline.pkl, which running apps and
+services pick up through the registry.
+
+Features are read as float32: the trees compare float32 values anyway, so the
+fit is the same as on the notebook's float64 frame at half the memory.
+
+Usage:
+    python app/train.py
+    python app/train.py --data larger_cohort.csv --chunksize 1000000 --promote
+    python app/train.py --min-recall 0.85 --promote
+"""
+import argparse
+import os
+import resource
+import shutil
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+from bootstrap import evaluation_entry
+from drift import reference_sketches
+from evaluation import evaluate
+from feature_store import FeatureStore, is_store
+from forest import export, forest_path
+from operating_point import curve, select
+from scoring import (FEATURES, MODEL_PATH, ROOT, THRESHOLD, file_sha256, metadata_path,
+                     repo_path, update_metadata)
+from tuning import DATA_PATH, RANDOM_STATE, TARGET
+
+VERSIONS_DIR = ROOT / "model" / "versions"
+DEFAULT_CHUNKSIZE = 100_000
+
+DTYPES = {**{name: np.float32 for name in FEATURES}, TARGET: np.int8}
+
+# 02_Modeling.ipynb, 4.5b
+PARAMS = {
+    "n_estimators": 200,
+    "max_depth": 5,
+    "min_samples_split": 20,
+    "min_samples_leaf": 2,
+    "class_weight": "balanced",
+    "random_state": RANDOM_STATE,
+}
+
+
+class StageTimer:
+    """Wall time, peak traced allocation and process peak RSS for each training stage."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        # ru_maxrss is in KiB on Linux and the process-wide high-water mark
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stages[name] = {
+            "seconds": round(seconds, 4),
+            "peak_mb": round(peak / 2**20, 2),
+            "max_rss_mb": round(max_rss, 1),
+        }
+
+
+def format_stages(stages):
+    """The per-stage costs recorded by StageTimer as a text table."""
+    lines = [f"{'stage':<10} {'seconds':>9} {'peak MB':>9} {'max RSS MB':>11}"]
+    for name, s in stages.items():
+        lines.append(f"{name:<10} {s['seconds']:>9.3f} {s['peak_mb']:>9.1f} "
+                     f"{s['max_rss_mb']:>11.1f}")
+    return "\n".join(lines)
+
+
+def data_sha256(path):
+    """SHA-256 of the training CSV; for a feature store, of the CSV it was converted from."""
+    if is_store(path):
+        return FeatureStore(path).manifest["source"]["sha256"]
+    return file_sha256(path)
+
+
+def load_training_data(path=DATA_PATH, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Features as a float32 DataFrame and labels as integers.
+
+    A CSV is read `chunksize` rows at a time; a feature store's feature matrix
+    is wrapped without copying.
+    """
+    if is_store(path):
+        store = FeatureStore(path)
+        return store.frame(), store.column(TARGET)
+    features, labels = [], []
+    for chunk in pd.read_csv(path, usecols=FEATURES + [TARGET], dtype=DTYPES,
+                             chunksize=chunksize):
+        features.append(chunk[FEATURES].to_numpy())
+        labels.append(chunk[TARGET].to_numpy())
+    X = pd.DataFrame(np.concatenate(features), columns=FEATURES)
+    return X, np.concatenate(labels)
+
+
+def split(X, y):
+    """The stratified 80/20 train/test split of 02_Modeling.ipynb."""
+    return train_test_split(X, y, test_size=0.20, random_state=RANDOM_STATE, stratify=y)
+
+
+def build_pipeline(n_jobs=-1, **overrides):
+    """The unfitted 4.5b pipeline."""
+    return Pipeline([("model", RandomForestClassifier(**{**PARAMS, **overrides},
+                                                      n_jobs=n_jobs))])
+
+
+def train(data_path=DATA_PATH, chunksize=DEFAULT_CHUNKSIZE, min_recall=None,
+          threshold=THRESHOLD, n_jobs=-1, versions_dir=VERSIONS_DIR):
+    """
+    Fit, evaluate and save a new pipeline version.
+
+    Parameters:
+    -----------
+    data_path : Cleaned CSV or feature store with the feature columns and Outcome
+    chunksize : Rows read per chunk
+    min_recall : Pick the threshold reaching this test recall (see operating_point.py)
+                 instead of using `threshold`
+    threshold : Decision threshold recorded when `min_recall` is not given
+    n_jobs : Cores used to fit the forest
+    versions_dir : Directory the versioned artifact and sidecar are written to
+
+    Returns (artifact path, metadata dict). Raises ValueError, before anything
+    is written, when no finite threshold reaches `min_recall`.
+    """
+    timer = StageTimer()
+    tracemalloc.start()
+    try:
+        with timer.stage("hash"):
+            data_hash = data_sha256(data_path)
+        with timer.stage("load"):
+            X, y = load_training_data(data_path, chunksize)
+        with timer.stage("split"):
+            x_train, x_test, y_train, y_test = split(X, y)
+        with timer.stage("fit"):
+            pipeline = build_pipeline(n_jobs).fit(x_train, y_train)
+        with timer.stage("evaluate"):
+            train_proba = pipeline.predict_proba(x_train)[:, 1]
+            test_proba = pipeline.predict_proba(x_test)[:, 1]
+            if min_recall is not None:
+                threshold = float(select(curve(y_test, test_proba), min_recall).threshold)
+            if not np.isfinite(threshold):
+                # The curve's t = inf end point flags nobody, and JSON has no infinity
+                raise ValueError(f"threshold {threshold} flags nobody; not saving the model")
+            metrics = evaluate(y_train, train_proba >= threshold, y_test,
+                               test_proba >= threshold, train_proba, test_proba)
+        with timer.stage("save"):
+            stamp = datetime.now(timezone.utc)
+            versions_dir.mkdir(parents=True, exist_ok=True)
+            path = versions_dir / f"{MODEL_PATH.stem}-{stamp:%Y%m%d-%H%M%S}.pkl"
+            joblib.dump(pipeline, path)
+    finally:
+        tracemalloc.stop()
+
+    metadata = update_metadata({
+        "created_at": stamp.isoformat(timespec="seconds"),
+        "features": FEATURES,
+        "target": TARGET,
+        "params": PARAMS,
+        "operating_point": {
+            "threshold": threshold,
+            "criterion": ({"min_recall": min_recall} if min_recall is not None
+                          else {"fixed": threshold}),
+            "split": "test",
+            "rows": int(len(y_test)),
+            "recall": metrics["test"]["recall"],
+            "precision": metrics["test"]["precision"],
+            "f1": metrics["test"]["f1"],
+        },
+        "metrics": {split: {k: v for k, v in m.items() if k != "report"}
+                    for split, m in metrics.items()},
+        "data": {
+            "path": repo_path(data_path),
+            "sha256": data_hash,
+            "rows": int(len(y)),
+            "positives": int(y.sum()),
+        },
+        "versions": {"sklearn": sklearn.__version__, "numpy": np.__version__,
+                     "python": sys.version.split()[0]},
+        "training": timer.stages,
+        "drift_reference": reference_sketches(X.to_numpy(), test_proba),
+        "evaluation": evaluation_entry(y_test, test_proba, threshold, "test", data_path,
+                                       n_jobs=n_jobs if n_jobs > 0 else None),
+    }, path)
+    return path, metadata
+
+
+def _install(source, target):
+    tmp = target.with_name(target.name + ".tmp")
+    shutil.copyfile(source, tmp)
+    os.replace(tmp, target)
+
+
+def promote(path, model_path=MODEL_PATH):
+    """
+    Install a versioned artifact, its sidecar and its exported flat forest (see
+    forest.py) as the served model, each atomically. The pickle goes last, so
+    readers never see it with a stale sidecar or flat forest.
+    """
+    _install(metadata_path(path), metadata_path(model_path))
+    export(path, forest_path(model_path))
+    _install(path, model_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--data", default=DATA_PATH, help="cleaned CSV or feature store (default: %(default)s)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    criterion = parser.add_mutually_exclusive_group()
+    criterion.add_argument("--threshold", type=float, default=THRESHOLD)
+    criterion.add_argument("--min-recall", type=float, default=None,
+                           help="choose the threshold reaching this recall on the test split")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--promote", action="store_true",
+                        help=f"install the new version as {MODEL_PATH.relative_to(ROOT)}")
+    args = parser.parse_args(argv)
+    if args.min_recall is not None and not 0 < args.min_recall <= 1:
+        parser.error(f"--min-recall must be in (0, 1], got {args.min_recall}")
+
+    try:
+        path, metadata = train(args.data, args.chunksize, args.min_recall, args.threshold,
+                               args.n_jobs)
+    except ValueError as exc:
+        parser.error(str(exc))
+    test = metadata["metrics"]["test"]
+    print(f"Trained on {metadata['data']['rows']:,} rows -> {path}")
+    print(f"test recall {test['recall']:.3f}  precision {test['precision']:.3f}  "
+          f"AUC {test['roc_auc']:.4f}  at threshold {metadata['operating_point']['threshold']:.4f}")
+    print(format_stages(metadata["training"]))
+    if args.promote:
+        promote(path)
+        print(f"Promoted to {MODEL_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Cross-validated hyperparameter search for the tree models in 02_Modeling.ipynb.
+
+Replaces the notebook's serial sweeps (sections 3.2-4.4), which retrained one
+model per value on the fixed 80/20 split. Every candidate here is scored with
+the stratified 5-fold CV from section 4.6a on the training split, and the
+fold fits are spread over a process pool. Each finished fold's scores are
+written to `--cache-dir` as it completes, so an interrupted or extended
+search resumes where it stopped instead of refitting.
+
+Usage:
+    python app/tuning.py forest
+    python app/tuning.py tree --n-jobs 8
+    python app/tuning.py forest --n-iter 40 --rank-by recall --output search.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import recall_score, roc_auc_score
+from sklearn.model_selection import (ParameterGrid, ParameterSampler, StratifiedKFold,
+                                     train_test_split)
+from sklearn.tree import DecisionTreeClassifier
+
+from feature_store import FeatureStore, is_store
+from scoring import FEATURES, ROOT
+
+DATA_PATH = ROOT / "data" / "clean_diabetes_data.csv"
+CACHE_DIR = ROOT / "model" / "search_cache"
+TARGET = "Outcome"
+RANDOM_STATE = 42
+N_SPLITS = 5
+
+# Value ranges swept in 02_Modeling.ipynb, 3.2a and 4.2a-4.4a
+GRIDS = {
+    "tree": {
+        "max_depth": [1, 2, 3, 5, 8, 10, 16, 32, 64],
+        "min_samples_split": [2, 3, 5, 6, 8, 10, 20, 50, 100, 200, 500],
+    },
+    "forest": {
+        "n_estimators": [5, 10, 50, 100, 200],
+        "min_samples_split": [2, 3, 5, 6, 8, 10, 20, 50, 100, 200],
+        "max_depth": [1, 2, 3, 5, 8, 10, 16, 32, 64],
+    },
+}
+
+
+def make_estimator(kind, params):
+    """An unfitted tree or forest with the notebook's fixed settings plus `params`."""
+    if kind == "tree":
+        return DecisionTreeClassifier(random_state=RANDOM_STATE, class_weight="balanced",
+                                      **params)
+    # One core per fit: the search parallelizes across fits instead
+    return RandomForestClassifier(random_state=RANDOM_STATE, class_weight="balanced",
+                                  n_jobs=1, **params)
+
+
+def load_splits(path=DATA_PATH):
+    """
+    The stratified 80/20 split of 02_Modeling.ipynb, 2.2a.
+
+    Returns x_train, x_test, y_train, y_test as NumPy arrays. `path` may be a
+    cleaned CSV or a feature store, whose float32 features are split straight
+    from the memory map.
+    """
+    if is_store(path):
+        store = FeatureStore(path)
+        return train_test_split(store.features(), store.column(TARGET), test_size=0.20,
+                                random_state=RANDOM_STATE, stratify=store.column(TARGET))
+    df = pd.read_csv(path, index_col=0)
+    x_train, x_test, y_train, y_test = train_test_split(
+        df[FEATURES], df[TARGET], test_size=0.20, random_state=RANDOM_STATE,
+        stratify=df[TARGET])
+    return (x_train.to_numpy(dtype=np.float64), x_test.to_numpy(dtype=np.float64),
+            y_train.to_numpy(dtype=np.int64), y_test.to_numpy(dtype=np.int64))
+
+
+def load_training_split(path=DATA_PATH):
+    """X and y of the training split from `load_splits`."""
+    x_train, _, y_train, _ = load_splits(path)
+    return x_train, y_train
+
+
+def data_fingerprint(X, y):
+    """Hash of the training data; cached folds are only reused for identical data."""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    digest.update(f"{N_SPLITS}|{sklearn.__version__}".encode())
+    return digest.hexdigest()
+
+
+def _cache_path(cache_dir, kind, params, fold, fingerprint):
+    key = json.dumps([kind, params, fold, fingerprint], sort_keys=True)
+    return Path(cache_dir) / f"{hashlib.sha256(key.encode()).hexdigest()[:32]}.json"
+
+
+# Set once per worker process so tasks only carry their parameters
+_data = {}
+
+
+def _init_worker(X, y):
+    _data["X"], _data["y"] = X, y
+    _data["folds"] = list(StratifiedKFold(n_splits=N_SPLITS).split(X, y))
+
+
+def fit_fold(kind, params, fold, cache_path):
+    """Fit one candidate on one CV fold, store its scores at `cache_path` and return them."""
+    X, y = _data["X"], _data["y"]
+    train, val = _data["folds"][fold]
+
+    start = time.perf_counter()
+    model = make_estimator(kind, params).fit(X[train], y[train])
+    fit_seconds = time.perf_counter() - start
+    result = {
+        "kind": kind,
+        "params": params,
+        "fold": fold,
+        "train_recall": float(recall_score(y[train], model.predict(X[train]))),
+        "recall": float(recall_score(y[val], model.predict(X[val]))),
+        "roc_auc": float(roc_auc_score(y[val], model.predict_proba(X[val])[:, 1])),
+        "fit_seconds": fit_seconds,
+    }
+
+    # Write-then-rename so an interrupted search never leaves a half-written entry
+    tmp = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(result))
+    os.replace(tmp, cache_path)
+    return result
+
+
+def candidates(kind, grid=None, n_iter=None, seed=RANDOM_STATE):
+    """Every combination of `grid`, or `n_iter` of them drawn at random."""
+    grid = GRIDS[kind] if grid is None else grid
+    if n_iter is None:
+        return list(ParameterGrid(grid))
+    return list(ParameterSampler(grid, n_iter=n_iter, random_state=seed))
+
+
+def search(kind, grid=None, n_iter=None, X=None, y=None, n_jobs=None,
+           cache_dir=CACHE_DIR, progress=None):
+    """
+    Cross-validate every candidate of a grid or random search.
+
+    Parameters:
+    -----------
+    kind : "tree" or "forest"
+    grid : Parameter grid (dict of lists); defaults to the notebook's ranges
+    n_iter : Sample this many candidates instead of the full grid
+    X, y : Training data; defaults to the notebook's training split
+    n_jobs : Worker processes (default: all cores)
+    cache_dir : Directory holding per-fold results for memoization and resume
+    progress : Optional callable receiving (done, total) after each fold
+
+    Returns a DataFrame with one row per candidate: its parameters, mean and
+    standard deviation of validation recall and ROC-AUC, and mean train
+    recall, in candidate order.
+    """
+    if X is None or y is None:
+        X, y = load_training_split()
+    fingerprint = data_fingerprint(X, y)
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    params_list = candidates(kind, grid, n_iter)
+    results, todo = [], []
+    for params in params_list:
+        for fold in range(N_SPLITS):
+            path = _cache_path(cache_dir, kind, params, fold, fingerprint)
+            if path.exists():
+                results.append(json.loads(path.read_text()))
+            else:
+                todo.append((kind, params, fold, path))
+
+    total, done = len(params_list) * N_SPLITS, len(results)
+    if progress is not None:
+        progress(done, total)
+    n_jobs = n_jobs or os.cpu_count()
+    if todo and n_jobs == 1:
+        _init_worker(X, y)
+        for task in todo:
+            results.append(fit_fold(*task))
+            done += 1
+            if progress is not None:
+                progress(done, total)
+    elif todo:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(todo)),
+                                 initializer=_init_worker, initargs=(X, y)) as pool:
+            for future in as_completed([pool.submit(fit_fold, *task) for task in todo]):
+                results.append(future.result())
+                done += 1
+                if progress is not None:
+                    progress(done, total)
+
+    return summarize(results, params_list)
+
+
+def summarize(fold_results, params_list):
+    """Aggregate per-fold results into one row per candidate, in `params_list` order."""
+    by_key = {}
+    for result in fold_results:
+        by_key.setdefault(json.dumps(result["params"], sort_keys=True), []).append(result)
+
+    rows = []
+    for params in params_list:
+        folds = by_key[json.dumps(params, sort_keys=True)]
+        recall = np.array([f["recall"] for f in folds])
+        auc = np.array([f["roc_auc"] for f in folds])
+        rows.append({
+            **params,
+            "recall_mean": recall.mean(),
+            "recall_std": recall.std(),
+            "roc_auc_mean": auc.mean(),
+            "roc_auc_std": auc.std(),
+            "train_recall_mean": np.mean([f["train_recall"] for f in folds]),
+            "fit_seconds": sum(f["fit_seconds"] for f in folds),
+        })
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("kind", choices=sorted(GRIDS), help="model family to tune")
+    parser.add_argument("--data", default=DATA_PATH, help="cleaned CSV or feature store to split and tune on")
+    parser.add_argument("--n-iter", type=int, default=None,
+                        help="random search over this many candidates (default: full grid)")
+    parser.add_argument("--n-jobs", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--rank-by", choices=("roc_auc", "recall"), default="roc_auc")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--output", default=None, help="write all candidates to this CSV")
+    parser.add_argument("--top", type=int, default=10, help="candidates to print")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+
+    def report(done, total):
+        if done % max(1, total // 100) and done != total:
+            return
+        print(f"\r{done:,}/{total:,} folds", end="", file=sys.stderr, flush=True)
+
+    X, y = load_training_split(args.data)
+    start = time.perf_counter()
+    table = search(args.kind, n_iter=args.n_iter, X=X, y=y, n_jobs=args.n_jobs,
+                   cache_dir=args.cache_dir, progress=None if args.quiet else report)
+    if not args.quiet:
+        print(file=sys.stderr)
+
+    metric = f"{args.rank_by}_mean"
+    other = "recall_mean" if args.rank_by == "roc_auc" else "roc_auc_mean"
+    table = table.sort_values([metric, other], ascending=False)
+    print(f"{len(table)} candidates x {N_SPLITS} folds in {time.perf_counter() - start:.1f}s")
+    print(table.head(args.top).to_string(index=False, float_format="{:.4f}".format))
+    if args.output:
+        table.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,607 @@
+"""
+Static CSS and HTML for app.py.
+
+Streamlit re-executes app.py on every interaction, so anything built in the
+script is rebuilt on every rerun. Everything here is built once, when the
+module is first imported, and the same strings are sent on every rerun: the
+stylesheet (stripped of comments and whitespace, a fifth smaller on the wire),
+the sidebar, hero and placeholder blocks and the input-card headers. Only the
+pieces that depend on the inputs (BMI badge, result card and its explanation)
+are formatted per rerun.
+"""
+import re
+
+_CSS = """
+/* ---- Google Font ---- */
+@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
+
+html, body, [class*="css"] {
+    font-family: 'Inter', sans-serif;
+}
+
+/* ---- Reduce Streamlit default padding ---- */
+.block-container {
+    padding-top: 1.8rem !important;
+    padding-bottom: 2rem !important;
+}
+
+/* ---- Background ---- */
+.stApp {
+    background: linear-gradient(135deg, #0f172a 0%, #1e293b 50%, #0f2027 100%);
+    min-height: 100vh;
+}
+
+/* ---- Hide default Streamlit chrome ---- */
+#MainMenu, footer, header { visibility: hidden; }
+
+/* ---- Hero banner ---- */
+.hero {
+    background: linear-gradient(120deg, #06b6d4 0%, #3b82f6 50%, #8b5cf6 100%);
+    border-radius: 16px;
+    padding: 20px 32px;
+    margin-bottom: 20px;
+    box-shadow: 0 12px 36px rgba(6,182,212,0.25);
+    position: relative;
+    overflow: hidden;
+    display: flex;
+    align-items: center;
+    gap: 20px;
+}
+.hero::before {
+    content: '';
+    position: absolute;
+    top: -60%; right: -5%;
+    width: 220px; height: 220px;
+    background: rgba(255,255,255,0.06);
+    border-radius: 50%;
+    pointer-events: none;
+}
+.hero::after {
+    content: '';
+    position: absolute;
+    bottom: -50%; left: 3%;
+    width: 140px; height: 140px;
+    background: rgba(255,255,255,0.04);
+    border-radius: 50%;
+    pointer-events: none;
+}
+.hero-emoji {
+    font-size: 2.8rem;
+    line-height: 1;
+    flex-shrink: 0;
+    filter: drop-shadow(0 2px 8px rgba(0,0,0,0.3));
+}
+.hero-text h1 {
+    font-size: 1.55rem;
+    font-weight: 700;
+    color: #ffffff;
+    margin: 0 0 4px 0;
+    letter-spacing: -0.3px;
+}
+.hero-text p {
+    font-size: 0.85rem;
+    color: rgba(255,255,255,0.82);
+    margin: 0;
+    line-height: 1.5;
+}
+
+/* ---- Section label ---- */
+.section-label {
+    font-size: 0.7rem;
+    font-weight: 600;
+    letter-spacing: 1.5px;
+    text-transform: uppercase;
+    color: #06b6d4;
+    margin: 0 0 12px 0;
+}
+
+/* ---- Input card ---- */
+.input-card {
+    background: rgba(255,255,255,0.04);
+    border: 1px solid rgba(255,255,255,0.09);
+    border-top: 2px solid rgba(6,182,212,0.35);
+    border-radius: 14px;
+    padding: 16px 18px 12px;
+    backdrop-filter: blur(10px);
+    transition: border-color 0.25s, transform 0.2s;
+}
+.input-card:hover {
+    border-color: rgba(6,182,212,0.5);
+    transform: translateY(-2px);
+}
+.input-icon {
+    font-size: 1.3rem;
+    margin-bottom: 4px;
+}
+.input-title {
+    font-size: 0.8rem;
+    font-weight: 600;
+    color: #94a3b8;
+    margin-bottom: 2px;
+    letter-spacing: 0.3px;
+}
+.input-hint {
+    font-size: 0.7rem;
+    color: #475569;
+    margin-top: 2px;
+}
+
+/* ---- Streamlit number_input styling ---- */
+.stNumberInput > div > div > input {
+    background: rgba(255,255,255,0.07) !important;
+    border: 1px solid rgba(255,255,255,0.12) !important;
+    border-radius: 8px !important;
+    color: #f1f5f9 !important;
+    font-size: 1rem !important;
+    font-weight: 500 !important;
+    padding: 8px 12px !important;
+}
+.stNumberInput > div > div > input:focus {
+    border-color: #06b6d4 !important;
+    box-shadow: 0 0 0 3px rgba(6,182,212,0.18) !important;
+}
+.stNumberInput label { color: #cbd5e1 !important; font-weight: 500 !important; }
+
+/* ---- Predict button ---- */
+.stButton > button {
+    background: linear-gradient(120deg, #06b6d4, #3b82f6) !important;
+    color: white !important;
+    border: none !important;
+    border-radius: 12px !important;
+    padding: 13px 40px !important;
+    font-size: 1rem !important;
+    font-weight: 600 !important;
+    letter-spacing: 0.3px !important;
+    width: 100% !important;
+    transition: all 0.3s ease !important;
+    box-shadow: 0 8px 24px rgba(59,130,246,0.3) !important;
+    cursor: pointer !important;
+}
+.stButton > button:hover {
+    transform: translateY(-2px) !important;
+    box-shadow: 0 12px 32px rgba(59,130,246,0.45) !important;
+}
+.stButton > button:active { transform: translateY(0) !important; }
+
+/* ---- Result cards ---- */
+.result-high {
+    background: linear-gradient(135deg, rgba(239,68,68,0.12), rgba(220,38,38,0.06));
+    border: 1px solid rgba(239,68,68,0.35);
+    border-top: 3px solid #ef4444;
+    border-radius: 16px;
+    padding: 18px 28px;
+    text-align: center;
+    animation: fadeInUp 0.45s ease;
+}
+.result-low {
+    background: linear-gradient(135deg, rgba(16,185,129,0.12), rgba(5,150,105,0.06));
+    border: 1px solid rgba(16,185,129,0.35);
+    border-top: 3px solid #10b981;
+    border-radius: 16px;
+    padding: 18px 28px;
+    text-align: center;
+    animation: fadeInUp 0.45s ease;
+}
+.result-icon { font-size: 2.2rem; margin-bottom: 6px; }
+.result-label {
+    font-size: 1.3rem;
+    font-weight: 700;
+    letter-spacing: -0.5px;
+    margin-bottom: 5px;
+}
+.result-high .result-label { color: #f87171; }
+.result-low  .result-label { color: #34d399; }
+.result-desc {
+    font-size: 0.87rem;
+    color: #94a3b8;
+    line-height: 1.5;
+    max-width: 380px;
+    margin: 0 auto;
+}
+
+/* ── Risk bar ── */
+.risk-bar-bg {
+    background: rgba(255,255,255,0.07);
+    border-radius: 50px;
+    height: 10px;
+    margin: 18px 0 5px;
+    overflow: hidden;
+}
+.risk-bar-fill-high {
+    height: 100%;
+    border-radius: 50px;
+    background: linear-gradient(90deg, #f59e0b, #ef4444);
+}
+.risk-bar-fill-low {
+    height: 100%;
+    border-radius: 50px;
+    background: linear-gradient(90deg, #06b6d4, #10b981);
+}
+.risk-pct { font-size: 0.75rem; color: #64748b; text-align: right; }
+
+/* ── Per-feature explanation ── */
+.why { margin-top: 14px; text-align: left; font-size: 0.8rem; color: #94a3b8; }
+.why-title { margin-bottom: 6px; }
+.why-row { display: flex; align-items: center; gap: 10px; margin: 4px 0; }
+.why-name { flex: 0 0 150px; color: #cbd5e1; }
+.why-track { flex: 1; display: flex; height: 8px; }
+.why-half { flex: 1; display: flex; }
+.why-half.neg { justify-content: flex-end; border-right: 1px solid rgba(255,255,255,0.2); }
+.why-up { background: #f87171; border-radius: 0 4px 4px 0; }
+.why-down { background: #34d399; border-radius: 4px 0 0 4px; }
+.why-pts { flex: 0 0 64px; text-align: right; font-variant-numeric: tabular-nums; }
+
+/* ---- Metric pill ---- */
+.metric-row { display: flex; gap: 10px; flex-wrap: wrap; margin-top: 8px; }
+.metric-pill {
+    background: rgba(255,255,255,0.06);
+    border: 1px solid rgba(255,255,255,0.1);
+    border-radius: 50px;
+    padding: 6px 16px;
+    font-size: 0.8rem;
+    color: #cbd5e1;
+}
+.metric-pill span { color: #06b6d4; font-weight: 700; }
+.metric-ci { font-size: 0.68rem; color: #64748b; text-align: center; }
+.metric-note { font-size: 0.7rem; color: #64748b; margin-top: 6px; }
+
+/* ---- Sidebar ---- */
+[data-testid="stSidebar"] {
+    background: rgba(15,23,42,0.97) !important;
+    border-right: 1px solid rgba(255,255,255,0.07) !important;
+}
+[data-testid="stSidebar"] .stMarkdown h3 {
+    color: #06b6d4 !important;
+    font-size: 0.75rem !important;
+    text-transform: uppercase !important;
+    letter-spacing: 1.2px !important;
+    margin-bottom: 0 !important;
+}
+
+/* ---- Tip card ---- */
+.tip-card {
+    background: rgba(255,255,255,0.03);
+    border-left: 3px solid #06b6d4;
+    border-radius: 0 8px 8px 0;
+    padding: 10px 14px;
+    margin-bottom: 8px;
+    font-size: 0.82rem;
+    color: #94a3b8;
+    line-height: 1.5;
+}
+
+/* ---- Divider ---- */
+.fancy-divider {
+    height: 1px;
+    background: linear-gradient(90deg, transparent, rgba(6,182,212,0.35), transparent);
+    margin: 22px 0;
+    border: none;
+}
+
+/* ---- BMI badge ---- */
+.bmi-badge {
+    display: inline-flex;
+    align-items: center;
+    gap: 10px;
+    background: rgba(255,255,255,0.05);
+    border: 1px solid rgba(255,255,255,0.1);
+    border-radius: 50px;
+    padding: 9px 20px;
+    font-size: 0.88rem;
+    color: #94a3b8;
+}
+.bmi-badge .bmi-val { font-size: 1.1rem; font-weight: 700; color: #06b6d4; }
+.bmi-badge .bmi-cat { font-size: 0.75rem; font-weight: 600; padding: 3px 10px; border-radius: 50px; }
+.cat-under  { background: rgba(59,130,246,0.2);  color: #60a5fa; }
+.cat-normal { background: rgba(16,185,129,0.2);  color: #34d399; }
+.cat-over   { background: rgba(245,158,11,0.2);  color: #fbbf24; }
+.cat-obese  { background: rgba(239,68,68,0.2);   color: #f87171; }
+
+/* ---- BMI mode toggle (radio as pill switcher) ---- */
+div[data-testid="stRadio"] {
+    display: flex !important; 
+    justify-content: center !important;
+    width: 100% !important;
+}
+div[data-testid="stRadio"] > label { display: none !important; }
+div[data-testid="stRadio"] > div {
+    flex-direction: row !important;
+    gap: 0 !important;
+    background: rgba(255,255,255,0.05) !important;
+    border: 1px solid rgba(255,255,255,0.12) !important;
+    border-radius: 50px !important;
+    padding: 4px !important;
+    width: fit-content !important;
+    margin: 0 auto !important;
+}
+div[data-testid="stRadio"] > div > label {
+    border-radius: 50px !important;
+    padding: 5px 14px !important;
+    margin: 0 !important;
+    cursor: pointer !important;
+    color: #64748b !important;
+    font-size: 0.78rem !important;
+    font-weight: 500 !important;
+    transition: all 0.2s !important;
+}
+div[data-testid="stRadio"] > div > label:has(input:checked) {
+    background: linear-gradient(120deg, #06b6d4, #3b82f6) !important;
+    color: #ffffff !important;
+}
+div[data-testid="stRadio"] > div > label > div:first-child { display: none !important; }
+
+/* ---- Social link buttons ---- */
+.social-links { display: flex; flex-direction: column; gap: 7px; margin-top: 10px; }
+.social-btn {
+    display: flex;
+    align-items: center;
+    gap: 10px;
+    background: rgba(255,255,255,0.04);
+    border: 1px solid rgba(255,255,255,0.09);
+    border-radius: 10px;
+    padding: 9px 13px;
+    text-decoration: none !important;
+    color: #cbd5e1 !important;
+    font-size: 0.83rem;
+    font-weight: 500;
+    transition: all 0.2s;
+}
+.social-btn:hover {
+    background: rgba(6,182,212,0.1);
+    border-color: rgba(6,182,212,0.4);
+    color: #06b6d4 !important;
+    transform: translateX(3px);
+}
+.social-btn .s-icon { font-size: 1rem; }
+.social-btn .s-label { flex: 1; }
+.social-btn .s-arrow { color: #475569; font-size: 0.72rem; }
+
+/* ---- Dataset info cards ---- */
+.info-grid {
+    display: grid;
+    grid-template-columns: repeat(4, 1fr);
+    gap: 10px;
+    margin-bottom: 22px;
+}
+.sidebar-info-grid {
+    display: grid;
+    grid-template-columns: 1fr;
+    gap: 8px;
+    margin-top: 10px;
+}
+.info-card {
+    background: rgba(255,255,255,0.04);
+    border: 1px solid rgba(255,255,255,0.07);
+    border-radius: 10px;
+    padding: 8px 12px;
+    display: flex;
+    align-items: center;
+    gap: 10px;
+}
+.info-card:nth-child(1) { border-top: 2px solid #06b6d4; }
+.info-card:nth-child(2) { border-top: 2px solid #8b5cf6; }
+.info-card:nth-child(3) { border-top: 2px solid #3b82f6; }
+.info-card:nth-child(4) { border-top: 2px solid #10b981; }
+.info-card-icon { font-size: 1.1rem; flex-shrink: 0; }
+.info-card-body { flex: 1; min-width: 0; }
+.info-card-label {
+    font-size: 0.62rem;
+    font-weight: 600;
+    letter-spacing: 1px;
+    text-transform: uppercase;
+    color: #475569;
+    margin-bottom: 1px;
+}
+.info-card-value { font-size: 0.8rem; font-weight: 600; color: #e2e8f0; line-height: 1.3; }
+.info-card-sub   { font-size: 0.69rem; color: #64748b; margin-top: 1px; line-height: 1.2; }
+
+/* ---- Animations ---- */
+@keyframes fadeInUp {
+    from { opacity: 0; transform: translateY(16px); }
+    to   { opacity: 1; transform: translateY(0);    }
+}
+"""
+
+
+def minify_css(css):
+    """`css` without comments and without the whitespace the browser ignores."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};,])\s*|(:)\s+", r"\1\2", css).strip()
+
+
+STYLE = f"<style>{minify_css(_CSS)}</style>"
+
+DIVIDER = "<hr class='fancy-divider'>"
+BREAK = "<br>"
+
+SIDEBAR_DATASET = """
+<div class="sidebar-info-grid">
+    <div class="info-card">
+        <div class="info-card-icon">🏛️</div>
+        <div class="info-card-body">
+            <div class="info-card-label">Data Source</div>
+            <div class="info-card-value">NIDDK</div>
+            <div class="info-card-sub">National Institute of Diabetes</div>
+        </div>
+    </div>
+    <div class="info-card">
+        <div class="info-card-icon">👩</div>
+        <div class="info-card-body">
+            <div class="info-card-label">Population</div>
+            <div class="info-card-value">Pima Indian Heritage</div>
+            <div class="info-card-sub">Females aged ≥ 21 yrs</div>
+        </div>
+    </div>
+    <div class="info-card">
+        <div class="info-card-icon">🎯</div>
+        <div class="info-card-body">
+            <div class="info-card-label">Objective</div>
+            <div class="info-card-value">Binary Classification</div>
+            <div class="info-card-sub">Diabetic vs Non-diabetic</div>
+        </div>
+    </div>
+    <div class="info-card">
+        <div class="info-card-icon">🔬</div>
+        <div class="info-card-body">
+            <div class="info-card-label">Features</div>
+            <div class="info-card-value">Glucose · BMI · Age · Pregnancies</div>
+            <div class="info-card-sub">By correlation analysis</div>
+        </div>
+    </div>
+</div>
+"""
+
+SIDEBAR_AUTHOR = """
+<p style="color:#e2e8f0;font-size:0.95rem;font-weight:600;margin-bottom:12px">
+    Osama Abd El-Mohsen
+</p>
+<div class="social-links">
+    <a class="social-btn" href="https://github.com/Osama-Abd-El-Mohsen" target="_blank">
+        <span class="s-icon">🐙</span>
+        <span class="s-label">GitHub</span>
+        <span class="s-arrow">↗</span>
+    </a>
+    <a class="social-btn" href="https://osama-abd-elmohsen-portfolio.me/" target="_blank">
+        <span class="s-icon">🌐</span>
+        <span class="s-label">Portfolio</span>
+        <span class="s-arrow">↗</span>
+    </a>
+    <a class="social-btn" href="https://www.linkedin.com/in/osama-abd-el-mohsen" target="_blank">
+        <span class="s-icon">💼</span>
+        <span class="s-label">LinkedIn</span>
+        <span class="s-arrow">↗</span>
+    </a>
+</div>
+"""
+
+SIDEBAR_DISCLAIMER = (
+    '<p style="color:#475569;font-size:0.75rem;text-align:center">'
+    "For educational purposes only.<br>Not a substitute for medical advice.</p>"
+)
+
+HERO = """
+<div class="hero">
+    <div class="hero-emoji">🩺</div>
+    <div class="hero-text">
+        <h1>Diabetes Risk Predictor</h1>
+        <p>Enter your clinical measurements below and get an instant AI-powered
+        assessment of your diabetes risk level. Results are indicative —
+        always consult a healthcare professional.</p>
+    </div>
+</div>
+"""
+
+SECTION_LABEL = '<p class="section-label">Clinical Inputs</p>'
+
+
+def _input_card(icon, title, hint):
+    return (
+        '<div class="input-card">'
+        f'<div class="input-icon">{icon}</div>'
+        f'<div class="input-title">{title}</div>'
+        f'<div class="input-hint">{hint}</div>'
+        "</div>"
+    )
+
+
+INPUT_CARDS = {
+    "glucose": _input_card("🩸", "Glucose Level", "mg/dL — fasting plasma glucose"),
+    "weight": _input_card("⚖️", "Weight", "kilograms (kg)"),
+    "height": _input_card("📏", "Height", "centimeters (cm)"),
+    "bmi": _input_card("📊", "BMI", "Body Mass Index (kg/m²)"),
+    "age": _input_card("🎂", "Age", "Years — your current age"),
+    "pregnancies": _input_card("🤰", "Pregnancies", "Number of times pregnant"),
+}
+
+PLACEHOLDER = """
+<div style="
+    border: 2px dashed rgba(255,255,255,0.1);
+    border-radius: 20px;
+    padding: 48px;
+    text-align: center;
+    color: #475569;
+">
+    <div style="font-size:3rem;margin-bottom:12px">📋</div>
+    <p style="font-size:1rem;margin:0">
+        Fill in your clinical measurements above and click
+        <strong style="color:#06b6d4">Analyze My Risk</strong> to see your result.
+    </p>
+</div>
+"""
+
+
+def metric_pills(evaluation):
+    """
+    The sidebar's model-performance pills: recall and AUC with their bootstrap
+    intervals, from the "evaluation" entry of the model's metadata (or None).
+    """
+    if evaluation is None:
+        return ('<div class="tip-card">No evaluation recorded for this model yet '
+                "(<code>python app/bootstrap.py --write</code>).</div>")
+    metrics = evaluation["metrics"]
+    pills = "".join(
+        f'<div class="metric-pill">{name}&nbsp;<span>{m["value"] * 100:.1f}%</span>'
+        f'<div class="metric-ci">{m["low"] * 100:.1f}–{m["high"] * 100:.1f}</div></div>'
+        for name, m in (("Recall", metrics["recall"]), ("AUC", metrics["roc_auc"]))
+        if m["value"] is not None)
+    return (f'<div class="metric-row">{pills}</div>'
+            f'<div class="metric-note">{evaluation["confidence"]:.0%} bootstrap intervals, '
+            f'{evaluation["rows"]:,} {evaluation["split"]} rows at threshold '
+            f'{evaluation["threshold"]:.2f}</div>')
+
+
+def bmi_badge(label, bmi, cat_label, cat_class):
+    return (
+        '<div style="text-align:center"><div class="bmi-badge">'
+        f'<span>{label}</span>'
+        f'<span class="bmi-val">{bmi}</span>'
+        f'<span class="bmi-cat {cat_class}">{cat_label}</span>'
+        "</div></div>"
+    )
+
+
+def explanation(expected, contributions):
+    """
+    Rows showing how each input moved the score from the model's average.
+
+    Parameters:
+    -----------
+    expected : Average probability before any input is considered
+    contributions : (label, input text, contribution to the probability) per feature
+    """
+    widest = max(abs(c) for _, _, c in contributions) or 1.0
+    rows = []
+    for label, value, contribution in sorted(contributions, key=lambda item: -abs(item[2])):
+        width = f"{abs(contribution) / widest * 100:.0f}%"
+        bar = (f'<div class="why-half neg"></div><div class="why-half">'
+               f'<div class="why-up" style="width:{width}"></div></div>' if contribution > 0 else
+               f'<div class="why-half neg"><div class="why-down" style="width:{width}"></div>'
+               '</div><div class="why-half"></div>')
+        rows.append(f'<div class="why-row"><div class="why-name">{label} <strong>{value}</strong>'
+                    f'</div><div class="why-track">{bar}</div>'
+                    f'<div class="why-pts">{contribution * 100:+.1f} pts</div></div>')
+    return (f'<div class="why"><div class="why-title">Why this score: from the model\'s '
+            f"average of {expected * 100:.0f}%, each input moved it by</div>{''.join(rows)}</div>")
+
+
+def result_card(is_high, pct, explanation=""):
+    """The result card for a risk score of `pct` percent, with an optional `explanation`."""
+    if is_high:
+        kind, icon, label, color = "high", "⚠️", "High Risk Detected", "#f87171"
+        advice = "Please consult a healthcare professional for a proper diagnosis."
+    else:
+        kind, icon, label, color = "low", "✅", "Low Risk", "#34d399"
+        advice = "Keep maintaining your healthy lifestyle and schedule regular check-ups."
+    return (
+        f'<div class="result-{kind}">'
+        f'<div class="result-icon">{icon}</div>'
+        f'<div class="result-label">{label}</div>'
+        f'<div class="result-desc">Our model estimates a <strong style="color:{color}">'
+        f"{pct}% probability</strong> of diabetes based on your inputs. {advice}</div>"
+        f'<div class="risk-bar-bg"><div class="risk-bar-fill-{kind}" style="width:{pct}%">'
+        "</div></div>"
+        f'<div class="risk-pct">{pct}% risk score</div>'
+        f"{explanation}"
+        "</div>"
+    )
@@ -0,0 +1,76 @@
+"""
+Time Streamlit reruns of app/app.py, the way a user moving a widget triggers them.
+
+Uses Streamlit's AppTest to execute the script headlessly: one cold run, then
+`--reruns` reruns that each change the glucose input, plus a click on
+"Analyze My Risk". Also times loading the pipeline from disk against a warm
+registry hit, the part of each rerun the registry removes.
+
+Usage:
+    python benchmarks/bench_app_rerun.py
+    python benchmarks/bench_app_rerun.py --app path/to/older/app.py --reruns 50
+"""
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from registry import ModelRegistry  # noqa: E402
+from scoring import load_serving_model  # noqa: E402
+
+
+def time_reruns(app_path, reruns):
+    from streamlit.testing.v1 import AppTest
+
+    start = time.perf_counter()
+    at = AppTest.from_file(str(Path(app_path).resolve()), default_timeout=60).run()
+    cold = time.perf_counter() - start
+
+    times = np.empty(reruns)
+    for i in range(reruns):
+        at.number_input[0].set_value(float(80 + i % 150))
+        if i % 5 == 0:
+            at.button[0].click()
+        start = time.perf_counter()
+        at.run()
+        times[i] = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return cold, times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--app", default=ROOT / "app" / "app.py")
+    parser.add_argument("--reruns", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    load_serving_model()  # pay the one-off sklearn import outside the timing
+    load = [time.perf_counter()]
+    load_serving_model()
+    load.append(time.perf_counter())
+    registry = ModelRegistry()
+    registry.get()
+    hits = []
+    for _ in range(100):
+        start = time.perf_counter()
+        registry.get()
+        hits.append(time.perf_counter() - start)
+    print(f"model from disk  {(load[1] - load[0]) * 1e3:8.2f}ms")
+    print(f"registry hit     {np.median(hits) * 1e3:8.3f}ms")
+
+    cold, times = time_reruns(args.app, args.reruns)
+    print(f"cold run         {cold * 1e3:8.2f}ms")
+    print(f"rerun p50        {np.percentile(times, 50) * 1e3:8.2f}ms")
+    print(f"rerun p99        {np.percentile(times, 99) * 1e3:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
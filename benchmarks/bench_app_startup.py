@@ -0,0 +1,73 @@
+"""
+Time to first paint and to first prediction of app/app.py in a fresh process.
+
+An autoscaled pod runs the script cold: nothing imported beyond Streamlit,
+no model loaded. Each run here starts a new interpreter that imports
+Streamlit's AppTest (as the server would have imported Streamlit), runs the
+script once (first paint: the page with its form) and then clicks "Analyze
+My Risk" (first prediction). Medians over `--runs` runs, with the app's own
+per-stage startup profile (see app/startup.py) when it records one.
+
+Usage:
+    python benchmarks/bench_app_startup.py
+    git show HEAD~1:app/app.py > /tmp/app_before.py
+    python benchmarks/bench_app_startup.py --app /tmp/app_before.py --runs 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CHILD = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+sys.path.insert(0, {app_dir!r})
+from streamlit.testing.v1 import AppTest
+
+at = AppTest.from_file({app!r}, default_timeout=60)
+start = time.perf_counter()
+at.run()
+paint = time.perf_counter() - start
+numpy_loaded = "numpy" in sys.modules
+at.button[0].click()
+start = time.perf_counter()
+at.run()
+predict = time.perf_counter() - start
+if at.exception:
+    raise RuntimeError(at.exception[0].value)
+stages = sys.modules["startup"].profile.stages if "startup" in sys.modules else {{}}
+print(json.dumps({{"first_paint": paint, "first_predict": predict,
+                  "numpy_before_paint": numpy_loaded, "stages": stages}}))
+"""
+
+
+def cold_run(app_path):
+    """One fresh-process measurement of `app_path` as a dict of seconds."""
+    script = CHILD.format(app_dir=str(ROOT / "app"), app=str(Path(app_path).resolve()))
+    out = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True,
+                         text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--app", default=ROOT / "app" / "app.py")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    runs = [cold_run(args.app) for _ in range(args.runs)]
+    print(f"{args.app} ({args.runs} fresh processes, medians)")
+    print(f"first paint      {statistics.median(r['first_paint'] for r in runs) * 1e3:8.1f}ms"
+          f"  (numpy imported: {runs[0]['numpy_before_paint']})")
+    print(f"first prediction {statistics.median(r['first_predict'] for r in runs) * 1e3:8.1f}ms")
+    for name in runs[0]["stages"]:
+        values = [r["stages"][name] for r in runs if name in r["stages"]]
+        print(f"  {name:<14} {statistics.median(values) * 1e3:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cold start to first prediction: the pipeline pickle against the flat forest artifact.
+
+Each run is a fresh interpreter that imports what it needs, loads the model
+and scores one row, so the times include interpreter start-up, imports (sklearn
+for the pickle, NumPy only for the artifact) and loading. Reports the median
+and best of `--runs` runs, and checks both give the same probabilities on a
+batch of synthetic rows.
+
+Usage:
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --runs 20
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from bench_forest import synthetic_rows  # noqa: E402
+from forest import FlatForest, forest_path  # noqa: E402
+from scoring import MODEL_PATH, load_pipeline  # noqa: E402
+
+ROW = "[[148.0, 33.6, 50.0, 6.0]]"
+
+SCRIPTS = {
+    "pickle (joblib + sklearn)": f"""
+import warnings; warnings.simplefilter("ignore")
+from scoring import load_pipeline
+load_pipeline({str(MODEL_PATH)!r}).predict_proba({ROW})
+""",
+    "flat artifact (numpy)": f"""
+from forest import FlatForest
+FlatForest.load({str(forest_path(MODEL_PATH))!r}).predict_proba({ROW})
+""",
+}
+
+
+def cold_start(script):
+    """Seconds for a fresh interpreter to run `script` with app/ on sys.path."""
+    start = time.perf_counter()
+    prelude = f"import sys\nsys.path.insert(0, {str(ROOT / 'app')!r})\n"
+    subprocess.run([sys.executable, "-c", prelude + script], check=True)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if not forest_path(MODEL_PATH).exists():
+        parser.exit(1, f"{forest_path(MODEL_PATH)} missing; run python app/forest.py export\n")
+    X = synthetic_rows(100_000)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = load_pipeline(MODEL_PATH).predict_proba(X)
+    identical = np.array_equal(FlatForest.load(forest_path(MODEL_PATH)).predict_proba(X),
+                               expected)
+    print(f"identical probabilities on {len(X):,} rows: {identical}\n")
+
+    baseline = cold_start("")
+    print(f"bare interpreter: {baseline * 1e3:.0f}ms\n")
+    print(f"{'artifact':<28} {'median ms':>10} {'best ms':>10}")
+    for name, script in SCRIPTS.items():
+        times = [cold_start(script) for _ in range(args.runs)]
+        print(f"{name:<28} {statistics.median(times) * 1e3:>10.0f} {min(times) * 1e3:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
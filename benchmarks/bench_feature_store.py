@@ -0,0 +1,129 @@
+"""
+Load time and memory of the feature store against pd.read_csv.
+
+Writes a synthetic cleaned CSV of `--rows` rows (real rows resampled, same
+layout as data/clean_diabetes_data.csv), converts it to a feature store, then
+loads the model features in a fresh process per method and reports the wall
+time, the peak RSS the load added, and how much of the memory held afterwards
+is private (anonymous) rather than shared page cache. The store is read
+completely (summed) so every page is actually touched; its pages count towards
+RSS but belong to the page cache and are shared by every process mapping the
+file. Linux only (reads /proc/self/status).
+
+Usage:
+    python benchmarks/bench_feature_store.py
+    python benchmarks/bench_feature_store.py --rows 1000000 100000000 --workdir /data/tmp
+"""
+import argparse
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from feature_store import FeatureStore, convert  # noqa: E402
+from scoring import FEATURES  # noqa: E402
+
+WRITE_CHUNK = 1_000_000
+
+
+def write_csv(path, rows, seed=0):
+    """A cleaned-layout CSV of `rows` rows resampled from the bundled data."""
+    source = pd.read_csv(ROOT / "data" / "clean_diabetes_data.csv", index_col=0)
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, WRITE_CHUNK):
+        n = min(WRITE_CHUNK, rows - start)
+        chunk = source.iloc[rng.integers(0, len(source), n)]
+        chunk.index = pd.RangeIndex(start, start + n)
+        chunk.to_csv(path, mode="w" if start == 0 else "a", header=start == 0)
+
+
+def _load(method, path):
+    if method == "read_csv (notebook)":
+        return pd.read_csv(path, index_col=0)[FEATURES]
+    if method == "read_csv (4 columns)":
+        return pd.read_csv(path, usecols=FEATURES)
+    X = FeatureStore(path).features()
+    X.sum(axis=0)
+    return X
+
+
+def _memory():
+    """Current RSS, its anonymous (private) part and peak RSS, in MB, from /proc."""
+    lines = Path("/proc/self/status").read_text().splitlines()
+    status = dict(line.split(":", 1) for line in lines)
+    return {key: int(status[key].split()[0]) / 1024 for key in ("VmRSS", "RssAnon", "VmHWM")}
+
+
+def _child(method, path, queue):
+    # Reset the peak-RSS counter so VmHWM covers the load alone (Linux)
+    Path("/proc/self/clear_refs").write_text("5")
+    before = _memory()
+    start = time.perf_counter()
+    data = _load(method, path)
+    seconds = time.perf_counter() - start
+    after = _memory()
+    queue.put((seconds, after["VmHWM"] - before["VmRSS"],
+               after["RssAnon"] - before["RssAnon"], len(data)))
+
+
+def measure(method, path):
+    """(seconds, added peak RSS MB, added private MB, rows) in a fresh process, or None."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(method, str(path), queue))
+    process.start()
+    process.join()
+    return queue.get() if process.exitcode == 0 else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--workdir", default=None,
+                        help="where to write the test files (default: a temp directory)")
+    parser.add_argument("--keep", action="store_true", help="keep the generated files")
+    args = parser.parse_args(argv)
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="feature_store_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        for rows in args.rows:
+            csv_path = workdir / f"cohort_{rows}.csv"
+            start = time.perf_counter()
+            write_csv(csv_path, rows)
+            written = time.perf_counter() - start
+            start = time.perf_counter()
+            store = convert(csv_path)
+            converted = time.perf_counter() - start
+            csv_mb = csv_path.stat().st_size / 1e6
+            store_mb = sum(f.stat().st_size for f in store.path.iterdir()) / 1e6
+            print(f"\n{rows:,} rows: CSV {csv_mb:,.0f} MB (written in {written:.1f}s), "
+                  f"store {store_mb:,.0f} MB (converted in {converted:.1f}s)")
+            print(f"{'method':<22} {'seconds':>10} {'peak RSS MB':>12} {'private MB':>11}")
+            for method, path in (("read_csv (notebook)", csv_path),
+                                 ("read_csv (4 columns)", csv_path),
+                                 ("feature store (mmap)", store.path)):
+                result = measure(method, path)
+                if result is None:
+                    print(f"{method:<22} {'failed (out of memory?)':>23}")
+                else:
+                    seconds, peak, private, _ = result
+                    print(f"{method:<22} {seconds:>10.3f} {peak:>12,.0f} {private:>11,.0f}")
+            if not args.keep:
+                csv_path.unlink()
+                shutil.rmtree(store.path)
+    finally:
+        if not args.keep and args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare sklearn's predict_proba with the flattened FlatForest engine.
+
+Usage:
+    python benchmarks/bench_forest.py
+    python benchmarks/bench_forest.py --sizes 1 1000 1000000 --repeat 5
+"""
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from forest import FlatForest  # noqa: E402
+from scoring import load_pipeline  # noqa: E402
+
+
+def synthetic_rows(n, seed=0):
+    """Rows on the same grids the app's inputs use (glucose, bmi, age, pregnancies)."""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(40, 250, n).astype(np.float64),
+        np.round(rng.uniform(15.0, 60.0, n), 1),
+        rng.integers(21, 90, n).astype(np.float64),
+        rng.integers(0, 15, n).astype(np.float64),
+    ])
+
+
+def best_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 1_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    pipeline = load_pipeline()
+    flat = FlatForest.from_sklearn(pipeline)
+    print(f"{flat.n_trees} trees, {flat.n_nodes} nodes, max depth {flat.max_depth}\n")
+
+    print(f"{'batch':>10} {'sklearn':>12} {'flat':>12} {'speedup':>9}  identical")
+    print("-" * 58)
+    for n in args.sizes:
+        X = synthetic_rows(n)
+        repeat = args.repeat if n < 100_000 else max(1, args.repeat // 2)
+        t_sklearn = best_time(lambda: pipeline.predict_proba(X), repeat)
+        t_flat = best_time(lambda: flat.predict_proba(X), repeat)
+
+        # Sequential sklearn is the bit-exact reference; threaded accumulation
+        # may add trees in a different order.
+        forest = pipeline.steps[-1][1]
+        n_jobs, forest.n_jobs = forest.n_jobs, 1
+        identical = np.array_equal(pipeline.predict_proba(X), flat.predict_proba(X))
+        forest.n_jobs = n_jobs
+
+        print(f"{n:>10,} {t_sklearn * 1e3:>10.2f}ms {t_flat * 1e3:>10.2f}ms "
+              f"{t_sklearn / t_flat:>8.1f}x  {identical}")
+
+
+if __name__ == "__main__":
+    main()
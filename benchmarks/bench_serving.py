@@ -0,0 +1,57 @@
+"""
+p50/p99 latency of the pipeline as shipped (n_jobs=-1 on every call) against
+ServingModel, which only fans out to worker threads for large batches.
+
+Usage:
+    python benchmarks/bench_serving.py
+    python benchmarks/bench_serving.py --single-calls 2000 --batch-rows 100000
+"""
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from bench_forest import synthetic_rows  # noqa: E402
+from scoring import ServingModel, load_pipeline  # noqa: E402
+
+
+def latencies(fn, X, calls):
+    times = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        fn(X)
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--single-calls", type=int, default=1000)
+    parser.add_argument("--batch-rows", type=int, default=50_000)
+    parser.add_argument("--batch-calls", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    shipped = load_pipeline()
+    serving = ServingModel(load_pipeline())
+
+    regimes = [
+        ("1 row", synthetic_rows(1), args.single_calls),
+        (f"{args.batch_rows:,} rows", synthetic_rows(args.batch_rows), args.batch_calls),
+    ]
+    print(f"{'regime':>14} {'model':>10} {'p50':>10} {'p99':>10}")
+    print("-" * 48)
+    for name, X, calls in regimes:
+        for label, model in (("shipped", shipped), ("serving", serving)):
+            t = latencies(model.predict_proba, X, calls) * 1e3
+            print(f"{name:>14} {label:>10} {np.percentile(t, 50):>8.2f}ms "
+                  f"{np.percentile(t, 99):>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Load-test the prediction service over keep-alive connections on localhost.
+
+Opens `--connections` persistent connections, each sending `--requests`
+back-to-back POST /predict calls with random patients, and reports throughput
+and latency percentiles. Pass --spawn to start app/service.py for the run.
+
+Usage:
+    python benchmarks/load_test.py --spawn
+    python benchmarks/load_test.py --port 8080 --connections 64 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def random_patients(n, seed=0):
+    rng = np.random.default_rng(seed)
+    patients = []
+    for i in range(n):
+        patient = {
+            "glucose": int(rng.integers(60, 220)),
+            "age": int(rng.integers(21, 80)),
+            "pregnancies": int(rng.integers(0, 12)),
+        }
+        if i % 2:
+            patient["bmi"] = round(float(rng.uniform(18.0, 50.0)), 1)
+        else:
+            patient["weight_kg"] = float(rng.integers(100, 240)) / 2.0
+            patient["height_cm"] = float(rng.integers(300, 380)) / 2.0
+        patients.append(json.dumps(patient).encode())
+    return patients
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    body = await reader.readexactly(length)
+    return status, body
+
+
+async def _client(host, port, bodies, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            request = (f"POST /predict HTTP/1.1\r\nHost: {host}\r\n"
+                       f"Content-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, _ = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(host, port, connections, requests):
+    bodies = random_patients(requests)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, bodies, latencies, errors) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    return np.array(latencies), errors, elapsed
+
+
+def wait_for_port(host, port, timeout=60.0):
+    async def probe():
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                _, writer = await asyncio.open_connection(host, port)
+                writer.close()
+                return
+            except OSError:
+                await asyncio.sleep(0.2)
+        raise TimeoutError(f"service did not start on {host}:{port}")
+    asyncio.run(probe())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=100, help="requests per connection")
+    parser.add_argument("--spawn", action="store_true", help="start app/service.py for the test")
+    parser.add_argument("--service-args", default="", help="extra arguments for a spawned service")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen(
+            [sys.executable, str(ROOT / "app" / "service.py"), "--host", args.host,
+             "--port", str(args.port), *args.service_args.split()],
+            stdout=subprocess.DEVNULL,
+        )
+        wait_for_port(args.host, args.port)
+    try:
+        latencies, errors, elapsed = asyncio.run(
+            run(args.host, args.port, args.connections, args.requests))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    ms = latencies * 1e3
+    print(f"{len(latencies):,} requests over {args.connections} keep-alive connections "
+          f"in {elapsed:.2f}s")
+    print(f"throughput  {len(latencies) / elapsed:10,.0f} req/s")
+    for q in (50, 95, 99, 99.9):
+        print(f"p{q:<10} {np.percentile(ms, q):10.2f} ms")
+    print(f"max         {ms.max():10.2f} ms")
+    if errors:
+        print(f"{len(errors)} non-200 responses, e.g. {errors[:5]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Benchmark suite for the prediction path, with a regression check against a baseline.
+
+Measures model/diabetes_pipeline.pkl:
+
+* cold start: a fresh interpreter loading the model and scoring one row,
+  from the pickle and from the flat artifact (see bench_cold_start.py);
+* predict_proba across batch sizes, joblib thread counts and input layouts
+  (list of lists, NumPy array, DataFrame);
+* an end-to-end scripted session of app/app.py under Streamlit's AppTest:
+  first run, switching BMI entry mode, editing inputs and clicking
+  "Analyze My Risk" (see bench_app_rerun.py).
+
+Results are wall times in seconds, written as JSON (`--output`): the fastest
+of the repeats for cold start and predict_proba (the least disturbed by other
+load on the machine), medians for the app session. With `--baseline`, each result is compared to the stored
+one and the run exits with status 1 if any is slower by more than
+`--tolerance` (relative) and `--noise-floor-ms` (absolute), after re-measuring
+the regressed groups `--retries` times. Baselines are only
+meaningful on the machine that recorded them; refresh one with
+`--update-baseline`. The default tolerance of 50% suits shared machines,
+whose speed drifts by ~40% under load from neighbours; use a tighter one on
+a dedicated runner.
+
+Usage:
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json
+    python benchmarks/suite.py --quick --only predict app --baseline benchmarks/baseline.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json --update-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from bench_cold_start import SCRIPTS, cold_start  # noqa: E402
+from bench_forest import synthetic_rows  # noqa: E402
+from scoring import FEATURES, MODEL_PATH, load_pipeline  # noqa: E402
+
+GROUPS = ("cold_start", "predict", "app")
+BATCH_SIZES = (1, 100, 10_000)
+LAYOUTS = {
+    "list": lambda X: X.tolist(),
+    "numpy": lambda X: X,
+    "dataframe": lambda X: pd.DataFrame(X, columns=FEATURES),
+}
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_NOISE_FLOOR_MS = 1.0
+
+
+def best_time(fn, repeat):
+    """Fastest of `repeat` calls of `fn`, after one warm-up call."""
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_cold_start(runs):
+    return {f"cold_start/{name.split()[0]}": min(cold_start(script) for _ in range(runs))
+            for name, script in SCRIPTS.items()}
+
+
+def bench_predict(batch_sizes, threads, repeat):
+    """predict_proba for every batch size x thread count x input layout."""
+    pipeline = load_pipeline(MODEL_PATH)
+    # Follow joblib's active configuration instead of the pickled n_jobs=-1
+    pipeline.steps[-1][1].n_jobs = None
+    results = {}
+    for n in batch_sizes:
+        X = synthetic_rows(n)
+        calls = max(5, min(repeat, int(repeat * 1_000 / max(n, 1_000))))
+        for n_threads in threads:
+            for layout, convert in LAYOUTS.items():
+                data = convert(X)
+                with joblib.parallel_config(n_jobs=n_threads):
+                    seconds = best_time(lambda: pipeline.predict_proba(data), calls)
+                results[f"predict/rows={n}/threads={n_threads}/{layout}"] = seconds
+    return results
+
+
+APP_SESSION = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+sys.path[:0] = [{benchmarks!r}, {app_dir!r}]
+from bench_app_rerun import time_reruns
+start = time.perf_counter()
+cold, times = time_reruns({app!r}, {reruns})
+print(json.dumps({{"cold": cold, "times": times.tolist(), "total": time.perf_counter() - start}}))
+"""
+
+
+def bench_app(reruns):
+    """
+    A scripted AppTest session in a fresh interpreter, so its first run is
+    cold: first run, then `reruns` edits with periodic clicks.
+    """
+    script = APP_SESSION.format(benchmarks=str(ROOT / "benchmarks"), app_dir=str(ROOT / "app"),
+                                app=str(ROOT / "app" / "app.py"), reruns=reruns)
+    out = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True,
+                         text=True).stdout
+    session = json.loads(out.strip().splitlines()[-1])
+    return {
+        "app/first_run": session["cold"],
+        "app/rerun_median": float(np.median(session["times"])),
+        "app/session_total": session["total"],
+    }
+
+
+def environment():
+    return {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE,
+            noise_floor_ms=DEFAULT_NOISE_FLOOR_MS):
+    """
+    Results slower than the baseline beyond both tolerances.
+
+    Returns a list of (name, baseline seconds, current seconds) for every
+    result that is more than `tolerance` times and more than
+    `noise_floor_ms` slower than its baseline value. Results missing from the
+    baseline are ignored.
+    """
+    regressions = []
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if seconds > before * (1 + tolerance) and seconds - before > noise_floor_ms / 1e3:
+            regressions.append((name, before, seconds))
+    return regressions
+
+
+def _write_json(path, payload):
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(payload, indent=2) + "\n")
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--quick", action="store_true", help="fewer repeats, for CI smoke runs")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(BATCH_SIZES))
+    parser.add_argument("--threads", type=int, nargs="+", default=None,
+                        help="joblib thread counts (default: 1 and all cores)")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write these results to --baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown (default: %(default)s)")
+    parser.add_argument("--noise-floor-ms", type=float, default=DEFAULT_NOISE_FLOOR_MS,
+                        help="slowdowns below this are never regressions (default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="times regressed groups are re-measured, keeping the fastest "
+                             "result, before failing (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline needs --baseline")
+
+    # sklearn version and feature-name warnings would drown the results
+    warnings.filterwarnings("ignore")
+    repeat = 5 if args.quick else 20
+    threads = args.threads or sorted({1, os.cpu_count() or 1})
+    runners = {
+        "cold_start": lambda: bench_cold_start(3 if args.quick else 7),
+        "predict": lambda: bench_predict(args.batch_sizes, threads, repeat),
+        "app": lambda: bench_app(10 if args.quick else 30),
+    }
+    results = {}
+    for group in args.only:
+        results.update(runners[group]())
+
+    baseline = None
+    if args.baseline and not args.update_baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["results"]
+        for _ in range(args.retries):
+            regressions = compare(results, baseline, args.tolerance, args.noise_floor_ms)
+            if not regressions:
+                break
+            # Re-measure before failing: a burst of load on the machine slows everything
+            groups = sorted({name.split("/")[0] for name, _, _ in regressions})
+            print(f"re-measuring {', '.join(groups)}", file=sys.stderr)
+            for group in groups:
+                for name, seconds in runners[group]().items():
+                    results[name] = min(results[name], seconds)
+
+    payload = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "unit": "seconds",
+        "results": results,
+    }
+    width = max(len(name) for name in results)
+    for name, seconds in results.items():
+        print(f"{name:<{width}} {seconds * 1e3:10.2f}ms")
+    if args.output:
+        _write_json(args.output, payload)
+
+    if args.baseline and args.update_baseline:
+        _write_json(args.baseline, payload)
+        print(f"\nBaseline written to {args.baseline}")
+    elif baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, args.noise_floor_ms)
+        print(f"\n{len(regressions)} regression(s) against {args.baseline} "
+              f"(tolerance {args.tolerance:.0%}, noise floor {args.noise_floor_ms}ms)")
+        for name, before, after in regressions:
+            print(f"  {name}: {before * 1e3:.2f}ms -> {after * 1e3:.2f}ms "
+                  f"({after / before - 1:+.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()